@@ -8,12 +8,9 @@ apt-get update && apt-get install -y python3-pip python3-dev
 echo "Upgrading pip..."
 python -m pip install --upgrade pip
 
-echo "Installing Python dependencies..."
+echo "Installing Python dependencies (including gunicorn and its uvicorn workers)..."
 pip install -r requirements.txt
 
-echo "Installing gunicorn..."
-pip install gunicorn
-
 # Create necessary directories
 mkdir -p static staticfiles media
 
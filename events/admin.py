@@ -1,6 +1,7 @@
 # events/admin.py
-from django.contrib import admin
-from django.db.models import Sum
+from django.contrib import admin, messages
+from django.http import HttpResponse, HttpResponseRedirect
+from django.urls import path, reverse
 from django.utils.html import format_html
 from users.models import User  # Import User model
 from django_summernote.admin import SummernoteModelAdmin
@@ -11,8 +12,10 @@ from .models import (
     Organization, Event, SubEvent, EventRegistration, 
     EventScore, EventDraw, SubEventImage, SubmissionFile,
     SubEventFaculty, EventHeat, DepartmentScore, HeatParticipant,
-    EventCriteria
+    EventCriteria, DepartmentTotal
 )
+from .scoreboard import build_score_pivot
+from .scoreboard_engine import ScoreboardEngine, records
 
 class SubEventFacultyInline(admin.TabularInline):
     model = SubEventFaculty
@@ -179,8 +182,8 @@ class EventScoreAdmin(admin.ModelAdmin):
 @admin.register(EventDraw)
 class EventDrawAdmin(SummernoteModelAdmin):
     summernote_fields = ('description',)
-    list_display = ('sub_event', 'stage', 'team1', 'team2', 'winner', 'schedule')
-    list_filter = ('sub_event', 'stage')
+    list_display = ('sub_event', 'stage', 'bracket', 'round_number', 'match_number', 'team1', 'team2', 'winner', 'schedule')
+    list_filter = ('sub_event', 'stage', 'bracket')
     search_fields = ('team1__team_leader__username', 'team2__team_leader__username')
 
 @admin.register(SubEventImage)
@@ -239,37 +242,19 @@ class DepartmentScoreAdmin(admin.ModelAdmin):
             # Get all sub events
             sub_events = SubEvent.objects.all().order_by('name')
             
-            # Get all unique class groups (year-department-division combinations)
-            class_groups = qs.values(
-                'year', 'department', 'division'
-            ).annotate(
-                total_score=Sum('total_score')
-            ).order_by('department', 'year', 'division')
-            
-            # Get scores matrix
-            scores = {}
-            for score in qs:
-                if score.sub_event_id not in scores:
-                    scores[score.sub_event_id] = {}
-                key = f"{score.year}_{score.department}_{score.division}"
-                scores[score.sub_event_id][key] = score.total_score
-            
-            # Calculate totals for each group
-            for group in class_groups:
-                total = 0
-                for sub_event_id in scores:
-                    key = f"{group['year']}_{group['department']}_{group['division']}"
-                    total += scores[sub_event_id].get(key, 0)
-                group['total_score'] = total
+            # Build the scores matrix and class group totals in one pass
+            pivot = build_score_pivot(qs, sub_events)
+            class_groups = [
+                dict(column, total_score=pivot['column_totals'][column['id']])
+                for column in pivot['columns']
+            ]
                 
             extra_context = {
                 'sub_events': sub_events,
                 'class_groups': class_groups,
-                'scores': scores,
-                'total_score': sum(score.total_score for score in qs),
-                'department_totals': qs.values('department').annotate(
-                    total_score=Sum('total_score')
-                ).order_by('-total_score')
+                'scores': pivot['cells'],
+                'total_score': sum(pivot['column_totals'].values()),
+                'department_totals': pivot['department_totals']
             }
             response.context_data.update(extra_context)
         except:
@@ -282,6 +267,19 @@ class DepartmentScoreAdmin(admin.ModelAdmin):
             'all': ('admin/css/scoreboard.css',)
         }
 
+@admin.register(DepartmentTotal)
+class DepartmentTotalAdmin(admin.ModelAdmin):
+    list_display = ('department', 'year', 'division', 'event', 'total_score', 'total_aura_points', 'score_count', 'updated_at')
+    list_filter = ('event', 'department', 'year', 'division')
+    readonly_fields = ('event', 'department', 'year', 'division', 'total_score', 'total_aura_points', 'score_count', 'updated_at')
+
+    # Totals are maintained from DepartmentScore; use rebuild_standings to repair them
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 # Create a proxy model for the scoreboard view
 class Scoreboard(DepartmentScore):
     class Meta:
@@ -302,36 +300,62 @@ class ScoreboardAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         return False
 
+    def get_urls(self):
+        urls = [
+            path(
+                'export/<str:file_format>/',
+                self.admin_site.admin_view(self.export_view),
+                name='events_scoreboard_export'
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def export_view(self, request, file_format):
+        event_id = request.GET.get('event')
+        try:
+            content, content_type, extension = ScoreboardEngine(event_id).export(
+                file_format, request.GET.get('sheet', 'matrix')
+            )
+        except (ValueError, ImportError) as e:
+            self.message_user(request, f"Export failed: {e}", level=messages.ERROR)
+            return HttpResponseRedirect(reverse('admin:events_scoreboard_changelist'))
+
+        response = HttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="scoreboard.{extension}"'
+        return response
+
     def changelist_view(self, request, extra_context=None):
-        scores = DepartmentScore.objects.all()
+        engine = ScoreboardEngine()
+        scores = engine.department_scores
+        pivot = engine.pivot()
         
-        # Department-wise totals
-        department_totals = scores.values('department').annotate(
-            total_score=Sum('total_score')
-        ).order_by('-total_score')
-        
-        # Year-wise totals
-        year_totals = scores.values('year').annotate(
-            total_score=Sum('total_score')
-        ).order_by('-total_score')
-        
-        # Division-wise totals
-        division_totals = scores.values('division').annotate(
-            total_score=Sum('total_score')
-        ).order_by('-total_score')
+        class_groups = records(
+            engine.class_totals().sort_values(['department', 'year', 'division'])
+        )
         
-        # Combined totals
-        combined_totals = scores.values(
-            'department', 'year', 'division'
-        ).annotate(
-            total_score=Sum('total_score')
-        ).order_by('-total_score')
+        # Totals by a single dimension
+        def totals_by(column):
+            return records(
+                scores.groupby(column, dropna=False, as_index=False)['total_score'].sum()
+                .sort_values('total_score', ascending=False)
+            )
         
         extra_context = {
-            'department_totals': department_totals,
-            'year_totals': year_totals,
-            'division_totals': division_totals,
-            'combined_totals': combined_totals,
+            'sub_events': [
+                {'id': sub_event_id, 'name': name} for sub_event_id, name in pivot.index
+            ],
+            'class_groups': class_groups,
+            'scores': {
+                sub_event_id: row.to_dict() for (sub_event_id, _), row in pivot.iterrows()
+            },
+            'total_score': scores['total_score'].sum(),
+            'department_totals': records(engine.department_totals()),
+            'year_totals': totals_by('year'),
+            'division_totals': totals_by('division'),
+            'combined_totals': records(
+                engine.class_totals()[['department', 'year', 'division', 'total_score']]
+            ),
+            'export_formats': ['xlsx', 'csv', 'parquet'],
         }
         
         return super().changelist_view(request, extra_context=extra_context)
@@ -0,0 +1,266 @@
+# events/brackets.py
+from django.db import transaction
+
+from .models import EventDraw
+
+BRACKET_FORMATS = ('knockout', 'double_elimination', 'round_robin')
+
+# Knockout stage by rounds left after this one
+_STAGES_FROM_FINAL = ('FINALS', 'SEMIS', 'QUARTERS')
+
+
+class _Match:
+    """A match planned in memory; nothing is written until the whole bracket is known"""
+
+    def __init__(self, bracket, round_number, match_number, stage):
+        self.bracket = bracket
+        self.round_number = round_number
+        self.match_number = match_number
+        self.stage = stage
+        self.teams = [None, None]
+        # A dead slot will never be filled (a bye, or fed by one)
+        self.dead = [False, False]
+        # What fills each slot: (match, 'winner_to' or 'loser_to'), None for entries
+        self.feeders = [None, None]
+        self.winner_to = None  # (match, slot)
+        self.loser_to = None
+        self.draw = None
+
+
+def _link(source, output, target, slot):
+    setattr(source, output, (target, slot))
+    target.feeders[slot] = (source, output)
+
+
+def seed_positions(size):
+    """Seeds in bracket order so the top two can only meet in the final, e.g. 1 8 4 5 2 7 3 6"""
+    order = [1]
+    while len(order) < size:
+        order = [seed for top in order for seed in (top, 2 * len(order) + 1 - top)]
+    return order
+
+
+def _knockout_stage(round_number, rounds):
+    rounds_left = rounds - round_number
+    return _STAGES_FROM_FINAL[rounds_left] if rounds_left < len(_STAGES_FROM_FINAL) else 'PRELIMS'
+
+
+def _elimination_rounds(entries, bracket):
+    """A single elimination bracket over a power-of-two draw, byes going to the top seeds"""
+    size = 1 << (len(entries) - 1).bit_length()
+    rounds = size.bit_length() - 1
+    plan = []
+    for round_number in range(1, rounds + 1):
+        stage = _knockout_stage(round_number, rounds)
+        plan.append([
+            _Match(bracket, round_number, number, stage)
+            for number in range(1, (size >> round_number) + 1)
+        ])
+
+    positions = seed_positions(size)
+    for index, match in enumerate(plan[0]):
+        for slot in (0, 1):
+            seed = positions[2 * index + slot]
+            if seed <= len(entries):
+                match.teams[slot] = entries[seed - 1]
+            else:
+                match.dead[slot] = True
+
+    for this_round, next_round in zip(plan, plan[1:]):
+        for index, match in enumerate(this_round):
+            _link(match, 'winner_to', next_round[index // 2], index % 2)
+    return plan
+
+
+def _losers_rounds(winners):
+    """
+    The losers bracket of a double elimination. Odd rounds pair off the
+    survivors; even rounds bring in the losers of the next winners round,
+    in reverse order every other round to put off rematches.
+    """
+    rounds = len(winners)
+    size = 2 * len(winners[0])
+    plan = []
+    for round_number in range(1, 2 * (rounds - 1) + 1):
+        stage = _knockout_stage(min(round_number // 2 + 1, rounds - 1), rounds)
+        plan.append([
+            _Match('LOSERS', round_number, number, stage)
+            for number in range(1, (size >> ((round_number + 1) // 2 + 1)) + 1)
+        ])
+    if not plan:
+        return plan
+
+    for index, match in enumerate(winners[0]):
+        _link(match, 'loser_to', plan[0][index // 2], index % 2)
+    for winners_round in range(2, rounds + 1):
+        target = plan[2 * (winners_round - 1) - 1]
+        for index, match in enumerate(winners[winners_round - 1]):
+            position = len(target) - 1 - index if winners_round % 2 == 0 else index
+            _link(match, 'loser_to', target[position], 1)
+    for round_index, this_round in enumerate(plan[:-1]):
+        next_round = plan[round_index + 1]
+        for index, match in enumerate(this_round):
+            if round_index % 2 == 0:
+                _link(match, 'winner_to', next_round[index], 0)
+            else:
+                _link(match, 'winner_to', next_round[index // 2], index % 2)
+    return plan
+
+
+def _round_robin(entries, stage):
+    """Every entry against every other, circle method: n - 1 rounds (n if odd, one sitting out)"""
+    teams = list(entries) + ([None] if len(entries) % 2 else [])
+    plan = []
+    for round_number in range(1, len(teams)):
+        fixtures = []
+        for index in range(len(teams) // 2):
+            home, away = teams[index], teams[-1 - index]
+            if home is None or away is None:
+                continue
+            match = _Match('ROUND_ROBIN', round_number, len(fixtures) + 1, stage)
+            match.teams = [home, away]
+            fixtures.append(match)
+        plan.append(fixtures)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return plan
+
+
+def _resolve_byes(matches):
+    """
+    Drop every match missing a side, in bracket order. A lone entry goes
+    straight into the next match; a lone feed is rewired to skip the dropped
+    match. Declaring a winner then never has walkovers to cascade through.
+    """
+    kept = []
+    for match in matches:
+        live = [slot for slot in (0, 1) if not match.dead[slot]]
+        if len(live) == 2 or match.winner_to is None:
+            kept.append(match)
+            continue
+        if match.loser_to:
+            target, slot = match.loser_to
+            target.dead[slot] = True
+        target, target_slot = match.winner_to
+        if not live:
+            target.dead[target_slot] = True
+        elif match.feeders[live[0]] is None:
+            target.teams[target_slot] = match.teams[live[0]]
+            target.feeders[target_slot] = None
+        else:
+            source, output = match.feeders[live[0]]
+            _link(source, output, target, target_slot)
+    return kept
+
+
+def plan_bracket(entries, bracket_format='knockout', stage='PRELIMS'):
+    """
+    Every match of a bracket for ``entries`` (registration ids, best seed
+    first), worked out in memory: seeding, byes, and where each winner and
+    loser goes next. Round robin fixtures all play in ``stage``.
+
+    A double elimination ends in a grand final between the two bracket
+    winners, then a reset (GRAND_FINAL round 2) between the same two, so
+    that nobody goes out on one loss. advance() drops the reset when the
+    winners bracket side takes the first grand final.
+    """
+    if bracket_format not in BRACKET_FORMATS:
+        raise ValueError(f"Unknown bracket format '{bracket_format}', expected one of {', '.join(BRACKET_FORMATS)}")
+    if len(entries) < 2:
+        raise ValueError('A bracket needs at least 2 entries')
+
+    if bracket_format == 'round_robin':
+        return [match for fixtures in _round_robin(entries, stage) for match in fixtures]
+
+    if bracket_format == 'knockout':
+        plan = _elimination_rounds(entries, 'KNOCKOUT')
+    else:
+        winners = _elimination_rounds(entries, 'WINNERS')
+        losers = _losers_rounds(winners)
+        grand_final = _Match('GRAND_FINAL', 1, 1, 'FINALS')
+        _link(winners[-1][0], 'winner_to', grand_final, 0)
+        _link(losers[-1][0] if losers else winners[-1][0], 'winner_to' if losers else 'loser_to', grand_final, 1)
+        # Played only if the losers bracket side wins, handing the winners bracket side its first loss
+        reset = _Match('GRAND_FINAL', 2, 1, 'FINALS')
+        _link(grand_final, 'winner_to', reset, 1)
+        _link(grand_final, 'loser_to', reset, 0)
+        plan = winners + losers + [[grand_final, reset]]
+    return _resolve_byes([match for matches in plan for match in matches])
+
+
+def generate_bracket(sub_event, entries, bracket_format='knockout', stage='PRELIMS', schedule=None, venue=''):
+    """
+    Plan a bracket with plan_bracket() and write it: one bulk insert for the
+    matches, one bulk update linking each to the matches it feeds.
+    """
+    plan = plan_bracket(entries, bracket_format, stage)
+    with transaction.atomic():
+        draws = EventDraw.objects.bulk_create([
+            EventDraw(
+                sub_event=sub_event,
+                stage=match.stage,
+                team1_id=match.teams[0],
+                team2_id=match.teams[1],
+                schedule=schedule,
+                venue=venue or '',
+                bracket=match.bracket,
+                round_number=match.round_number,
+                match_number=match.match_number
+            )
+            for match in plan
+        ], batch_size=500)
+        for match, draw in zip(plan, draws):
+            match.draw = draw
+
+        linked = []
+        for match in plan:
+            if match.winner_to:
+                match.draw.next_match = match.winner_to[0].draw
+                match.draw.next_slot = match.winner_to[1] + 1
+            if match.loser_to:
+                match.draw.loser_next_match = match.loser_to[0].draw
+                match.draw.loser_next_slot = match.loser_to[1] + 1
+            if match.winner_to or match.loser_to:
+                linked.append(match.draw)
+        EventDraw.objects.bulk_update(
+            linked, ['next_match', 'next_slot', 'loser_next_match', 'loser_next_slot'], batch_size=500
+        )
+    return draws
+
+
+def advance(draw, winner_id):
+    """
+    Record a match winner and put the winner (and in double elimination the
+    loser) into their next matches: at most three single-row UPDATEs,
+    whatever the size of the bracket. Winning the first grand final from
+    the winners bracket side decides the bracket, and deletes the reset
+    instead. Returns False when the match already had a winner.
+    """
+    loser_id = draw.team2_id if winner_id == draw.team1_id else draw.team1_id
+    with transaction.atomic():
+        if not EventDraw.objects.filter(pk=draw.pk, winner__isnull=True).update(winner_id=winner_id):
+            return False
+        if draw.bracket == 'GRAND_FINAL' and draw.round_number == 1 and winner_id == draw.team1_id:
+            # Still unbeaten, so there is no reset to play
+            if draw.next_match_id:
+                EventDraw.objects.filter(pk=draw.next_match_id, winner__isnull=True).delete()
+            draw.next_match_id = draw.loser_next_match_id = None
+        if draw.next_match_id:
+            EventDraw.objects.filter(pk=draw.next_match_id).update(**{f'team{draw.next_slot}_id': winner_id})
+        if draw.loser_next_match_id:
+            EventDraw.objects.filter(pk=draw.loser_next_match_id).update(
+                **{f'team{draw.loser_next_slot}_id': loser_id}
+            )
+    draw.winner_id = winner_id
+    return True
+
+
+def order_entries(registrations, seeds=(), rng=None):
+    """Registration ids in seed order: ``seeds`` first as given, the rest shuffled by ``rng`` after them"""
+    ids = list(registrations.values_list('id', flat=True))
+    known = set(ids)
+    seeded = [registration_id for registration_id in dict.fromkeys(seeds) if registration_id in known]
+    placed = set(seeded)
+    rest = [registration_id for registration_id in ids if registration_id not in placed]
+    if rng is not None:
+        rng.shuffle(rest)
+    return seeded + rest
@@ -0,0 +1,213 @@
+# events/caching.py
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .models import ScoreGeneration, SubEvent
+
+
+def _get_request(args):
+    # Works for both ViewSet actions (self, request, ...) and @api_view functions
+    return args[0] if isinstance(args[0], Request) else args[1]
+
+
+def _matches(if_none_match, etag):
+    for tag in (if_none_match or '').split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def _event_id_for_sub_event(**lookup):
+    return SubEvent.objects.filter(**lookup).values_list('event_id', flat=True).first()
+
+
+def score_etag(event_param=None, sub_event_param=None, sub_event_kwarg=None):
+    """
+    Answer If-None-Match with 304 while the relevant score generation is unchanged.
+
+    The event is taken from the ``event_param`` query param, from a sub-event id
+    in the ``sub_event_param`` query param or the ``sub_event_kwarg`` URL kwarg,
+    and falls back to the generation of all events.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request = _get_request(args)
+
+            try:
+                event_id = None
+                if event_param:
+                    event_id = request.query_params.get(event_param)
+                if sub_event_param and request.query_params.get(sub_event_param):
+                    event_id = _event_id_for_sub_event(pk=request.query_params.get(sub_event_param))
+                if sub_event_kwarg and kwargs.get(sub_event_kwarg):
+                    event_id = _event_id_for_sub_event(pk=kwargs[sub_event_kwarg])
+                etag = f'"{ScoreGeneration.token(event_id)}"'
+            except (TypeError, ValueError):
+                # Malformed ids are left for the view to report
+                return view(*args, **kwargs)
+
+            if _matches(request.headers.get('If-None-Match'), etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                return response
+
+            # Lets single_flight keep results from different generations apart
+            request.score_generation = etag
+
+            response = view(*args, **kwargs)
+            # A stale result predates this generation and must not carry its tag
+            if response.status_code == status.HTTP_200_OK and not getattr(response, 'is_stale', False):
+                response['ETag'] = etag
+                response['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def version_etag(instance):
+    """Strong ETag naming one row at one version, e.g. an EventScore"""
+    return f'"{instance.pk}.{instance.version}"'
+
+
+def if_match_version(request, instance):
+    """
+    The version of ``instance`` an edit was based on. Taken from If-Match
+    (a version_etag or ``*``), else from a ``version`` field in the body, else
+    the version just read. None when If-Match names no version of this row,
+    which can only be answered with 412.
+    """
+    if_match = request.headers.get('If-Match')
+    if if_match is None:
+        version = request.data.get('version', instance.version)
+        return int(version)
+
+    for tag in if_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return instance.version
+        pk, _, version = tag.removeprefix('W/').strip('"').partition('.')
+        if pk == str(instance.pk) and version.isdigit():
+            return int(version)
+    return None
+
+
+class _Flight:
+    """A computation in progress that concurrent identical requests wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """
+    Per-process request coalescing. Identical requests share one in-flight
+    computation, and for ``stale_for`` seconds after a result stops being fresh
+    it is served to everyone except the one request that refreshes it.
+    """
+
+    def __init__(self, max_entries=256, wait_timeout=30):
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._results = OrderedDict()  # key -> (computed_at, generation, status, data)
+        self._flights = {}
+
+    def run(self, key, generation, compute, fresh_for, stale_for):
+        """Return (status, data, is_stale) for key, computing at most once at a time"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._results.get(key)
+            if cached:
+                self._results.move_to_end(key)
+                age = now - cached[0]
+                if cached[1] == generation and age < fresh_for:
+                    return cached[2], cached[3], False
+
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+            elif cached and age < fresh_for + stale_for:
+                # Someone is already refreshing, serve what we have
+                return cached[2], cached[3], True
+            else:
+                leader = False
+
+        if not leader:
+            if flight.done.wait(self.wait_timeout) and flight.result:
+                return flight.result[0], flight.result[1], False
+            # The leader failed or is stuck, compute this one ourselves
+            result = compute()
+            return result[0], result[1], False
+
+        try:
+            flight.result = compute()
+            if flight.result[0] == status.HTTP_200_OK:
+                with self._lock:
+                    self._results[key] = (time.monotonic(), generation) + flight.result
+                    self._results.move_to_end(key)
+                    while len(self._results) > self.max_entries:
+                        self._results.popitem(last=False)
+            return flight.result[0], flight.result[1], False
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+flights = SingleFlight()
+
+
+def _request_key(view, request, kwargs):
+    user = getattr(request, 'user', None)
+    role = getattr(user, 'user_type', None) or ('AUTHENTICATED' if user and user.is_authenticated else 'ANONYMOUS')
+    params = tuple(sorted(
+        (name, tuple(values)) for name, values in request.query_params.lists()
+    ))
+    return (view.__module__, view.__qualname__, tuple(sorted(kwargs.items())), params, role)
+
+
+def single_flight(fresh_for=5, stale_for=30):
+    """
+    Coalesce concurrent identical GETs (same endpoint, query params and role)
+    into one computation per process, serving the last result for up to
+    ``stale_for`` seconds while a single request refreshes it.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request = _get_request(args)
+
+            def compute():
+                response = view(*args, **kwargs)
+                # Shared across threads, so reduce to plain JSON values once
+                data = json.loads(JSONRenderer().render(response.data)) if response.data is not None else None
+                return response.status_code, data
+
+            result_status, data, is_stale = flights.run(
+                _request_key(view, request, kwargs),
+                getattr(request, 'score_generation', None),
+                compute,
+                fresh_for,
+                stale_for
+            )
+            response = Response(data, status=result_status)
+            response.is_stale = is_stale
+            return response
+        return wrapper
+    return decorator
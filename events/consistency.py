@@ -0,0 +1,184 @@
+# events/consistency.py
+import warnings
+
+import numpy as np
+
+from .models import CriterionScore, User
+
+
+def _index(values):
+    """Sorted distinct values and each value's position among them"""
+    labels, positions = np.unique(np.asarray(values), return_inverse=True)
+    return labels.tolist(), positions.reshape(-1)
+
+
+def _mean_grid(index, values, shape):
+    """
+    Average values into a dense array, NaN where nothing was scored. Repeated
+    cells (a judge scoring the same entry in several rounds) are averaged.
+    """
+    sums = np.zeros(shape)
+    counts = np.zeros(shape)
+    np.add.at(sums, index, values)
+    np.add.at(counts, index, 1)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def _leave_one_out(grid):
+    """Mean of every other judge (axis 0) for each cell, NaN with fewer than two judges"""
+    scored = ~np.isnan(grid)
+    counts = scored.sum(axis=0)
+    others = (np.nansum(grid, axis=0) - np.nan_to_num(grid)) / (counts - 1)
+    others[:, counts < 2] = np.nan
+    return np.where(scored, others, np.nan)
+
+
+def _correlate(a, b):
+    """Row-wise Pearson correlation over the cells both rows have"""
+    both = ~np.isnan(a) & ~np.isnan(b)
+    a = np.where(both, a, np.nan)
+    b = np.where(both, b, np.nan)
+    a = a - np.nanmean(a, axis=-1, keepdims=True)
+    b = b - np.nanmean(b, axis=-1, keepdims=True)
+    return np.nansum(a * b, axis=-1) / np.sqrt(np.nansum(a ** 2, axis=-1) * np.nansum(b ** 2, axis=-1))
+
+
+def _json(array, decimals=3):
+    """Rounded (nested) floats with None for NaN"""
+    rounded = np.round(np.asarray(array, dtype=float), decimals)
+    return np.where(np.isfinite(rounded), rounded, None).tolist()
+
+
+def judge_consistency(scores, threshold=2.5):
+    """
+    How far the judges of a set of EventScores (a heat or a whole sub-event)
+    agree. Scores are laid out as a judges x participants matrix of totals and
+    a judges x participants x criteria tensor, and each statistic is computed
+    on those arrays in one pass:
+
+    - bias: mean deviation from the other judges' consensus, overall and per
+      criterion (positive is lenient)
+    - correlation: Pearson correlation of every pair of judges' totals over the
+      participants both scored, and of each judge with the others' consensus
+    - normalized scores: each judge's totals as z-scores, averaged per
+      participant, which cancels out lenient or harsh judges
+    - outliers: scores more than ``threshold`` standard deviations from the
+      other judges' consensus once the judge's own bias is allowed for
+
+    Returns None when there is nothing scored.
+    """
+    rows = list(scores.filter(judge__isnull=False, total_score__isnull=False).values_list(
+        'judge_id', 'event_registration_id', 'total_score'
+    ))
+    if not rows:
+        return None
+
+    judge_ids, judges = _index([row[0] for row in rows])
+    registration_ids, registrations = _index([row[1] for row in rows])
+    totals = _mean_grid(
+        (judges, registrations), [float(row[2]) for row in rows], (len(judge_ids), len(registration_ids))
+    )
+
+    judge_position = {judge_id: position for position, judge_id in enumerate(judge_ids)}
+    registration_position = {registration_id: position for position, registration_id in enumerate(registration_ids)}
+    criterion_rows = [
+        row for row in CriterionScore.objects.filter(score__in=scores).values_list(
+            'score__judge_id', 'score__event_registration_id', 'criterion', 'value'
+        )
+        if row[0] in judge_position and row[1] in registration_position
+    ]
+    criteria, criterion_index = _index([row[2] for row in criterion_rows]) if criterion_rows else ([], [])
+    tensor = _mean_grid(
+        (
+            np.array([judge_position[row[0]] for row in criterion_rows], dtype=int),
+            np.array([registration_position[row[1]] for row in criterion_rows], dtype=int),
+            np.array(criterion_index, dtype=int)
+        ),
+        [float(row[3]) for row in criterion_rows],
+        (len(judge_ids), len(registration_ids), len(criteria))
+    )
+
+    with warnings.catch_warnings():
+        # Judges or participants with too few scores give empty means, left as NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        scored = ~np.isnan(totals)
+        judge_counts = scored.sum(axis=0)
+
+        consensus = _leave_one_out(totals)
+        residuals = totals - consensus
+        bias = np.nanmean(residuals, axis=1)
+        criteria_bias = np.nanmean(tensor - _leave_one_out(tensor), axis=1)
+
+        # Pairwise correlations, every judge against every other at once
+        correlation = _correlate(totals[:, None, :], totals[None, :, :])
+        overlap = scored.astype(int) @ scored.T.astype(int)
+        correlation[overlap < 3] = np.nan
+        np.fill_diagonal(correlation, 1.0)
+        consensus_correlation = _correlate(totals, consensus)
+
+        means = np.nanmean(totals, axis=1, keepdims=True)
+        deviations = np.nanstd(totals, axis=1, keepdims=True)
+        z_scores = np.where(deviations > 0, (totals - means) / deviations, np.where(scored, 0.0, np.nan))
+        normalized = np.nanmean(z_scores, axis=0)
+
+        # A consistently lenient or harsh judge is bias, not a string of outliers
+        unexplained = residuals - bias[:, None]
+        residual_spread = np.nanstd(unexplained)
+        outlier_scores = unexplained / residual_spread if residual_spread > 0 else np.full_like(residuals, np.nan)
+        flagged = np.argwhere(np.abs(np.nan_to_num(outlier_scores)) > threshold)
+
+        mean_totals = np.nanmean(totals, axis=0)
+        disagreement = np.nanstd(totals, axis=0)
+
+    order = np.argsort(-np.nan_to_num(normalized, nan=-np.inf), kind='stable')
+    ranks = np.empty(len(order), dtype=int)
+    ranks[order] = np.arange(1, len(order) + 1)
+
+    names = {
+        user_id: f'{first_name} {last_name}'.strip()
+        for user_id, first_name, last_name in User.objects.filter(id__in=judge_ids).values_list(
+            'id', 'first_name', 'last_name'
+        )
+    }
+
+    return {
+        'criteria': criteria,
+        'judges': [
+            {
+                'judge_id': judge_id,
+                'judge_name': names.get(judge_id, ''),
+                'scored': int(scored[j].sum()),
+                'mean_total': _json(means[j, 0]),
+                'bias': _json(bias[j]),
+                'criteria_bias': dict(zip(criteria, _json(criteria_bias[j]))),
+                'consensus_correlation': _json(consensus_correlation[j])
+            }
+            for j, judge_id in enumerate(judge_ids)
+        ],
+        'correlation': {
+            'judge_ids': judge_ids,
+            'matrix': _json(correlation)
+        },
+        'participants': [
+            {
+                'registration_id': registration_id,
+                'judges': int(judge_counts[p]),
+                'mean_total': _json(mean_totals[p]),
+                'normalized_score': _json(normalized[p]),
+                'normalized_rank': int(ranks[p]),
+                'disagreement': _json(disagreement[p])
+            }
+            for p, registration_id in enumerate(registration_ids)
+        ],
+        'outliers': [
+            {
+                'judge_id': judge_ids[j],
+                'registration_id': registration_ids[p],
+                'total_score': _json(totals[j, p]),
+                'consensus': _json(consensus[j, p]),
+                'deviation': _json(residuals[j, p]),
+                'z_score': _json(outlier_scores[j, p])
+            }
+            for j, p in flagged
+        ]
+    }
@@ -0,0 +1,160 @@
+# events/criteria.py
+import threading
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import Avg, Count, F, FloatField, Max, Min, StdDev
+
+NEGATIVE_MARKING = 'Negative Marking'
+
+_CENTS = Decimal('0.01')
+
+
+class CompiledCriteria:
+    """
+    An EventCriteria JSON flattened into arrays: criterion names in a fixed
+    order with their weights and max scores, and the slot negative marking
+    occupies (if any). Whole batches of criteria_scores are scored as one
+    matrix, one row per entry and one column per criterion.
+    """
+
+    def __init__(self, criteria):
+        self.source = criteria
+        criteria = criteria if isinstance(criteria, dict) else {}
+        self.names = tuple(criteria)
+        self.index = {name: column for column, name in enumerate(self.names)}
+        details = [criteria[name] if isinstance(criteria[name], dict) else {} for name in self.names]
+        # Criteria saved without a weight count fully, as the serializer always assumed
+        self.weights = np.array([float(d.get('weight', 1)) for d in details])
+        self.max_scores = np.array([
+            float(d['max_score']) if d.get('max_score') is not None else np.inf for d in details
+        ])
+        self.negative = self.index.get(NEGATIVE_MARKING)
+        if self.negative is not None:
+            # Deductions are subtracted as marked, not weighted
+            self.weights[self.negative] = 0.0
+
+    def matrix(self, rows):
+        """
+        Lay criteria_scores dicts out as a score matrix, missing criteria as 0.
+        Returns (matrix, problems) where problems maps a row index to what is
+        wrong with it.
+        """
+        scores = np.zeros((len(rows), len(self.names)))
+        problems = {}
+        for row, criteria_scores in enumerate(rows):
+            for criterion, value in criteria_scores.items():
+                column = self.index.get(criterion)
+                if column is None:
+                    problems.setdefault(row, []).append(f"unknown criterion '{criterion}'")
+                    continue
+                if isinstance(value, bool):
+                    value = None
+                try:
+                    scores[row, column] = float(value)
+                except (TypeError, ValueError):
+                    problems.setdefault(row, []).append(f"'{criterion}' must be a number")
+
+        # Range check every cell at once, then report per row
+        out_of_range = (scores < 0) | (scores > self.max_scores) | ~np.isfinite(scores)
+        for row, column in zip(*np.nonzero(out_of_range)):
+            max_score = self.max_scores[column]
+            bound = f'between 0 and {max_score:g}' if np.isfinite(max_score) else 'at least 0'
+            problems.setdefault(int(row), []).append(f"'{self.names[column]}' must be {bound}")
+        return scores, problems
+
+    def totals(self, scores, allow_negative_marking=True):
+        """Weighted total per row of a score matrix, less negative marking if allowed"""
+        totals = scores @ self.weights
+        if self.negative is not None and allow_negative_marking:
+            totals = totals - scores[:, self.negative]
+        return [Decimal(repr(total)).quantize(_CENTS) for total in totals.tolist()]
+
+    @property
+    def configured(self):
+        return bool(self.names)
+
+    def score(self, rows, allow_negative_marking=True):
+        """
+        Validate and total a batch of criteria_scores dicts: (totals, problems).
+        Without criteria on file every criterion submitted counts once, with
+        no upper bound, as the plain sum always did.
+        """
+        if not self.configured:
+            submitted = dict.fromkeys(name for row in rows for name in row)
+            return CompiledCriteria({name: {} for name in submitted}).score(rows, allow_negative_marking)
+        scores, problems = self.matrix(rows)
+        return self.totals(scores, allow_negative_marking), problems
+
+
+_lock = threading.Lock()
+_compiled = {}
+
+
+def compiled_criteria(event_criteria):
+    """
+    The compiled form of an EventCriteria (or of no criteria at all), built
+    once per process. Saving the criteria evicts it here, and a copy compiled
+    from JSON that another process has since changed is rebuilt on sight.
+    """
+    if event_criteria is None:
+        return CompiledCriteria({})
+
+    with _lock:
+        compiled = _compiled.get(event_criteria.pk)
+    if compiled is not None and compiled.source == event_criteria.criteria:
+        return compiled
+
+    compiled = CompiledCriteria(event_criteria.criteria)
+    if event_criteria.pk is not None:
+        with _lock:
+            _compiled[event_criteria.pk] = compiled
+    return compiled
+
+
+def invalidate(criteria_id):
+    with _lock:
+        _compiled.pop(criteria_id, None)
+
+
+# Extra GROUP BY columns per breakdown, on top of the criterion itself
+CRITERION_GROUPINGS = {
+    'criterion': {},
+    'judge': {
+        'judge_id': F('score__judge'),
+        'judge_first_name': F('score__judge__first_name'),
+        'judge_last_name': F('score__judge__last_name')
+    },
+    'department': {
+        'department': F('score__event_registration__department')
+    },
+    'class': {
+        'department': F('score__event_registration__department'),
+        'year': F('score__event_registration__year'),
+        'division': F('score__event_registration__division')
+    }
+}
+
+
+def criterion_stats(criterion_scores, group_by='criterion'):
+    """
+    Count, mean, spread and range of CriterionScore values per criterion and
+    CRITERION_GROUPINGS breakdown, from a single GROUP BY query.
+    """
+    columns = CRITERION_GROUPINGS[group_by]
+    rows = criterion_scores.values('criterion', **columns).annotate(
+        count=Count('id'),
+        average=Avg('value', output_field=FloatField()),
+        std_dev=StdDev('value', output_field=FloatField()),
+        minimum=Min('value'),
+        maximum=Max('value')
+    ).order_by('criterion', *columns)
+
+    stats = []
+    for row in rows:
+        for field in ('average', 'std_dev'):
+            row[field] = round(float(row[field]), 2) if row[field] is not None else None
+        if group_by == 'judge':
+            row['judge_name'] = f"{row.pop('judge_first_name') or ''} {row.pop('judge_last_name') or ''}".strip()
+        stats.append(row)
+    return stats
@@ -0,0 +1,164 @@
+# events/heat_view.py
+from functools import cached_property
+
+from django.db.models import F
+
+from .models import EventRegistration, EventScore, HeatParticipant
+from .ranking import rank_scores
+
+REGISTRATION_FIELDS = {
+    'department': 'department',
+    'year': 'year',
+    'division': 'division',
+    'team_name': 'team_name',
+    'sub_event__participation_type': 'participation_type',
+    'team_leader__first_name': 'leader_first_name',
+    'team_leader__last_name': 'leader_last_name'
+}
+
+
+def _full_name(first_name, last_name):
+    return f"{first_name or ''} {last_name or ''}".strip()
+
+
+class HeatReadModel:
+    """
+    What the heat endpoints show, read in a fixed number of queries whatever
+    the size of the heat: the roster with its registrations, each solo
+    entry's first team member, and the judges' scores indexed by
+    registration id. Pass the heat with its sub-event already selected.
+    """
+
+    def __init__(self, heat):
+        self.heat = heat
+
+    @cached_property
+    def roster(self):
+        rows = HeatParticipant.objects.filter(heat=self.heat).order_by('id').values(
+            'registration_id', 'position',
+            **{alias: F(f'registration__{field}') for field, alias in REGISTRATION_FIELDS.items()}
+        )
+        return list(rows)
+
+    @cached_property
+    def first_members(self):
+        """Registration id -> (first name, last name) of its first team member, as team_members.first()"""
+        members = {}
+        for registration_id, first_name, last_name in EventRegistration.team_members.through.objects.filter(
+            eventregistration__heatparticipant__heat=self.heat
+        ).order_by('eventregistration_id', 'user_id').values_list(
+            'eventregistration_id', 'user__first_name', 'user__last_name'
+        ):
+            members.setdefault(registration_id, (first_name, last_name))
+        return members
+
+    @cached_property
+    def scores(self):
+        """The heat's non-empty scores in one query, with their judge and registration"""
+        rows = EventScore.objects.filter(heat=self.heat).order_by('id').values(
+            'event_registration_id', 'judge_id', 'judge__first_name', 'judge__last_name',
+            'criteria_scores', 'total_score', 'aura_points',
+            **{alias: F(f'event_registration__{field}') for field, alias in REGISTRATION_FIELDS.items()}
+        )
+        # Skip empty scores
+        return [row for row in rows if row['criteria_scores'] or row['total_score'] is not None]
+
+    @cached_property
+    def scores_by_registration(self):
+        index = {}
+        for score in self.scores:
+            index.setdefault(score['event_registration_id'], []).append(score)
+        return index
+
+    def _header(self):
+        return {
+            'heat_id': self.heat.id,
+            'stage': self.heat.stage,
+            'round_number': self.heat.round_number,
+            'heat_number': self.heat.heat_number,
+            'status': self.heat.status
+        }
+
+    def details(self):
+        """The roster with names, and each entry's judge scores once scoring has started"""
+        show_scores = self.heat.status in ['IN_PROGRESS', 'COMPLETED']
+        participants = []
+        for row in self.roster:
+            participant = {
+                'registration_id': row['registration_id'],
+                'department': row['department'],
+                'year': row['year'],
+                'division': row['division'],
+                'position': row['position'],
+                'scores': []
+            }
+            if row['participation_type'] == 'SOLO':
+                member = self.first_members.get(row['registration_id'])
+                participant['participant_name'] = _full_name(*member) if member else None
+                participant['team_name'] = None
+            else:
+                participant['team_name'] = row['team_name']
+                participant['participant_name'] = None
+
+            if show_scores:
+                participant['scores'] = [
+                    {
+                        'judge_id': score['judge_id'],
+                        'judge_name': _full_name(score['judge__first_name'], score['judge__last_name']),
+                        'criteria_scores': score['criteria_scores'],
+                        'total_score': score['total_score'],
+                        'aura_points': score['aura_points']
+                    }
+                    for score in self.scores_by_registration.get(row['registration_id'], [])
+                ]
+            participants.append(participant)
+
+        return dict(
+            self._header(),
+            schedule=self.heat.schedule,
+            venue=self.heat.venue,
+            participants=participants
+        )
+
+    def scores_by_judge(self):
+        """Every score grouped under its judge's name"""
+        by_judge = {}
+        for score in self.scores:
+            judge_name = _full_name(score['judge__first_name'], score['judge__last_name'])
+            if score['participation_type'] == 'SOLO':
+                participant_name = _full_name(
+                    score['leader_first_name'], score['leader_last_name']
+                ) or "Unknown Participant"
+            else:
+                participant_name = score['team_name'] or "Unknown Team"
+            by_judge.setdefault(judge_name, []).append({
+                'participant_name': participant_name,
+                'registration_id': score['event_registration_id'],
+                'criteria_scores': score['criteria_scores'],
+                'total_score': score['total_score'],
+                'aura_points': score['aura_points'],
+                'department': score['department'],
+                'year': score['year'],
+                'division': score['division']
+            })
+        return dict(self._header(), sub_event=self.heat.sub_event.name, scores_by_judge=by_judge)
+
+    def final_results(self):
+        """Average scores, stored positions and ranks, from one ranking query"""
+        results = [
+            {
+                'position': score['position'],
+                'rank': score['rank'],
+                'tied': score['tied'],
+                'registration_id': score['registration_id'],
+                'participant_name': score['participant_name'],
+                'team_name': None if score['participation_type'] == 'SOLO' else score['team_name'],
+                'department': score['department'],
+                'year': score['year'],
+                'division': score['division'],
+                'average_score': round(score['score'], 2) if score['score'] else None,
+                'aura_points': score['aura_points'] or 0
+            }
+            for score in rank_scores(EventScore.objects.filter(heat=self.heat), order_by_position=True)
+        ]
+        return dict(self._header(), sub_event=self.heat.sub_event.name, results=results)
@@ -0,0 +1,93 @@
+# events/history.py
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from .models import StandingsSnapshot
+
+
+def standings_series(department, year=None, division=None, event_id=None, start=None, end=None):
+    """
+    (timestamp, total, aura points) points for a department, narrowed to the
+    year, division and event given, between start and end. The first point
+    is what was carried in from before ``start``.
+    """
+    history = StandingsSnapshot.objects.filter(department=department)
+    if year:
+        history = history.filter(year=year)
+    if division:
+        history = history.filter(division=division)
+    if event_id:
+        history = history.filter(event_id=event_id)
+
+    total, aura_points = Decimal('0.00'), 0
+    if start:
+        carried = history.filter(recorded_at__lt=start).aggregate(
+            total=Coalesce(Sum('score_delta'), Decimal('0.00')),
+            aura_points=Coalesce(Sum('aura_points_delta'), 0)
+        )
+        total, aura_points = carried['total'], carried['aura_points']
+        history = history.filter(recorded_at__gte=start)
+    if end:
+        history = history.filter(recorded_at__lte=end)
+
+    points = [(start, total, aura_points)] if start else []
+    deltas = history.order_by('recorded_at', 'id').values_list('recorded_at', 'score_delta', 'aura_points_delta')
+    for recorded_at, delta, aura_delta in deltas:
+        total += delta
+        aura_points += aura_delta
+        points.append((recorded_at, total, aura_points))
+    return points
+
+
+def bucket_downsample(points, threshold):
+    """Last total in each of ``threshold`` equal time buckets (totals are a step function)"""
+    if threshold <= 0 or len(points) <= threshold:
+        return points
+
+    times = np.array([point[0].timestamp() for point in points])
+    edges = np.linspace(times[0], times[-1], threshold + 1)
+    # Index of the bucket each point falls in, the last edge belongs to the last bucket
+    buckets = np.minimum(np.searchsorted(edges, times, side='right') - 1, threshold - 1)
+    last_in_bucket = np.flatnonzero(np.append(buckets[1:] != buckets[:-1], True))
+    return [points[index] for index in last_in_bucket]
+
+
+def lttb_downsample(points, threshold):
+    """Largest-Triangle-Three-Buckets: keeps the points that best preserve the chart's shape"""
+    if threshold < 3 or len(points) <= threshold:
+        return points
+
+    x = np.array([point[0].timestamp() for point in points])
+    y = np.array([float(point[1]) for point in points])
+
+    selected = [0]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        stop = int((bucket + 1) * bucket_size) + 1
+
+        # Average of the next bucket is the third corner of the triangle
+        next_start = stop
+        next_stop = min(int((bucket + 2) * bucket_size) + 1, len(points))
+        next_x = x[next_start:next_stop].mean()
+        next_y = y[next_start:next_stop].mean()
+
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous]) -
+            (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected.append(previous)
+
+    selected.append(len(points) - 1)
+    return [points[index] for index in selected]
+
+
+DOWNSAMPLERS = {
+    'lttb': lttb_downsample,
+    'bucket': bucket_downsample,
+}
@@ -0,0 +1,349 @@
+# events/judging.py
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .criteria import compiled_criteria
+from .models import CriterionScore, DepartmentScore, EventHeat, EventScore, HeatJudgeProgress, HeatParticipant
+from .progression import advance_round
+from .ranking import award_positions, rank_scores
+from .signals import announce_event_scores
+
+
+def heat_progress(heat, judge_count, roster_size):
+    """How many of the heat's judge x participant scores are in"""
+    submitted = HeatJudgeProgress.submitted(heat.id)
+    expected = judge_count * roster_size
+    return {
+        'scores_submitted': submitted,
+        'expected_total': expected,
+        'remaining_scores': expected - submitted
+    }
+
+
+def judge_progress(heat):
+    """Per-judge completion of a heat, from the progress counters alone"""
+    roster_size = HeatParticipant.objects.filter(heat=heat).count()
+    judges = heat.sub_event.faculty_judges.values('id', 'first_name', 'last_name') if heat.sub_event else []
+    scored = dict(HeatJudgeProgress.objects.filter(heat=heat).values_list('judge_id', 'scored_count'))
+
+    progress = [
+        {
+            'judge_id': judge['id'],
+            'judge_name': f"{judge['first_name']} {judge['last_name']}".strip(),
+            'scored': scored.get(judge['id'], 0),
+            'remaining': max(roster_size - scored.get(judge['id'], 0), 0),
+            'completed': roster_size > 0 and scored.get(judge['id'], 0) >= roster_size
+        }
+        for judge in judges
+    ]
+    return {
+        'heat_id': heat.id,
+        'status': heat.status,
+        'roster_size': roster_size,
+        'judges_completed': sum(judge['completed'] for judge in progress),
+        'judge_count': len(progress),
+        'scores_submitted': sum(scored.values()),
+        'expected_total': len(progress) * roster_size,
+        'judges': progress
+    }
+
+
+def validate_heat_scores(entries, criteria, roster, already_scored, allow_negative_marking):
+    """
+    Check a judge's whole payload in one pass and return (registration_id,
+    criteria_scores, total_score) per entry, totals weighted by the compiled
+    criteria. Every problem found is reported together in a ValidationError.
+    """
+    errors = {}
+    accepted = []
+    seen = set()
+
+    if not isinstance(entries, list) or not entries:
+        raise ValidationError({'error': 'scores must be a non-empty list'})
+
+    for index, entry in enumerate(entries):
+        registration_id = entry.get('registration_id') if isinstance(entry, dict) else None
+        criteria_scores = entry.get('criteria_scores') if isinstance(entry, dict) else None
+        if registration_id is None or not isinstance(criteria_scores, dict):
+            errors[index] = [f'Entry {index}: registration_id and criteria_scores are required']
+        elif registration_id not in roster:
+            errors[index] = [f'Registration ID {registration_id} is not in this heat']
+        elif registration_id in already_scored:
+            errors[index] = [f'You have already submitted scores for participant {registration_id}']
+        elif registration_id in seen:
+            errors[index] = [f'Participant {registration_id} appears more than once']
+        else:
+            seen.add(registration_id)
+            accepted.append((index, registration_id, criteria_scores))
+
+    # Every accepted entry is checked and totalled as one score matrix
+    totals, problems = criteria.score(
+        [criteria_scores for _, _, criteria_scores in accepted], allow_negative_marking
+    )
+    for row, messages in problems.items():
+        index, registration_id, _ = accepted[row]
+        errors[index] = [f'Participant {registration_id}: {message}' for message in messages]
+
+    if errors:
+        errors = [message for index in sorted(errors) for message in errors[index]]
+        raise ValidationError({'error': errors[0], 'errors': errors})
+    return [
+        (registration_id, criteria_scores, total)
+        for (_, registration_id, criteria_scores), total in zip(accepted, totals)
+    ]
+
+
+def submit_heat_scores(heat, judge, entries):
+    """
+    Validate and store one judge's scores for a cultural heat, then complete
+    the heat once every judge has scored every participant. The statement
+    count does not grow with the number of participants.
+    """
+    sub_event = heat.sub_event
+    criteria = compiled_criteria(sub_event.scoring_criteria)
+    roster = set(HeatParticipant.objects.filter(heat=heat).values_list('registration_id', flat=True))
+    judge_count = sub_event.faculty_judges.count()
+
+    with transaction.atomic():
+        # Judges of one heat take turns, so each sees the others' progress and
+        # exactly one of them completes the heat
+        EventHeat.objects.select_for_update().filter(pk=heat.pk).values_list('pk', flat=True).get()
+        already_scored = set(EventScore.objects.filter(
+            heat=heat,
+            judge=judge
+        ).values_list('event_registration_id', flat=True))
+
+        try:
+            validated = validate_heat_scores(
+                entries, criteria, roster, already_scored, sub_event.allow_negative_marking
+            )
+        except ValidationError as e:
+            e.detail.update(heat_progress(heat, judge_count, len(roster)))
+            e.detail['your_scored_participants'] = sorted(already_scored)
+            raise
+
+        # bulk_create skips EventScore.save, so fill in what it would have
+        created = EventScore.objects.bulk_create([
+            EventScore(
+                sub_event=sub_event,
+                event_registration_id=registration_id,
+                heat=heat,
+                round_number=heat.round_number,
+                criteria_scores=criteria_scores,
+                total_score=total_score,
+                judge=judge
+            )
+            for registration_id, criteria_scores, total_score in validated
+        ])
+        CriterionScore.sync(created)
+        announce_event_scores(created, sub_event.event_id)
+        HeatJudgeProgress.record(heat.id, judge.id, len(created))
+
+        progress = heat_progress(heat, judge_count, len(roster))
+        result = dict(progress, created=created, heat_completed=False, final_results=None)
+        if progress['scores_submitted'] >= progress['expected_total']:
+            result['final_results'] = complete_heat(heat)
+            result['heat_completed'] = result['final_results'] is not None
+            if result['heat_completed']:
+                result['round_progression'] = advance_round(sub_event, heat.round_number)
+        return result
+
+
+def complete_heat(heat):
+    """
+    Rank a fully scored heat on summed judge scores, award positions and
+    AURA points, and mark it completed. Returns the winner and runner-up, or
+    None when the heat has no scores.
+    """
+    sub_event = heat.sub_event
+    ranked = rank_scores(EventScore.objects.filter(heat=heat), score=Sum('total_score'))
+    if not ranked:
+        return None
+    awards = award_positions(ranked, sub_event)
+
+    # One update per (position, points) award rather than per participant
+    groups = {}
+    for registration_id, award in awards.items():
+        groups.setdefault(award, []).append(registration_id)
+    for (position, aura_points), registration_ids in groups.items():
+        EventScore.objects.filter(
+            heat=heat,
+            event_registration_id__in=registration_ids
+        ).update(position=position, aura_points=aura_points, version=F('version') + 1)
+        HeatParticipant.objects.filter(
+            heat=heat,
+            registration_id__in=registration_ids
+        ).update(position=position)
+    # update() skips the score signals, so log and announce the awarded rows here
+    announce_event_scores(
+        list(EventScore.objects.filter(heat=heat, event_registration_id__in=list(awards))),
+        sub_event.event_id
+    )
+
+    # A class group keeps its best placed entry across heats, so a weaker
+    # heat completed later never demotes it
+    DepartmentScore.recompute({(sub_event.id, registration_id) for registration_id in awards})
+
+    heat.status = 'COMPLETED'
+    heat.save(update_fields=['status', 'updated_at'])
+
+    winner = ranked[0]
+    runner_up = next((row for row in ranked if awards.get(row['registration_id'], (None,))[0] == 2), None)
+    return {
+        'winner': {
+            'registration_id': winner['registration_id'],
+            'total_score': winner['score'],
+            'aura_points': awards[winner['registration_id']][1]
+        },
+        'runner_up': {
+            'registration_id': runner_up['registration_id'],
+            'total_score': runner_up['score'],
+            'aura_points': awards[runner_up['registration_id']][1]
+        } if runner_up else None,
+        'joint_winners': [
+            row['registration_id'] for row in ranked if awards.get(row['registration_id'], (None,))[0] == 1
+        ]
+    }
+
+
+def finalize_sub_event(sub_event):
+    """
+    Place a sub-event's winners and runners-up on their average scores over
+    all rounds (ties share a place), record the placings and AURA points on
+    their EventScores and update their class groups' scores. Returns the
+    awards as {registration_id: (position, aura_points)}.
+    """
+    with transaction.atomic():
+        awards = award_positions(rank_scores(EventScore.objects.filter(sub_event=sub_event)), sub_event)
+
+        groups = {}
+        for registration_id, award in awards.items():
+            groups.setdefault(award, []).append(registration_id)
+        for (position, aura_points), registration_ids in groups.items():
+            EventScore.objects.filter(
+                sub_event=sub_event,
+                event_registration_id__in=registration_ids
+            ).update(position=position, aura_points=aura_points, version=F('version') + 1)
+        # update() skips the score signals, so log and announce the new positions here
+        announce_event_scores(
+            list(EventScore.objects.filter(sub_event=sub_event, event_registration_id__in=list(awards))),
+            sub_event.event_id
+        )
+
+        DepartmentScore.recompute({(sub_event.id, registration_id) for registration_id in awards})
+    return awards
+
+
+def _sports_aura_points(heat, sub_event, position):
+    aura_points = 0
+    if heat.stage == 'FINALS':
+        if position == 1:  # Winner
+            aura_points = sub_event.aura_points_winner
+        elif position == 2:  # Runner-up
+            aura_points = sub_event.aura_points_runner
+    # Add match points if applicable
+    if sub_event.match_points_enabled and position == 1 and heat.stage != 'FINALS':
+        aura_points += 20
+    return aura_points
+
+
+def record_heat_results(heat_results, judge):
+    """
+    Record finishing positions for one or more sports heats, given as
+    [{'heat': id, 'results': [{'registration_id', 'position'}, ...]}, ...],
+    and mark them completed. Heats, rosters and writes take one statement
+    each however many heats and results there are.
+    """
+    if not isinstance(heat_results, list) or not heat_results:
+        raise ValidationError({'error': 'heats must be a non-empty list'})
+
+    try:
+        heat_ids = [int(entry['heat']) for entry in heat_results]
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError({'error': 'Every entry needs a numeric heat id'})
+    if len(set(heat_ids)) != len(heat_ids):
+        raise ValidationError({'error': 'Each heat may appear only once'})
+    heats = EventHeat.objects.select_related('sub_event').in_bulk(heat_ids)
+    missing = next((heat_id for heat_id in heat_ids if heat_id not in heats), None)
+    if missing is not None:
+        raise EventHeat.DoesNotExist(f'Heat {missing} not found')
+    unassigned = next((heat_id for heat_id in heat_ids if heats[heat_id].sub_event is None), None)
+    if unassigned is not None:
+        raise ValidationError({'error': f'Heat {unassigned} does not belong to a sub-event'})
+
+    roster = {}
+    for participant in HeatParticipant.objects.filter(heat_id__in=heats):
+        roster.setdefault(participant.heat_id, {})[participant.registration_id] = participant
+
+    scores = []
+    participants = []
+    for heat_id, entry in zip(heat_ids, heat_results):
+        heat = heats[heat_id]
+        sub_event = heat.sub_event
+        heat_roster = roster.get(heat_id, {})
+        seen = set()
+        for result in entry.get('results') or []:
+            registration_id = result.get('registration_id')
+            if registration_id not in heat_roster:
+                raise ValidationError({
+                    'error': f'Registration ID {registration_id} not found in heat {heat_id}. '
+                    f'Valid registrations are: {list(heat_roster)}'
+                })
+            if registration_id in seen:
+                raise ValidationError({
+                    'error': f'Registration ID {registration_id} appears more than once in heat {heat_id}'
+                })
+            seen.add(registration_id)
+            position = result.get('position')
+
+            # Winners and runners-up carry their department's points.
+            # For sports events, total_score is based on position: 1st gets 9, 2nd gets 8
+            placed = position in [1, 2]
+            # bulk_create skips EventScore.save, so fill in what it would have
+            scores.append(EventScore(
+                sub_event=sub_event,
+                event_registration_id=registration_id,
+                heat=heat,
+                round_number=heat.round_number,
+                position=position,
+                score_type=('WINNER' if position == 1 else 'RUNNER_UP') if placed else None,
+                total_score=10 - position if placed else None,
+                aura_points=_sports_aura_points(heat, sub_event, position),
+                judge=judge
+            ))
+            participant = heat_roster[registration_id]
+            participant.position = position
+            participants.append(participant)
+
+    with transaction.atomic():
+        created = EventScore.objects.bulk_create(scores)
+        by_event = {}
+        for score in created:
+            by_event.setdefault(score.sub_event.event_id, []).append(score)
+        for event_id, event_scores in by_event.items():
+            announce_event_scores(event_scores, event_id)
+
+        # Department scores are recomputed once per class group after commit
+        for score in created:
+            DepartmentScore.mark_dirty(score.sub_event_id, score.event_registration_id)
+
+        HeatParticipant.objects.bulk_update(participants, ['position'])
+        EventHeat.objects.filter(id__in=heats).update(status='COMPLETED', updated_at=timezone.now())
+
+        # The last heats of a round move its qualifiers on
+        progression = {}
+        for heat in heats.values():
+            key = (heat.sub_event_id, heat.round_number)
+            if key not in progression:
+                progression[key] = advance_round(heat.sub_event, heat.round_number)
+
+    return [
+        {
+            'heat_id': heat_id,
+            'results_recorded': len(entry.get('results') or []),
+            'round_progression': progression[(heats[heat_id].sub_event_id, heats[heat_id].round_number)]
+        }
+        for heat_id, entry in zip(heat_ids, heat_results)
+    ]
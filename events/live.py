@@ -0,0 +1,307 @@
+# events/live.py
+import asyncio
+import bisect
+import json
+import time
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, close_old_connections
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .models import ScoreChange
+
+POLL_INTERVAL = 1  # Seconds between feed reads while anyone is listening
+HEARTBEAT_INTERVAL = 15  # Comment lines keep proxies from closing idle streams
+STREAM_LIFETIME = 300  # Clients reconnect (and resume) after this many seconds
+LONG_POLL_TIMEOUT = 25
+BATCH_SIZE = 100
+BUFFER_SIZE = 1000  # Recent changes kept in memory for listeners to catch up from
+GAP_GRACE = 5  # Seconds a missing id may still be committing before it is skipped
+RETRY_MS = 3000
+TICKET_MAX_AGE = 60
+TICKET_SALT = 'events.live.stream-ticket'
+
+
+def _authenticate(request):
+    """
+    Authenticate from the Authorization header or a ?ticket= from stream_ticket.
+    EventSource cannot send headers, but an access token in the URL would end
+    up in proxy and server access logs. A ticket only opens the live feed, and
+    only for TICKET_MAX_AGE seconds, so clients fetch a fresh one whenever
+    they (re)connect.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is not None:
+        try:
+            return authentication.get_user(authentication.get_validated_token(raw_token))
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            # AuthenticationFailed: the token's user was deleted or deactivated
+            return None
+
+    ticket = request.GET.get('ticket')
+    if not ticket:
+        return None
+    try:
+        user_id = signing.loads(ticket, salt=TICKET_SALT, max_age=TICKET_MAX_AGE)['user']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+    return get_user_model().objects.filter(pk=user_id, is_active=True).first()
+
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _changes_after(last_id, event_id=None, upto=None):
+    changes = ScoreChange.objects.filter(id__gt=last_id)
+    if event_id:
+        changes = changes.filter(event_id=event_id)
+    if upto is not None:
+        changes = changes.filter(id__lte=upto)
+    return [change.as_message() for change in changes[:BATCH_SIZE]]
+
+
+def _read_new(cursor):
+    try:
+        return _changes_after(cursor)
+    except DatabaseError:
+        # A long-lived reader outlives its connection; the next poll reconnects
+        close_old_connections()
+        return []
+
+
+def _latest_id():
+    return ScoreChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+class ScoreFeed:
+    """
+    The one reader of ScoreChange in a process. While anyone is listening, a
+    single task reads new rows every POLL_INTERVAL and wakes every waiting
+    stream and long poll, which serve themselves from the changes kept in
+    memory. The database sees one query a second however many scoreboards
+    are open; only listeners further behind than the buffer read it directly.
+
+    Ids are taken when a row is inserted but become visible when it commits,
+    so a lower id can show up after a higher one. The feed publishes only the
+    unbroken run of ids after its cursor, and gives up on a missing id once it
+    has stayed missing for GAP_GRACE seconds (an insert that rolled back).
+    """
+
+    def __init__(self):
+        self.cursor = None  # Highest id published
+        self.floor = None  # Every change after this id, up to the cursor, is in recent
+        self.recent = []
+        self.ids = []
+        self.changed = asyncio.Condition()
+        self.listeners = 0
+        self.task = None
+        self.gap_since = None
+
+    async def position(self):
+        """Where a new listener starts: the latest change on record"""
+        await self._wake()
+        return self.cursor
+
+    async def changes_after(self, last_id, event_id=None, timeout=0):
+        """
+        Changes after ``last_id`` (only ``event_id``'s if given), at most
+        BATCH_SIZE, waiting up to ``timeout`` seconds for some to arrive.
+        Returns (changes, id to resume after).
+        """
+        deadline = time.monotonic() + timeout
+        self.listeners += 1
+        try:
+            while True:
+                await self._wake()
+                seen = self.cursor
+                if last_id < self.floor:
+                    changes = await sync_to_async(_changes_after)(last_id, event_id, seen)
+                    resume = changes[-1]['id'] if len(changes) == BATCH_SIZE else seen
+                else:
+                    changes, resume = self._buffered(last_id, event_id)
+                if changes:
+                    return changes, resume
+                last_id = max(last_id, resume)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return [], last_id
+                async with self.changed:
+                    if self.cursor == seen:
+                        try:
+                            await asyncio.wait_for(self.changed.wait(), remaining)
+                        except asyncio.TimeoutError:
+                            return [], last_id
+        finally:
+            self.listeners -= 1
+
+    def _buffered(self, last_id, event_id):
+        changes = []
+        for change in self.recent[bisect.bisect_right(self.ids, last_id):]:
+            if not event_id or change['event_id'] == event_id:
+                changes.append(change)
+                if len(changes) == BATCH_SIZE:
+                    return changes, change['id']
+        return changes, self.cursor
+
+    async def _wake(self):
+        """Start polling if idle, from the latest change on record"""
+        if self.task is not None:
+            return
+        latest = await sync_to_async(_latest_id)()
+        if self.task is not None:
+            return  # Another listener started it meanwhile
+        if self.cursor is None or latest > self.cursor:
+            # Listeners resuming from before this read catch up from the database
+            self.cursor = self.floor = latest
+            self.recent, self.ids = [], []
+        self.task = asyncio.create_task(self._poll())
+
+    async def _poll(self):
+        try:
+            while self.listeners:
+                rows = await sync_to_async(_read_new)(self.cursor)
+                ready = self._ready(rows)
+                if ready:
+                    self._publish(ready)
+                    async with self.changed:
+                        self.changed.notify_all()
+                    if len(ready) == BATCH_SIZE:
+                        continue  # Still catching up, read the next batch straight away
+                await asyncio.sleep(POLL_INTERVAL)
+        finally:
+            self.task = None
+
+    def _ready(self, rows):
+        """The rows safe to publish: consecutive ids after the cursor, skipping only gaps older than GAP_GRACE"""
+        ready = []
+        expected = self.cursor + 1
+        for row in rows:
+            if row['id'] != expected:
+                now = time.monotonic()
+                if self.gap_since is None:
+                    self.gap_since = now
+                if now - self.gap_since < GAP_GRACE:
+                    break
+            self.gap_since = None
+            ready.append(row)
+            expected = row['id'] + 1
+        return ready
+
+    def _publish(self, changes):
+        self.cursor = changes[-1]['id']
+        self.recent.extend(changes)
+        self.ids.extend(change['id'] for change in changes)
+        overflow = len(self.recent) - BUFFER_SIZE
+        if overflow > 0:
+            self.floor = self.ids[overflow - 1]
+            del self.recent[:overflow]
+            del self.ids[:overflow]
+
+
+# One feed per event loop (a process normally runs one)
+_feeds = weakref.WeakKeyDictionary()
+
+
+def get_feed():
+    loop = asyncio.get_running_loop()
+    feed = _feeds.get(loop)
+    if feed is None:
+        feed = _feeds[loop] = ScoreFeed()
+    return feed
+
+
+def _format_event(change):
+    data = json.dumps(change, cls=DjangoJSONEncoder)
+    return f"id: {change['id']}\nevent: score\ndata: {data}\n\n"
+
+
+async def _event_stream(feed, last_id, event_id):
+    yield f"retry: {RETRY_MS}\n\n"
+    closes_at = time.monotonic() + STREAM_LIFETIME
+
+    while time.monotonic() < closes_at:
+        timeout = min(HEARTBEAT_INTERVAL, closes_at - time.monotonic())
+        changes, last_id = await feed.changes_after(last_id, event_id, timeout)
+        for change in changes:
+            yield _format_event(change)
+        if not changes:
+            yield ": keep-alive\n\n"
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def stream_ticket(request):
+    """A short-lived ticket for opening the live stream, which cannot send an Authorization header"""
+    return Response({
+        'ticket': signing.dumps({'user': request.user.pk}, salt=TICKET_SALT),
+        'expires_in': TICKET_MAX_AGE
+    })
+
+
+@require_GET
+async def score_stream(request):
+    """Server-Sent Events stream of score changes, resumable with Last-Event-ID"""
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided'}, status=401)
+
+    feed = get_feed()
+    event_id = _parse_id(request.GET.get('event'))
+    last_id = _parse_id(
+        request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    )
+    if last_id is None:
+        # Fresh connections only receive changes from now on
+        last_id = await feed.position()
+
+    response = StreamingHttpResponse(
+        _event_stream(feed, last_id, event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+async def score_long_poll(request):
+    """Long-poll fallback for clients that cannot use the event stream"""
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided'}, status=401)
+
+    feed = get_feed()
+    event_id = _parse_id(request.GET.get('event'))
+    since = _parse_id(request.GET.get('since'))
+    if since is None:
+        # First call hands back the cursor to poll from
+        return JsonResponse({'changes': [], 'last_event_id': await feed.position()})
+
+    timeout = min(_parse_id(request.GET.get('timeout')) or LONG_POLL_TIMEOUT, LONG_POLL_TIMEOUT)
+    changes, last_id = await feed.changes_after(since, event_id, timeout)
+
+    return JsonResponse(
+        {
+            'changes': changes,
+            'last_event_id': last_id
+        },
+        encoder=DjangoJSONEncoder
+    )
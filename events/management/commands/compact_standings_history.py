@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from events.models import StandingsSnapshot
+from datetime import timedelta
+
+class Command(BaseCommand):
+    help = 'Merge old standings history into coarser time buckets to keep the table small'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-hours',
+            type=int,
+            default=24,
+            help='Only compact changes recorded more than this many hours ago'
+        )
+        parser.add_argument(
+            '--bucket-minutes',
+            type=int,
+            default=15,
+            help='Width of the buckets old changes are merged into'
+        )
+
+    def handle(self, *args, **options):
+        if options['bucket_minutes'] <= 0:
+            self.stderr.write(self.style.ERROR('--bucket-minutes must be positive'))
+            return
+
+        before = timezone.now() - timedelta(hours=options['older_than_hours'])
+        removed = StandingsSnapshot.compact(before, timedelta(minutes=options['bucket_minutes']))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Compacted standings history before {before:%Y-%m-%d %H:%M}, removed {removed} rows'
+        ))
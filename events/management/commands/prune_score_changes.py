@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from events.models import ScoreChange
+from datetime import timedelta
+
+class Command(BaseCommand):
+    help = 'Delete old entries of the live score change feed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-hours',
+            type=int,
+            default=24,
+            help='Only delete changes recorded more than this many hours ago'
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(hours=options['older_than_hours'])
+        removed = ScoreChange.prune(before)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned live score changes before {before:%Y-%m-%d %H:%M}, removed {removed} rows'
+        ))
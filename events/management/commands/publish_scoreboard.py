@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from events.models import Event, ScoreGeneration
+from events.snapshots import publish
+
+class Command(BaseCommand):
+    help = 'Publish the static scoreboard JSON snapshots for public displays'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event',
+            type=int,
+            nargs='*',
+            help='Event ids to publish (default: every active event)'
+        )
+        parser.add_argument(
+            '--watch',
+            type=float,
+            metavar='SECONDS',
+            help='Keep running and republish events whose scores changed, checking every SECONDS'
+        )
+
+    def handle(self, *args, **options):
+        event_ids = options['event'] or list(
+            Event.objects.filter(is_active=True).values_list('id', flat=True)
+        )
+
+        if options['watch']:
+            self.watch(event_ids if options['event'] else None, options['watch'])
+            return
+
+        for event_id in event_ids:
+            manifest = publish(event_id)
+            self.stdout.write(f"Event {event_id}: version {manifest['version']}, "
+                              f"{len(manifest['sub_events'])} sub-events")
+
+        manifest = publish()
+        self.stdout.write(self.style.SUCCESS(f"Published overall standings, version {manifest['version']}"))
+
+    def watch(self, event_ids, interval):
+        """
+        Republish off the request path: every score change bumps its event's
+        ScoreGeneration, so each pass publishes only the events whose
+        generation moved, however many scores changed in between.
+        """
+        published = {}
+        while True:
+            generations = ScoreGeneration.objects.filter(event__is_active=True)
+            if event_ids is not None:
+                generations = generations.filter(event_id__in=event_ids)
+            changed = {
+                event_id: generation
+                for event_id, generation in generations.values_list('event_id', 'generation')
+                if published.get(event_id) != generation
+            }
+
+            for event_id in changed:
+                manifest = publish(event_id)
+                self.stdout.write(f"Event {event_id}: version {manifest['version']}")
+            if changed:
+                publish()
+                published.update(changed)
+
+            time.sleep(interval)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from events.models import DepartmentTotal
+
+class Command(BaseCommand):
+    help = 'Recompute class-group standings from DepartmentScore and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drift, do not rewrite the standings table'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        drift = DepartmentTotal.rebuild(commit=not dry_run)
+
+        for row in drift:
+            expected_score, expected_aura, expected_count = row['expected']
+            stored_score, stored_aura, stored_count = row['stored']
+            self.stdout.write(self.style.WARNING(
+                f"Event {row['event_id']} {row['year']} {row['department']} {row['division']}: "
+                f"score {stored_score} -> {expected_score}, "
+                f"aura points {stored_aura} -> {expected_aura}, "
+                f"entries {stored_count} -> {expected_count}"
+            ))
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Standings are in sync with department scores'))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} class groups have drifted (dry run, nothing changed)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt standings, corrected {len(drift)} class groups'))
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from events.score_log import replay
+
+class Command(BaseCommand):
+    help = 'Rebuild department scores and standings by replaying the score log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--until',
+            help='Replay changes logged up to this ISO timestamp (default: now)'
+        )
+        parser.add_argument(
+            '--event',
+            type=int,
+            help='Only replay this event'
+        )
+        parser.add_argument(
+            '--derive',
+            action='store_true',
+            help='Re-derive department scores from logged event scores with the current rules'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would change'
+        )
+
+    def handle(self, *args, **options):
+        until = None
+        if options['until']:
+            until = parse_datetime(options['until'])
+            if until is None:
+                raise CommandError(f"Invalid --until timestamp: {options['until']}")
+            if timezone.is_naive(until):
+                until = timezone.make_aware(until)
+
+        result = replay(
+            until=until,
+            event_id=options['event'],
+            derive=options['derive'],
+            commit=not options['dry_run']
+        )
+
+        summary = (f"{result['created']} department scores created, {result['updated']} updated, "
+                   f"{result['deleted']} deleted")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{summary} (dry run, nothing changed)'))
+            return
+
+        for row in result['drift']:
+            stored_score, stored_aura, _ = row['stored']
+            expected_score, expected_aura, _ = row['expected']
+            self.stdout.write(
+                f"Event {row['event_id']} {row['year']} {row['department']} {row['division']}: "
+                f"score {stored_score} -> {expected_score}, aura points {stored_aura} -> {expected_aura}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary}; {len(result['drift'])} standings groups changed"
+        ))
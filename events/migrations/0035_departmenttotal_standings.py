@@ -0,0 +1,66 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:01
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_standings(apps, schema_editor):
+    DepartmentScore = apps.get_model('events', 'DepartmentScore')
+    DepartmentTotal = apps.get_model('events', 'DepartmentTotal')
+
+    DepartmentTotal.objects.all().delete()
+    totals = DepartmentScore.objects.values(
+        'sub_event__event_id', 'department', 'year', 'division'
+    ).annotate(
+        total_score=Sum('total_score'),
+        total_aura_points=Sum('aura_points'),
+        score_count=Count('id')
+    )
+    DepartmentTotal.objects.bulk_create([
+        DepartmentTotal(
+            event_id=row['sub_event__event_id'],
+            department=row['department'],
+            year=row['year'],
+            division=row['division'],
+            total_score=row['total_score'] or Decimal('0.00'),
+            total_aura_points=row['total_aura_points'] or 0,
+            score_count=row['score_count']
+        )
+        for row in totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0034_alter_eventheat_unique_together_eventheat_heat_name'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='departmenttotal',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='departmenttotal',
+            name='event',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='department_totals', to='events.event'),
+        ),
+        migrations.AddField(
+            model_name='departmenttotal',
+            name='score_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='departmenttotal',
+            name='total_score',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AlterUniqueTogether(
+            name='departmenttotal',
+            unique_together={('event', 'department', 'year', 'division')},
+        ),
+        migrations.RunPython(backfill_standings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0035_departmenttotal_standings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('DEPARTMENT_SCORE', 'Department Score'), ('EVENT_SCORE', 'Event Score')], max_length=20)),
+                ('action', models.CharField(choices=[('SAVED', 'Saved'), ('DELETED', 'Deleted')], max_length=10)),
+                ('object_id', models.IntegerField()),
+                ('event_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('sub_event_id', models.IntegerField(blank=True, null=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0036_scorechange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreGeneration',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score_generation', serialize=False, to='events.event')),
+                ('generation', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_history(apps, schema_editor):
+    DepartmentScore = apps.get_model('events', 'DepartmentScore')
+    StandingsSnapshot = apps.get_model('events', 'StandingsSnapshot')
+
+    # Best available history: each existing score as of its last update
+    StandingsSnapshot.objects.bulk_create([
+        StandingsSnapshot(
+            event_id=score['sub_event__event_id'],
+            department=score['department'],
+            year=score['year'],
+            division=score['division'],
+            score_delta=score['total_score'],
+            aura_points_delta=score['aura_points'],
+            recorded_at=score['updated_at']
+        )
+        for score in DepartmentScore.objects.values(
+            'sub_event__event_id', 'department', 'year', 'division',
+            'total_score', 'aura_points', 'updated_at'
+        ).order_by('updated_at', 'id')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0037_scoregeneration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(max_length=50)),
+                ('year', models.CharField(blank=True, max_length=10, null=True)),
+                ('division', models.CharField(blank=True, max_length=10, null=True)),
+                ('score_delta', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('aura_points_delta', models.IntegerField(default=0)),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='standings_history', to='events.event')),
+            ],
+            options={
+                'ordering': ['recorded_at', 'id'],
+                'indexes': [models.Index(fields=['department', 'recorded_at'], name='events_stan_departm_e95f4b_idx'), models.Index(fields=['event', 'recorded_at'], name='events_stan_event_i_2e1f65_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:31
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import F
+
+
+def merge_duplicate_scores(apps, schema_editor):
+    DepartmentScore = apps.get_model('events', 'DepartmentScore')
+    DepartmentTotal = apps.get_model('events', 'DepartmentTotal')
+
+    groups = {}
+    for score in DepartmentScore.objects.select_related('sub_event').order_by('id'):
+        year, division = (None, None) if score.department == 'CIVIL' else (score.year, score.division)
+        groups.setdefault((score.sub_event_id, score.department, year or '', division or ''), []).append(score)
+
+    for scores in groups.values():
+        if len(scores) < 2:
+            continue
+        # Duplicates were each added to the standings, so summing them into the
+        # oldest row keeps the totals; only the entry count drops
+        kept, duplicates = scores[0], scores[1:]
+        kept.total_score = sum(score.total_score for score in scores)
+        kept.aura_points = sum(score.aura_points for score in scores)
+        if kept.department == 'CIVIL':
+            kept.year = None
+            kept.division = None
+        kept.save(update_fields=['total_score', 'aura_points', 'year', 'division'])
+        for score in duplicates:
+            DepartmentTotal.objects.filter(
+                event_id=score.sub_event.event_id,
+                department=score.department,
+                year=None if score.department == 'CIVIL' else score.year,
+                division=None if score.department == 'CIVIL' else score.division
+            ).update(score_count=F('score_count') - 1)
+        DepartmentScore.objects.filter(id__in=[score.id for score in duplicates]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0038_standingssnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_scores, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='departmentscore',
+            constraint=models.UniqueConstraint(models.F('sub_event'), models.F('department'), django.db.models.functions.comparison.Coalesce('year', models.Value('')), django.db.models.functions.comparison.Coalesce('division', models.Value('')), name='unique_department_score_per_class_group'),
+        ),
+    ]
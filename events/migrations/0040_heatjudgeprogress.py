@@ -0,0 +1,48 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_progress(apps, schema_editor):
+    """Count each judge's distinct scored participants per heat"""
+    EventScore = apps.get_model('events', 'EventScore')
+    HeatJudgeProgress = apps.get_model('events', 'HeatJudgeProgress')
+
+    counts = EventScore.objects.filter(
+        heat__isnull=False, judge__isnull=False
+    ).order_by().values('heat', 'judge').annotate(
+        scored=Count('event_registration', distinct=True)
+    )
+    HeatJudgeProgress.objects.bulk_create([
+        HeatJudgeProgress(heat_id=row['heat'], judge_id=row['judge'], scored_count=row['scored'])
+        for row in counts
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0039_departmentscore_unique_class_group'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeatJudgeProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scored_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('heat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='judge_progress', to='events.eventheat')),
+                ('judge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='heat_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='heatjudgeprogress',
+            constraint=models.UniqueConstraint(fields=('heat', 'judge'), name='unique_heat_judge_progress'),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
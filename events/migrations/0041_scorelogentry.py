@@ -0,0 +1,63 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:44
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def log_baseline(apps, schema_editor):
+    """Open the log with every existing score, so replays start from today's tables"""
+    EventScore = apps.get_model('events', 'EventScore')
+    DepartmentScore = apps.get_model('events', 'DepartmentScore')
+    ScoreLogEntry = apps.get_model('events', 'ScoreLogEntry')
+    EVENT_SCORE, DEPARTMENT_SCORE, SAVED = 1, 2, 1
+
+    event_scores = EventScore.objects.order_by('id').values(
+        'sub_event_id', 'heat_id', 'score_type', 'position', 'total_score', 'aura_points',
+        object_id=F('id'), event_id=F('sub_event__event_id'), registration_id=F('event_registration_id')
+    )
+    department_scores = DepartmentScore.objects.order_by('id').values(
+        'sub_event_id', 'department', 'year', 'division', 'total_score', 'aura_points',
+        object_id=F('id'), event_id=F('sub_event__event_id')
+    )
+    entries = [
+        ScoreLogEntry(kind=EVENT_SCORE, operation=SAVED, **row) for row in event_scores.iterator()
+    ] + [
+        ScoreLogEntry(kind=DEPARTMENT_SCORE, operation=SAVED, **row) for row in department_scores.iterator()
+    ]
+    ScoreLogEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0040_heatjudgeprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Event Score'), (2, 'Department Score')])),
+                ('operation', models.PositiveSmallIntegerField(choices=[(1, 'Saved'), (2, 'Deleted')])),
+                ('object_id', models.IntegerField()),
+                ('event_id', models.IntegerField(blank=True, null=True)),
+                ('sub_event_id', models.IntegerField()),
+                ('registration_id', models.IntegerField(blank=True, null=True)),
+                ('heat_id', models.IntegerField(blank=True, null=True)),
+                ('score_type', models.CharField(blank=True, max_length=20, null=True)),
+                ('position', models.IntegerField(blank=True, null=True)),
+                ('department', models.CharField(blank=True, max_length=50, null=True)),
+                ('year', models.CharField(blank=True, max_length=10, null=True)),
+                ('division', models.CharField(blank=True, max_length=10, null=True)),
+                ('total_score', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('aura_points', models.IntegerField(blank=True, null=True)),
+                ('recorded_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(log_baseline, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:47
+
+from decimal import Decimal, InvalidOperation
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_criterion_scores(apps, schema_editor):
+    """Split every existing score's criteria_scores JSON into rows"""
+    EventScore = apps.get_model('events', 'EventScore')
+    CriterionScore = apps.get_model('events', 'CriterionScore')
+
+    rows = []
+    scores = EventScore.objects.exclude(criteria_scores=None).values_list('id', 'sub_event_id', 'criteria_scores')
+    for score_id, sub_event_id, criteria_scores in scores.iterator():
+        if not isinstance(criteria_scores, dict):
+            continue
+        for criterion, value in criteria_scores.items():
+            if isinstance(value, bool) or len(criterion) > 100:
+                continue
+            try:
+                value = Decimal(str(value)).quantize(Decimal('0.01'))
+            except (InvalidOperation, ValueError):
+                continue
+            if value.is_finite() and abs(value) < 10 ** 6:
+                rows.append(CriterionScore(score_id=score_id, sub_event_id=sub_event_id, criterion=criterion, value=value))
+    CriterionScore.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0041_scorelogentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CriterionScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('criterion', models.CharField(max_length=100)),
+                ('value', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('score', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='criterion_scores', to='events.eventscore')),
+                ('sub_event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='criterion_scores', to='events.subevent')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sub_event', 'criterion'], name='events_crit_sub_eve_1da494_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='criterionscore',
+            constraint=models.UniqueConstraint(fields=('score', 'criterion'), name='unique_criterion_per_score'),
+        ),
+        migrations.RunPython(backfill_criterion_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0042_criterionscore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventscore',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.0.1 on 2026-10-17 23:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0043_eventscore_version'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='eventdraw',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='eventdraw',
+            name='bracket',
+            field=models.CharField(choices=[('KNOCKOUT', 'Knockout'), ('WINNERS', 'Winners Bracket'), ('LOSERS', 'Losers Bracket'), ('GRAND_FINAL', 'Grand Final'), ('ROUND_ROBIN', 'Round Robin')], default='KNOCKOUT', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='eventdraw',
+            name='loser_next_match',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='loser_feeds', to='events.eventdraw'),
+        ),
+        migrations.AddField(
+            model_name='eventdraw',
+            name='loser_next_slot',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='eventdraw',
+            name='match_number',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='eventdraw',
+            name='next_match',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='winner_feeds', to='events.eventdraw'),
+        ),
+        migrations.AddField(
+            model_name='eventdraw',
+            name='next_slot',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='eventdraw',
+            name='round_number',
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name='eventdraw',
+            name='schedule',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='eventdraw',
+            name='team1',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='team1_draws', to='events.eventregistration'),
+        ),
+        migrations.AlterField(
+            model_name='eventdraw',
+            name='team2',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='team2_draws', to='events.eventregistration'),
+        ),
+        migrations.AlterField(
+            model_name='eventdraw',
+            name='venue',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AlterUniqueTogether(
+            name='eventdraw',
+            unique_together={('sub_event', 'bracket', 'round_number', 'match_number')},
+        ),
+    ]
@@ -13,10 +13,40 @@ from django.utils.html import format_html
 from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
-from django.db.models import Avg
+from django.db.models import Count, F, Max, Q, Value
+from django.db.models.functions import Coalesce
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save
+from decimal import Decimal
+import threading
 
 User = get_user_model()
 
+_pending_on_commit = threading.local()
+
+
+def _on_commit_once(name, items, flush, robust=False):
+    """
+    Queue ``items`` in this thread's pending set ``name`` and hand the whole
+    set to ``flush`` once the surrounding transaction commits. Each call
+    registers its own callback, so items queued in a savepoint that was
+    rolled back are still flushed with the outer commit; the first callback
+    takes the set and the rest find it empty. Leftovers of a rolled back
+    transaction go out with the next commit, which is harmless for
+    idempotent flushes.
+    """
+    pending = _pending_on_commit.__dict__.setdefault(name, set())
+    pending.update(items)
+
+    def run():
+        if not pending:
+            return
+        batch = set(pending)
+        pending.clear()
+        flush(batch)
+
+    transaction.on_commit(run, robust=robust)
+
 class Organization(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField()
@@ -302,29 +332,9 @@ class SubEvent(models.Model):
     
     def _finalize_results(self):
         """Finalize results and calculate AURA points"""
-        scores = EventScore.objects.filter(sub_event=self)
-        
-        # Calculate average scores per registration
-        avg_scores = scores.values(
-            'event_registration'
-        ).annotate(
-            avg_score=Avg('total_score')
-        ).order_by('-avg_score')
+        from .judging import finalize_sub_event
         
-        # Assign positions and AURA points
-        for idx, score in enumerate(avg_scores, 1):
-            registration = EventRegistration.objects.get(
-                id=score['event_registration']
-            )
-            
-            if idx == 1:  # Winner
-                aura_points = self.aura_points_winner
-            elif idx == 2:  # Runner-up
-                aura_points = self.aura_points_runner
-            else:
-                continue
-            
-            DepartmentScore.record_score(registration, self, aura_points)
+        finalize_sub_event(self)
 
 class SubEventImage(models.Model):
     sub_event = models.ForeignKey(
@@ -493,17 +503,30 @@ class SubmissionFile(models.Model):
         return f"Submission for {self.registration}"
 
 class EventDraw(models.Model):
+    BRACKETS = (
+        ('KNOCKOUT', 'Knockout'),
+        ('WINNERS', 'Winners Bracket'),
+        ('LOSERS', 'Losers Bracket'),
+        ('GRAND_FINAL', 'Grand Final'),
+        ('ROUND_ROBIN', 'Round Robin')
+    )
+    
     sub_event = models.ForeignKey(SubEvent, on_delete=models.CASCADE)
     stage = models.CharField(max_length=20, choices=SubEvent.EVENT_STAGES)
+    # Later bracket matches wait for the matches feeding them to fill these
     team1 = models.ForeignKey(
         EventRegistration,
         on_delete=models.CASCADE,
-        related_name='team1_draws'
+        related_name='team1_draws',
+        null=True,
+        blank=True
     )
     team2 = models.ForeignKey(
         EventRegistration,
         on_delete=models.CASCADE,
-        related_name='team2_draws'
+        related_name='team2_draws',
+        null=True,
+        blank=True
     )
     winner = models.ForeignKey(
         EventRegistration,
@@ -512,11 +535,33 @@ class EventDraw(models.Model):
         null=True,
         blank=True
     )
-    schedule = models.DateTimeField()
-    venue = models.CharField(max_length=200)
+    schedule = models.DateTimeField(null=True, blank=True)
+    venue = models.CharField(max_length=200, blank=True, default='')
+    
+    # Position in the bracket, and the slot (1 or 2) the winner and, in
+    # double elimination, the loser play next
+    bracket = models.CharField(max_length=20, choices=BRACKETS, default='KNOCKOUT')
+    round_number = models.IntegerField(default=1)
+    match_number = models.IntegerField(null=True, blank=True)
+    next_match = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        related_name='winner_feeds',
+        null=True,
+        blank=True
+    )
+    next_slot = models.PositiveSmallIntegerField(null=True, blank=True)
+    loser_next_match = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        related_name='loser_feeds',
+        null=True,
+        blank=True
+    )
+    loser_next_slot = models.PositiveSmallIntegerField(null=True, blank=True)
     
     class Meta:
-        unique_together = ['sub_event', 'stage', 'team1', 'team2']
+        unique_together = ['sub_event', 'bracket', 'round_number', 'match_number']
 
     def __str__(self):
         return f"{self.sub_event.name} - {self.stage} - {self.team1} vs {self.team2}"
@@ -569,6 +614,55 @@ class HeatParticipant(models.Model):
     def __str__(self):
         return f"{self.registration.get_participant_display()} - Heat {self.heat.heat_number}"
 
+class HeatJudgeProgress(models.Model):
+    """
+    How many of a heat's participants each judge has scored. Kept in step by
+    the scoring transaction, so completion checks and progress dashboards
+    read a handful of rows instead of scanning EventScore.
+    """
+    heat = models.ForeignKey(EventHeat, on_delete=models.CASCADE, related_name='judge_progress')
+    judge = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='heat_progress')
+    scored_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['heat', 'judge'], name='unique_heat_judge_progress')
+        ]
+    
+    def __str__(self):
+        return f"Heat {self.heat_id} judge {self.judge_id}: {self.scored_count}"
+    
+    @classmethod
+    def record(cls, heat_id, judge_id, count):
+        """Count participants a judge has just scored; call inside the scoring transaction"""
+        increment = {'scored_count': F('scored_count') + count, 'updated_at': timezone.now()}
+        if cls.objects.filter(heat_id=heat_id, judge_id=judge_id).update(**increment):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(heat_id=heat_id, judge_id=judge_id, scored_count=count)
+        except IntegrityError:
+            cls.objects.filter(heat_id=heat_id, judge_id=judge_id).update(**increment)
+    
+    @classmethod
+    def submitted(cls, heat_id):
+        """Distinct (judge, participant) scores submitted for a heat"""
+        return cls.objects.filter(heat_id=heat_id).aggregate(
+            total=Coalesce(Sum('scored_count'), 0)
+        )['total']
+    
+    @classmethod
+    def refresh(cls, heat_id, judge_id):
+        """Recount a judge's progress from EventScore, e.g. after scores are deleted"""
+        # Only existing rows are touched, so cascading heat deletes cannot recreate one
+        scored = EventScore.objects.filter(
+            heat_id=heat_id, judge_id=judge_id
+        ).values('event_registration').distinct().count()
+        cls.objects.filter(heat_id=heat_id, judge_id=judge_id).update(
+            scored_count=scored, updated_at=timezone.now()
+        )
+
 class EventScore(models.Model):
     SCORE_TYPES = (
         ('WINNER', 'Winner'),
@@ -607,18 +701,8 @@ class EventScore(models.Model):
     round_number = models.IntegerField(null=True, blank=True)
     position = models.IntegerField(null=True)
     qualified_for_next = models.BooleanField(default=False)
-    
-    def save(self, *args, **kwargs):
-        # Calculate final score considering negative marking
-        if self.criteria_scores:
-            self.total_score = sum(self.criteria_scores.values()) - self.negative_marks
-        
-        # Auto-calculate AURA points based on event type and position
-        if self.score_type and not self.is_bye:
-            self._calculate_aura_points()
-            
-        super().save(*args, **kwargs)
-        self._update_department_score()
+    # Moves on with every write; edits name the version they read (If-Match)
+    version = models.PositiveIntegerField(default=1)
     
     def _calculate_aura_points(self):
         # """Calculate AURA points based on event type and position"""
@@ -649,38 +733,55 @@ class EventScore(models.Model):
         participant = self.event_registration.get_participant_display()
         return f"{participant} - {self.sub_event.name} - {self.stage}"
 
+    # What a class group's DepartmentScore is derived from
+    PLACING_FIELDS = {'score_type', 'position', 'total_score', 'aura_points'}
+
+    @property
+    def is_placed(self):
+        """A winner or runner-up placing, recorded (sports) or awarded (heats, finalization)"""
+        return self.score_type in ['WINNER', 'RUNNER_UP'] or self.position in (1, 2)
+
     def save(self, *args, **kwargs):
         if self.heat and not self.round_number:
             self.round_number = self.heat.round_number
+        bump = not self._state.adding
+        if bump:
+            # Plain saves don't check the version, but still make older If-Match tokens stale
+            self.version = F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
         super().save(*args, **kwargs)
+        if bump:
+            self.refresh_from_db(fields=['version'])
         
-        # Update department scores if this is a winning score
-        if self.score_type in ['WINNER', 'RUNNER_UP']:
-            self._update_department_score()
-    
-    def _update_department_score(self):
-        registration = self.event_registration
-        
-        # Get total_score from EventScore
-        total_score = self.total_score if self.total_score else 0
-        
-        dept_score, created = DepartmentScore.objects.get_or_create(
-            department=registration.department,
-            year=registration.year,
-            division=registration.division,
-            sub_event=self.sub_event,
-            defaults={
-                'total_score': total_score,  # Set the total_score
-                'aura_points': self.aura_points,
-                'updated_at': timezone.now()
-            }
+        # Update department scores if this is (or may have stopped being) a placed score
+        update_fields = kwargs.get('update_fields')
+        if self.is_placed or (bump and (update_fields is None or self.PLACING_FIELDS & set(update_fields))):
+            DepartmentScore.mark_dirty(self.sub_event_id, self.event_registration_id)
+
+    def update_if_version(self, version, **fields):
+        """
+        Write fields with a single UPDATE ... WHERE version = %s. Returns False,
+        leaving the row alone, when someone else has written it since
+        ``version`` was read.
+        """
+        updated = EventScore.objects.filter(pk=self.pk, version=version).update(
+            version=F('version') + 1, **fields
         )
-        
-        if not created:
-            # Update existing score
-            dept_score.total_score = total_score
-            dept_score.aura_points = self.aura_points
-            dept_score.save()
+        if not updated:
+            return False
+
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.version = version + 1
+        # update() skips post_save, so the score log, criterion rows and ETags follow here
+        post_save.send(
+            sender=EventScore, instance=self, created=False,
+            update_fields=frozenset(fields) | {'version'}, raw=False, using=self._state.db
+        )
+        if self.is_placed or self.PLACING_FIELDS & set(fields):
+            DepartmentScore.mark_dirty(self.sub_event_id, self.event_registration_id)
+        return True
 
     def add_match_points(self):
         """Add 20 points for winning matches in group sports events"""
@@ -692,6 +793,55 @@ class EventScore(models.Model):
             self.match_points = 20
             self.save()
 
+class CriterionScore(models.Model):
+    """
+    One row per criterion of an EventScore's criteria_scores, so per-criterion
+    breakdowns can be aggregated in SQL. Rebuilt from the JSON by sync().
+    """
+    score = models.ForeignKey(EventScore, on_delete=models.CASCADE, related_name='criterion_scores')
+    sub_event = models.ForeignKey(SubEvent, on_delete=models.CASCADE, related_name='criterion_scores')
+    criterion = models.CharField(max_length=100)
+    value = models.DecimalField(max_digits=8, decimal_places=2)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['score', 'criterion'], name='unique_criterion_per_score')
+        ]
+        indexes = [
+            models.Index(fields=['sub_event', 'criterion']),
+        ]
+    
+    def __str__(self):
+        return f"{self.criterion}: {self.value} (score {self.score_id})"
+    
+    @staticmethod
+    def _value(value):
+        if isinstance(value, bool):
+            return None
+        try:
+            value = Decimal(str(value)).quantize(Decimal('0.01'))
+        except (ArithmeticError, ValueError):
+            return None
+        # Anything the column cannot hold stays in the JSON only
+        return value if value.is_finite() and abs(value) < 10 ** 6 else None
+    
+    @classmethod
+    def sync(cls, scores):
+        """Replace the criterion rows of the given EventScores, in one delete and one insert"""
+        scores = [score for score in scores if score.pk]
+        if not scores:
+            return
+        cls.objects.filter(score__in=[score.pk for score in scores]).delete()
+        rows = []
+        for score in scores:
+            if not isinstance(score.criteria_scores, dict):
+                continue
+            for criterion, value in score.criteria_scores.items():
+                value = cls._value(value)
+                if value is not None and len(criterion) <= 100:
+                    rows.append(cls(score_id=score.pk, sub_event_id=score.sub_event_id, criterion=criterion, value=value))
+        cls.objects.bulk_create(rows, batch_size=500)
+
 class DepartmentScore(models.Model):
     department = models.CharField(max_length=50)
     year = models.CharField(max_length=10, null=True, blank=True)  # Nullable for Civil
@@ -705,80 +855,704 @@ class DepartmentScore(models.Model):
     aura_points = models.IntegerField(default=0)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        constraints = [
+            # Civil rows have no year or division, and NULLs never collide
+            models.UniqueConstraint(
+                F('sub_event'),
+                F('department'),
+                Coalesce('year', Value('')),
+                Coalesce('division', Value('')),
+                name='unique_department_score_per_class_group'
+            )
+        ]
+    
     def save(self, *args, **kwargs):
         # Special handling for Civil department
         if self.department == 'CIVIL':
             self.year = None
             self.division = None
-        super().save(*args, **kwargs)
         
+        with transaction.atomic():
+            # Lock the stored row so the standings delta is computed against
+            # the values actually being replaced
+            previous = None
+            if self.pk:
+                previous = DepartmentScore.objects.select_for_update().filter(
+                    pk=self.pk
+                ).select_related('sub_event').first()
+            
+            if previous is None:
+                try:
+                    with transaction.atomic():
+                        super().save(*args, **kwargs)
+                    DepartmentTotal.add_score(self)
+                    return
+                except IntegrityError:
+                    # A concurrent writer created this class group's row first
+                    previous = DepartmentScore.objects.select_for_update().filter(
+                        **self.class_group_lookup()
+                    ).select_related('sub_event').first()
+                    if previous is None:
+                        raise
+                    self.pk = previous.pk
+                    self._state.adding = False
+                    kwargs.pop('force_insert', None)
+            
+            super().save(*args, **kwargs)
+            DepartmentTotal.replace_score(previous, self)
+        
+    def class_group_lookup(self):
+        return {
+            'sub_event_id': self.sub_event_id,
+            'department': self.department,
+            'year': self.year,
+            'division': self.division
+        }
+    
     def __str__(self):
         return f"{self.department} {self.year} {self.division} - {self.sub_event.name}"
     
     @classmethod
-    def update_civil_scores(cls, sub_event_id):
-        """Update scores for Civil department by combining all years/divisions"""
-        civil_scores = cls.objects.filter(
-            department='CIVIL',
-            sub_event_id=sub_event_id
+    def mark_dirty(cls, sub_event_id, registration_id):
+        """
+        Queue the class group of a registration's placed score for recompute
+        once the surrounding transaction commits. Every score written in the
+        same transaction joins one pending recompute.
+        """
+        _on_commit_once('dirty_department_scores', [(sub_event_id, registration_id)], cls.recompute)
+    
+    @classmethod
+    def recompute(cls, keys):
+        """
+        Set each (sub_event_id, registration_id)'s class group score from its
+        best placed entry: of the group's registrations placed winner or
+        runner-up in a heat (or the sub-event), the one with the most AURA
+        points, then the highest summed score there. A group left without a
+        placed entry is zeroed. Reads are one query each however many keys
+        there are; only scores that actually changed are saved.
+        
+        This is the one writer of sub-event class group scores. It replaces
+        rather than increments, and holds a lock on the sub-events while it
+        reads and writes, so concurrent heat completions and recomputes
+        serialize and the last one sees every committed placing.
+        """
+        registrations = EventRegistration.objects.filter(
+            id__in={registration_id for _, registration_id in keys}
+        ).values_list('id', 'department', 'year', 'division')
+        # Civil years and divisions fold into one group
+        class_groups = {
+            registration_id: (department, None, None) if department == 'CIVIL' else (department, year, division)
+            for registration_id, department, year, division in registrations
+        }
+        groups = {
+            (sub_event_id,) + class_groups[registration_id]
+            for sub_event_id, registration_id in keys
+            if registration_id in class_groups
+        }
+        if not groups:
+            return
+        sub_event_ids = {group[0] for group in groups}
+        departments = {group[1] for group in groups}
+        
+        with transaction.atomic():
+            # Read only once holding the lock, so a recompute that waited on
+            # another sees that one's placings and never writes older values
+            list(SubEvent.objects.select_for_update().filter(
+                id__in=sub_event_ids
+            ).order_by('id').values_list('id', flat=True))
+            
+            # One entry per registration and heat: judges' scores add up, placings are shared
+            placed = EventScore.objects.filter(
+                Q(score_type__in=['WINNER', 'RUNNER_UP']) | Q(position__in=[1, 2]),
+                sub_event_id__in=sub_event_ids,
+                event_registration__department__in=departments
+            ).values(
+                'sub_event_id', 'event_registration_id', 'heat_id', 'event_registration__department',
+                'event_registration__year', 'event_registration__division'
+            ).annotate(
+                entry_score=Sum('total_score'),
+                entry_aura_points=Max('aura_points')
+            ).order_by()
+            best = {}
+            for row in placed:
+                department = row['event_registration__department']
+                group = (row['sub_event_id'], department, None, None) if department == 'CIVIL' else (
+                    row['sub_event_id'], department,
+                    row['event_registration__year'], row['event_registration__division']
+                )
+                if group not in groups:
+                    continue
+                entry = (row['entry_aura_points'] or 0, row['entry_score'] or Decimal('0.00'))
+                best[group] = max(best.get(group, entry), entry)
+            
+            existing = {}
+            for department_score in cls.objects.filter(
+                sub_event_id__in=sub_event_ids, department__in=departments
+            ).order_by('-id'):
+                # The oldest row wins if a group was ever duplicated
+                existing[(
+                    department_score.sub_event_id, department_score.department,
+                    department_score.year, department_score.division
+                )] = department_score
+            
+            for group in groups:
+                department_score = existing.get(group)
+                if department_score is None:
+                    if group not in best:
+                        continue
+                    department_score = cls(
+                        sub_event_id=group[0], department=group[1], year=group[2], division=group[3]
+                    )
+                aura_points, total_score = best.get(group, (0, Decimal('0.00')))
+                if (department_score.pk and department_score.total_score == total_score
+                        and department_score.aura_points == aura_points):
+                    continue
+                department_score.total_score = total_score
+                department_score.aura_points = aura_points
+                department_score.save()
+    
+class DepartmentTotal(models.Model):
+    """
+    Running standings for a class group (department/year/division) within an
+    event. Rows are maintained incrementally from DepartmentScore writes so the
+    scoreboards never have to re-aggregate the full score table.
+    """
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='department_totals',
+        null=True,
+        blank=True
+    )
+    department = models.CharField(max_length=50)
+    year = models.CharField(max_length=10, null=True, blank=True)
+    division = models.CharField(max_length=10, null=True, blank=True)
+    total_score = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_aura_points = models.IntegerField(default=0)
+    score_count = models.IntegerField(default=0)  # DepartmentScore rows folded into this total
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['event', 'department', 'year', 'division']
+    
+    def __str__(self):
+        return f"{self.department} {self.year} {self.division} - {self.event}"
+    
+    @classmethod
+    def apply_delta(cls, event_id, department, year, division,
+                    total_score=0, aura_points=0, score_count=0):
+        """Add the given deltas to a class group's running totals"""
+        if department == 'CIVIL':
+            year = None
+            division = None
+        
+        total_score = Decimal(str(total_score or 0))
+        aura_points = aura_points or 0
+        
+        group = cls.objects.filter(
+            event_id=event_id,
+            department=department,
+            year=year,
+            division=division
+        )
+        increments = {
+            'total_score': F('total_score') + total_score,
+            'total_aura_points': F('total_aura_points') + aura_points,
+            'score_count': F('score_count') + score_count,
+            'updated_at': timezone.now()
+        }
+        
+        with transaction.atomic():
+            updated = group.update(**increments)
+            # A removal for a group with no row is drift for rebuild_standings to
+            # report; creating a negative row here could outlive a deleted event
+            if not updated and score_count > 0:
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(
+                            event_id=event_id,
+                            department=department,
+                            year=year,
+                            division=division,
+                            total_score=total_score,
+                            total_aura_points=aura_points,
+                            score_count=score_count
+                        )
+                except IntegrityError:
+                    # Another sub-event's score created the group first
+                    group.update(**increments)
+                updated = 1
+            
+            if updated and (total_score or aura_points):
+                StandingsSnapshot.objects.create(
+                    event_id=event_id,
+                    department=department,
+                    year=year,
+                    division=division,
+                    score_delta=total_score,
+                    aura_points_delta=aura_points
+                )
+    
+    @classmethod
+    def add_score(cls, department_score):
+        """Fold a saved DepartmentScore into the standings"""
+        cls.apply_delta(
+            department_score.sub_event.event_id,
+            department_score.department,
+            department_score.year,
+            department_score.division,
+            total_score=department_score.total_score,
+            aura_points=department_score.aura_points,
+            score_count=1
+        )
+    
+    @classmethod
+    def replace_score(cls, previous, department_score):
+        """Swap a stored DepartmentScore for its updated version as one net change"""
+        previous_key = (
+            previous.sub_event.event_id, previous.department, previous.year, previous.division
+        )
+        current_key = (
+            department_score.sub_event.event_id, department_score.department,
+            department_score.year, department_score.division
+        )
+        if previous_key != current_key:
+            cls.remove_score(previous)
+            cls.add_score(department_score)
+            return
+        
+        cls.apply_delta(
+            *current_key,
+            total_score=(
+                Decimal(str(department_score.total_score or 0)) -
+                Decimal(str(previous.total_score or 0))
+            ),
+            aura_points=(department_score.aura_points or 0) - (previous.aura_points or 0)
+        )
+    
+    @classmethod
+    def remove_score(cls, department_score):
+        """Take a stored DepartmentScore back out of the standings"""
+        cls.apply_delta(
+            department_score.sub_event.event_id,
+            department_score.department,
+            department_score.year,
+            department_score.division,
+            total_score=-Decimal(str(department_score.total_score or 0)),
+            aura_points=-(department_score.aura_points or 0),
+            score_count=-1
         )
+    
+    @classmethod
+    def standings(cls, event_id=None, year=None, division=None, department=None):
+        """Department and class-group aura point standings, highest first"""
+        totals = cls.objects.filter(score_count__gt=0)
+        if department:
+            totals = totals.filter(department=department)
+        if year:
+            totals = totals.filter(year=year)
+        if division:
+            totals = totals.filter(division=division)
+        if event_id:
+            totals = totals.filter(event_id=event_id)
         
-        total_aura_points = civil_scores.aggregate(
-            total=Sum('aura_points')
-        )['total'] or 0
+        department_standings = totals.values(
+            'department'
+        ).annotate(
+            total_aura_points=Sum('total_aura_points'),
+            total_score=Sum('total_score'),
+            total_events=Sum('score_count')
+        ).order_by('-total_aura_points')
         
-        # Create or update combined score
-        cls.objects.update_or_create(
-            department='CIVIL',
-            sub_event_id=sub_event_id,
-            year=None,
-            division=None,
-            defaults={
-                'aura_points': total_aura_points,
-                'updated_at': timezone.now()
-            }
+        detailed_standings = totals.values(
+            'department', 'year', 'division'
+        ).annotate(
+            total_aura_points=Sum('total_aura_points'),
+            total_score=Sum('total_score'),
+            total_events=Sum('score_count')
+        ).order_by('-total_aura_points')
+        
+        return {
+            'department_standings': department_standings,
+            'detailed_standings': detailed_standings
+        }
+    
+    @classmethod
+    def rebuild(cls, commit=True):
+        """
+        Recompute every total from DepartmentScore and return the groups whose
+        stored totals had drifted from the recomputed values.
+        """
+        expected = {}
+        recomputed = DepartmentScore.objects.values(
+            'sub_event__event_id', 'department', 'year', 'division'
+        ).annotate(
+            total_score=Coalesce(Sum('total_score'), Decimal('0.00')),
+            total_aura_points=Coalesce(Sum('aura_points'), 0),
+            score_count=Count('id')
         )
+        for row in recomputed:
+            key = (row['sub_event__event_id'], row['department'], row['year'], row['division'])
+            expected[key] = (row['total_score'], row['total_aura_points'], row['score_count'])
         
-        # Delete individual year/division scores
-        civil_scores.exclude(
-            year__isnull=True,
-            division__isnull=True
-        ).delete()
+        with transaction.atomic():
+            stored = {}
+            for total in cls.objects.select_for_update():
+                key = (total.event_id, total.department, total.year, total.division)
+                current = stored.get(key, (Decimal('0.00'), 0, 0))
+                # Duplicate rows for the same group are themselves drift, so sum them
+                stored[key] = (
+                    current[0] + total.total_score,
+                    current[1] + total.total_aura_points,
+                    current[2] + total.score_count
+                )
+            
+            drift = []
+            for key in sorted(set(expected) | set(stored), key=str):
+                expected_values = expected.get(key, (Decimal('0.00'), 0, 0))
+                stored_values = stored.get(key, (Decimal('0.00'), 0, 0))
+                if expected_values != stored_values:
+                    drift.append({
+                        'event_id': key[0],
+                        'department': key[1],
+                        'year': key[2],
+                        'division': key[3],
+                        'expected': expected_values,
+                        'stored': stored_values
+                    })
+            
+            if commit:
+                cls.objects.all().delete()
+                cls.objects.bulk_create([
+                    cls(
+                        event_id=key[0],
+                        department=key[1],
+                        year=key[2],
+                        division=key[3],
+                        total_score=values[0],
+                        total_aura_points=values[1],
+                        score_count=values[2]
+                    )
+                    for key, values in expected.items()
+                ])
+                # Record the corrections so the history still sums to the totals
+                StandingsSnapshot.objects.bulk_create([
+                    StandingsSnapshot(
+                        event_id=row['event_id'],
+                        department=row['department'],
+                        year=row['year'],
+                        division=row['division'],
+                        score_delta=row['expected'][0] - row['stored'][0],
+                        aura_points_delta=row['expected'][1] - row['stored'][1]
+                    )
+                    for row in drift
+                    if row['expected'][:2] != row['stored'][:2]
+                ])
+        
+        return drift
+
+
+class ScoreChange(models.Model):
+    """
+    Ordered feed of score changes. The auto-increment id doubles as the
+    event id for the live stream, so clients can resume with Last-Event-ID
+    from any worker process.
+    """
+    SOURCES = (
+        ('DEPARTMENT_SCORE', 'Department Score'),
+        ('EVENT_SCORE', 'Event Score')
+    )
+    
+    ACTIONS = (
+        ('SAVED', 'Saved'),
+        ('DELETED', 'Deleted')
+    )
+    
+    source = models.CharField(max_length=20, choices=SOURCES)
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    object_id = models.IntegerField()
+    event_id = models.IntegerField(null=True, blank=True, db_index=True)
+    sub_event_id = models.IntegerField(null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"#{self.id} {self.source} {self.object_id} {self.action}"
+    
+    def as_message(self):
+        """Payload pushed to live scoreboard clients"""
+        return {
+            'id': self.id,
+            'source': self.source,
+            'action': self.action,
+            'object_id': self.object_id,
+            'event_id': self.event_id,
+            'sub_event_id': self.sub_event_id,
+            'data': self.payload,
+            'created_at': self.created_at.isoformat()
+        }
     
     @classmethod
-    def record_score(cls, registration, sub_event, aura_points):
-        """Record score for a registration, handling Civil department specially"""
-        if registration.department == 'CIVIL':
-            # Create temporary score
-            score = cls.objects.create(
-                department='CIVIL',
-                sub_event=sub_event,
-                year=registration.year,
-                division=registration.division,
-                aura_points=aura_points
-            )
-            # Update combined Civil score
-            cls.update_civil_scores(sub_event.id)
-        else:
-            # Normal department scoring
-            score = cls.objects.create(
-                department=registration.department,
-                year=registration.year,
-                division=registration.division,
-                sub_event=sub_event,
-                aura_points=aura_points
+    def record(cls, source, action, instance, payload, event_id=None):
+        """Append a change once the surrounding transaction commits"""
+        object_id = instance.pk  # Cleared on the instance once a delete completes
+        sub_event_id = instance.sub_event_id
+        
+        # Written after commit so ids become visible in roughly commit order
+        # and rolled back writes never reach the stream
+        transaction.on_commit(lambda: cls.objects.create(
+            source=source,
+            action=action,
+            object_id=object_id,
+            event_id=event_id,
+            sub_event_id=sub_event_id,
+            payload=payload
+        ))
+    
+    @classmethod
+    def record_many(cls, source, action, instances, payloads, event_id=None):
+        """record() for rows written in bulk, as one insert after commit"""
+        changes = [
+            cls(
+                source=source,
+                action=action,
+                object_id=instance.pk,
+                event_id=event_id,
+                sub_event_id=instance.sub_event_id,
+                payload=payload
             )
-        return score
+            for instance, payload in zip(instances, payloads)
+        ]
+        if changes:
+            transaction.on_commit(lambda: cls.objects.bulk_create(changes))
+    
+    @classmethod
+    def prune(cls, before):
+        """
+        Delete the changes recorded before ``before``. Clients resuming from a
+        pruned id simply carry on from the oldest change left. Returns rows removed.
+        """
+        # Ids follow creation order, so walking the primary key from the oldest
+        # row finds the cut without an index on created_at
+        first_kept = cls.objects.filter(created_at__gte=before).order_by('id').values_list('id', flat=True).first()
+        old = cls.objects.filter(id__lt=first_kept) if first_kept else cls.objects.filter(created_at__lt=before)
+        deleted, _ = old.delete()
+        return deleted
+
+
+class ScoreGeneration(models.Model):
+    """
+    Per-event counter bumped after every committed score write. Scoreboard
+    endpoints derive their ETags from it instead of re-reading the score tables.
+    """
+    event = models.OneToOneField(
+        Event,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score_generation'
+    )
+    generation = models.PositiveBigIntegerField(default=0)
     
+    def __str__(self):
+        return f"{self.event_id} @ {self.generation}"
     
-class DepartmentTotal(models.Model):
+    @classmethod
+    def bump(cls, event_id):
+        """Advance an event's generation once the surrounding transaction commits"""
+        if not event_id:
+            return
+        # One advance per event per transaction, however many scores it writes
+        _on_commit_once('score_generations', [event_id], cls._advance, robust=True)
+    
+    @classmethod
+    def _advance(cls, event_ids):
+        for event_id in event_ids:
+            cls._increment(event_id)
+            if getattr(settings, 'SCOREBOARD_SNAPSHOTS_ON_CHANGE', False):
+                from .snapshots import publish_on_change
+                publish_on_change(event_id)
+    
+    @classmethod
+    def _increment(cls, event_id):
+        if cls.objects.filter(event_id=event_id).update(generation=F('generation') + 1):
+            return
+        # The event may have been deleted along with its scores
+        if not Event.objects.filter(pk=event_id).exists():
+            return
+        _, created = cls.objects.get_or_create(event_id=event_id, defaults={'generation': 1})
+        if not created:
+            cls.objects.filter(event_id=event_id).update(generation=F('generation') + 1)
+    
+    @classmethod
+    def token(cls, event_id=None):
+        """Opaque version token for one event, or for all events when no id is given"""
+        if event_id:
+            generation = cls.objects.filter(
+                event_id=event_id
+            ).values_list('generation', flat=True).first()
+            return f"e{event_id}-{generation or 0}"
+        
+        # Count and max id change whenever an event (and its counter) is removed
+        stamp = cls.objects.aggregate(
+            total=Coalesce(Sum('generation'), 0),
+            events=Count('event_id'),
+            latest=Coalesce(Max('event_id'), 0)
+        )
+        return f"all-{stamp['total']}-{stamp['events']}-{stamp['latest']}"
+
+
+class StandingsSnapshot(models.Model):
+    """
+    Append-only history of standings changes. Each row holds only the change to
+    a class group's total; the total at any moment is the sum of the deltas up
+    to it. Old rows are merged into coarser buckets by compact().
+    """
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='standings_history',
+        null=True,
+        blank=True
+    )
     department = models.CharField(max_length=50)
     year = models.CharField(max_length=10, null=True, blank=True)
     division = models.CharField(max_length=10, null=True, blank=True)
-    total_aura_points = models.IntegerField(default=0)
-    updated_at = models.DateTimeField(auto_now=True)
+    score_delta = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    aura_points_delta = models.IntegerField(default=0)
+    recorded_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        unique_together = ['department', 'year', 'division']
+        ordering = ['recorded_at', 'id']
+        indexes = [
+            models.Index(fields=['department', 'recorded_at']),
+            models.Index(fields=['event', 'recorded_at']),
+        ]
     
-    
\ No newline at end of file
+    def __str__(self):
+        return f"{self.department} {self.year} {self.division} {self.score_delta:+} @ {self.recorded_at}"
+    
+    @classmethod
+    def compact(cls, before, bucket):
+        """
+        Merge the deltas recorded before ``before`` into one row per class group
+        and ``bucket`` (a timedelta), stamped at the last change in the bucket.
+        Totals at bucket boundaries are unchanged. Returns rows removed.
+        """
+        bucket_seconds = bucket.total_seconds()
+        merged = {}
+        
+        with transaction.atomic():
+            old_rows = cls.objects.select_for_update().filter(recorded_at__lt=before)
+            count = 0
+            for row in old_rows.order_by('recorded_at', 'id'):
+                count += 1
+                slot = int(row.recorded_at.timestamp() // bucket_seconds)
+                key = (row.event_id, row.department, row.year, row.division, slot)
+                if key in merged:
+                    merged[key].score_delta += row.score_delta
+                    merged[key].aura_points_delta += row.aura_points_delta
+                    merged[key].recorded_at = row.recorded_at
+                else:
+                    merged[key] = cls(
+                        event_id=row.event_id,
+                        department=row.department,
+                        year=row.year,
+                        division=row.division,
+                        score_delta=row.score_delta,
+                        aura_points_delta=row.aura_points_delta,
+                        recorded_at=row.recorded_at
+                    )
+            
+            if len(merged) == count:
+                return 0
+            old_rows.delete()
+            cls.objects.bulk_create(merged.values(), batch_size=500)
+        
+        return count - len(merged)
+
+
+class ScoreLogEntry(models.Model):
+    """
+    Append-only log of score mutations, written in the same transaction as the
+    change. Each entry holds the row's state after the change in typed columns
+    (no JSON), so replaying the log up to any moment rebuilds the derived
+    department scores and standings.
+    """
+    EVENT_SCORE = 1
+    DEPARTMENT_SCORE = 2
+    KINDS = (
+        (EVENT_SCORE, 'Event Score'),
+        (DEPARTMENT_SCORE, 'Department Score')
+    )
+    
+    SAVED = 1
+    DELETED = 2
+    OPERATIONS = (
+        (SAVED, 'Saved'),
+        (DELETED, 'Deleted')
+    )
+    
+    id = models.BigAutoField(primary_key=True)
+    kind = models.PositiveSmallIntegerField(choices=KINDS)
+    operation = models.PositiveSmallIntegerField(choices=OPERATIONS)
+    object_id = models.IntegerField()
+    event_id = models.IntegerField(null=True, blank=True)
+    sub_event_id = models.IntegerField()
+    # Event scores
+    registration_id = models.IntegerField(null=True, blank=True)
+    heat_id = models.IntegerField(null=True, blank=True)
+    score_type = models.CharField(max_length=20, null=True, blank=True)
+    position = models.IntegerField(null=True, blank=True)
+    # Department scores
+    department = models.CharField(max_length=50, null=True, blank=True)
+    year = models.CharField(max_length=10, null=True, blank=True)
+    division = models.CharField(max_length=10, null=True, blank=True)
+    # Both
+    total_score = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    aura_points = models.IntegerField(null=True, blank=True)
+    recorded_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"#{self.id} {self.get_kind_display()} {self.object_id} {self.get_operation_display()}"
+    
+    @classmethod
+    def entry(cls, instance, event_id=None, deleted=False):
+        """An unsaved entry recording an EventScore's or DepartmentScore's current state"""
+        entry = cls(
+            operation=cls.DELETED if deleted else cls.SAVED,
+            object_id=instance.pk,
+            event_id=event_id,
+            sub_event_id=instance.sub_event_id,
+            total_score=instance.total_score,
+            aura_points=instance.aura_points
+        )
+        if isinstance(instance, DepartmentScore):
+            entry.kind = cls.DEPARTMENT_SCORE
+            entry.department = instance.department
+            entry.year = instance.year
+            entry.division = instance.division
+        else:
+            entry.kind = cls.EVENT_SCORE
+            entry.registration_id = instance.event_registration_id
+            entry.heat_id = instance.heat_id
+            entry.score_type = instance.score_type
+            entry.position = instance.position
+        return entry
+    
+    @classmethod
+    def append(cls, instance, event_id=None, deleted=False):
+        cls.entry(instance, event_id, deleted).save()
+    
+    @classmethod
+    def append_many(cls, instances, event_id=None):
+        """Log rows written in bulk (or by queryset update) as one insert"""
+        cls.objects.bulk_create(
+            [cls.entry(instance, event_id) for instance in instances], batch_size=500
+        )
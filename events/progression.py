@@ -0,0 +1,111 @@
+# events/progression.py
+from django.db import transaction
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, Sum, Value, When, Window
+from django.db.models.functions import Cast, Rank
+
+from .models import EventHeat, EventScore, HeatParticipant, SubEvent
+from .seeding import generate_heats
+
+NEXT_STAGES = {
+    'PRELIMS': 'QUARTERS',
+    'QUARTERS': 'SEMIS',
+    'SEMIS': 'FINALS'
+}
+
+
+def rank_heat_participants(heats):
+    """
+    Every participant of ``heats`` ranked within their heat in one query:
+    recorded finishing position first (sports), then summed judge scores
+    (cultural). Ties share a rank.
+    """
+    totals = EventScore.objects.filter(
+        heat=OuterRef('heat'),
+        event_registration=OuterRef('registration')
+    ).order_by().values('heat').annotate(total=Sum('total_score')).values('total')
+    # A float keeps SQLite's window ORDER BY free of a NUMERIC cast
+    heat_score = Cast(Subquery(totals), FloatField())
+    return list(HeatParticipant.objects.filter(heat__in=heats).annotate(
+        heat_score=heat_score,
+        rank=Window(
+            Rank(),
+            partition_by=F('heat'),
+            order_by=[F('position').asc(nulls_last=True), heat_score.desc(nulls_last=True)]
+        )
+    ).order_by('heat_id', 'rank', 'registration_id').values(
+        'id', 'heat_id', 'registration_id', 'position', 'heat_score', 'rank', 'qualified_for_next'
+    ))
+
+
+def advance_round(sub_event, round_number, participants_per_heat=None, strategy='snake'):
+    """
+    Close a round once its last heat is completed: qualify the top
+    ``qualifiers_per_group`` of each heat (ties at the cut all go through)
+    with one UPDATE, and generate the next round's heats from them in bulk.
+    Heats whose qualifiers were already picked by hand (update_heat_results
+    with ``qualified``) keep that pick.
+
+    The round is the last one when it was the final, or when it was a
+    single heat and ``total_rounds`` asks for no more; a round of several
+    heats always leads on to a deciding round.
+
+    Runs in one transaction with the sub-event locked, and does nothing
+    when the round is still running, was the last, or has already been
+    advanced, so triggering it twice is harmless. Returns what it did.
+    """
+    with transaction.atomic():
+        # Serializes concurrent triggers for the same sub-event
+        SubEvent.objects.select_for_update().filter(pk=sub_event.pk).first()
+
+        heats = EventHeat.objects.filter(sub_event=sub_event, round_number=round_number).exclude(status='CANCELLED')
+        statuses = list(heats.values_list('status', flat=True))
+        if not statuses or any(heat_status != 'COMPLETED' for heat_status in statuses):
+            return {'status': 'IN_PROGRESS', 'round_number': round_number}
+
+        stage = heats.values_list('stage', flat=True).first() or sub_event.current_stage
+        total_rounds = sub_event.total_rounds or 1
+        if stage == 'FINALS' or (len(statuses) == 1 and round_number >= total_rounds):
+            return {'status': 'FINISHED', 'round_number': round_number}
+
+        next_heats = EventHeat.objects.filter(sub_event=sub_event, round_number=round_number + 1)
+        if next_heats.exists():
+            return {
+                'status': 'ALREADY_ADVANCED',
+                'round_number': round_number,
+                'next_round_heats': list(next_heats.values_list('id', flat=True))
+            }
+
+        ranked = rank_heat_participants(heats)
+        picked = {row['heat_id'] for row in ranked if row['qualified_for_next']}
+        qualifiers = sub_event.qualifiers_per_group or 1
+        qualified = [
+            row['id'] for row in ranked
+            if (row['qualified_for_next'] if row['heat_id'] in picked else (
+                row['rank'] <= qualifiers and (row['position'] is not None or row['heat_score'] is not None)
+            ))
+        ]
+        HeatParticipant.objects.filter(heat__in=heats).exclude(heat_id__in=picked).update(qualified_for_next=Case(
+            When(id__in=qualified, then=Value(True)),
+            default=Value(False)
+        ))
+        if len(qualified) < 2:
+            # Nobody left to race against: the round decided it
+            return {'status': 'FINISHED', 'round_number': round_number, 'qualified': len(qualified)}
+
+        participants_per_heat = participants_per_heat or sub_event.participants_per_group or 5
+        # Everyone left fitting in one heat makes it the final, unless more rounds are configured
+        if len(qualified) <= participants_per_heat and round_number + 1 >= total_rounds:
+            next_stage = 'FINALS'
+        else:
+            next_stage = NEXT_STAGES.get(stage, stage)
+        created = generate_heats(
+            sub_event, round_number + 1, participants_per_heat, strategy=strategy, stage=next_stage
+        )
+
+    return {
+        'status': 'ADVANCED',
+        'round_number': round_number,
+        'qualified': len(qualified),
+        'next_stage': next_stage,
+        'next_round_heats': [heat.id for heat in created]
+    }
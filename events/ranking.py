@@ -0,0 +1,105 @@
+# events/ranking.py
+from django.db.models import Avg, Count, F, FloatField, Max, Min, OuterRef, Subquery, Window
+from django.db.models.functions import Cast, DenseRank, Rank
+
+from .models import EventRegistration
+
+REGISTRATION_FIELDS = {
+    'event_registration__team_name': 'team_name',
+    'event_registration__department': 'department',
+    'event_registration__year': 'year',
+    'event_registration__division': 'division',
+    'event_registration__sub_event__participation_type': 'participation_type',
+}
+
+
+def _first_member(field):
+    # Correlated subquery keeps the member name in the same query without
+    # multiplying rows through the team_members join
+    members = EventRegistration.team_members.through.objects.filter(
+        eventregistration_id=OuterRef('event_registration')
+    ).order_by('id')
+    return Subquery(members.values(f'user__{field}')[:1])
+
+
+def rank_scores(scores, partition_by=None, score=None, order_by_position=False, **extra):
+    """
+    Rank registrations by their aggregated score in a single query.
+
+    ``scores`` is an EventScore queryset. Scores are aggregated per registration
+    (and per ``partition_by`` field, e.g. 'heat'), ``score`` defaults to the
+    average judge score, and RANK()/DENSE_RANK() are computed over each
+    partition with the database's window functions. Extra keyword aggregates
+    are added to each row as-is.
+
+    Each row carries registration_id, score, position (the stored one), rank,
+    dense_rank, tied and the registration's display data.
+    """
+    group_by = ['event_registration'] + ([partition_by] if partition_by else [])
+    partition = [F(partition_by)] if partition_by else None
+    # Ordering on a float keeps SQLite from wrapping the window's ORDER BY
+    # in a NUMERIC cast (invalid SQL); PostgreSQL ranks the same either way
+    order = Cast('ranking_score', FloatField()).desc(nulls_last=True)
+
+    # Aliases avoid clashing with EventScore's own field names
+    rows = scores.values(*group_by).annotate(
+        ranking_score=score or Avg('total_score'),
+        max_aura_points=Max('aura_points'),
+        final_position=Min('position'),
+        judge_count=Count('judge', distinct=True),
+        **extra
+    ).annotate(
+        rank=Window(Rank(), partition_by=partition, order_by=order),
+        dense_rank=Window(DenseRank(), partition_by=partition, order_by=order),
+        member_first_name=_first_member('first_name'),
+        member_last_name=_first_member('last_name'),
+        **{alias: F(field) for field, alias in REGISTRATION_FIELDS.items()}
+    )
+
+    ordering = ([partition_by] if partition_by else []) + (
+        ['final_position', 'rank'] if order_by_position else ['rank']
+    )
+    rows = list(rows.order_by(*ordering, 'event_registration'))
+
+    # Ties are neighbours within a partition sharing a rank
+    counts = {}
+    for row in rows:
+        key = (row.get(partition_by), row['rank'])
+        counts[key] = counts.get(key, 0) + 1
+
+    for row in rows:
+        row['registration_id'] = row.pop('event_registration')
+        row['score'] = row.pop('ranking_score')
+        row['aura_points'] = row.pop('max_aura_points')
+        row['position'] = row.pop('final_position')
+        row['tied'] = counts[(row.get(partition_by), row['rank'])] > 1
+        first_name = row.pop('member_first_name')
+        last_name = row.pop('member_last_name')
+        if row['participation_type'] == 'SOLO':
+            row['participant_name'] = (
+                f"{first_name or ''} {last_name or ''}".strip() or "Unknown Participant"
+            )
+        else:
+            row['participant_name'] = None
+    return rows
+
+
+def award_positions(rows, sub_event):
+    """
+    Winner and runner-up places from ranked rows, as {registration_id: (position, aura_points)}.
+
+    Every registration tied for the top score wins. With allow_joint_winners
+    their points are the average of the winner and runner-up points. The next
+    distinct score is runner-up.
+    """
+    winners = [row for row in rows if row['dense_rank'] == 1]
+    runners_up = [row for row in rows if row['dense_rank'] == 2]
+
+    winner_points = sub_event.aura_points_winner or 0
+    runner_points = sub_event.aura_points_runner or 0
+    if len(winners) > 1 and sub_event.allow_joint_winners:
+        winner_points = (winner_points + runner_points) // 2
+
+    awards = {row['registration_id']: (1, winner_points) for row in winners}
+    awards.update({row['registration_id']: (2, runner_points) for row in runners_up})
+    return awards
@@ -0,0 +1,141 @@
+# events/scheduling.py
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EventHeat, EventRegistration, HeatParticipant
+
+
+def _overlap_graph(pending, event):
+    """
+    Heats that cannot share a time slot: heat id -> ids of the heats any of
+    its participants (a registration, its team leader or a team member) is
+    also in. Read in three queries whatever the size of the fest.
+    """
+    heats_of_registration = {}
+    for heat_id, registration_id in HeatParticipant.objects.filter(heat__in=pending).values_list(
+        'heat_id', 'registration_id'
+    ):
+        heats_of_registration.setdefault(registration_id, set()).add(heat_id)
+
+    registrations = EventRegistration.objects.filter(sub_event__event=event)
+    people = {}
+    for registration_id, user_id in registrations.filter(team_leader__isnull=False).values_list('id', 'team_leader_id'):
+        people.setdefault(user_id, set()).add(registration_id)
+    for registration_id, user_id in EventRegistration.team_members.through.objects.filter(
+        eventregistration__sub_event__event=event
+    ).values_list('eventregistration_id', 'user_id'):
+        people.setdefault(user_id, set()).add(registration_id)
+
+    # Every registration is its own participant too, members on file or not
+    groups = [heats for heats in heats_of_registration.values() if len(heats) > 1]
+    for registration_ids in people.values():
+        heats = set()
+        for registration_id in registration_ids:
+            heats |= heats_of_registration.get(registration_id, set())
+        if len(heats) > 1:
+            groups.append(heats)
+
+    graph = {}
+    for heats in groups:
+        for heat_id in heats:
+            graph.setdefault(heat_id, set()).update(heats)
+    for heat_id, neighbours in graph.items():
+        neighbours.discard(heat_id)
+    return graph
+
+
+def plan_schedule(event, start, slot_minutes=60, slots_per_day=None, venues=(), keep_venues=True):
+    """
+    Propose a time slot and venue for every pending heat of an event so that
+    nobody is due in two heats at once, no venue hosts two heats at once and
+    each round of a sub-event starts after its previous round.
+
+    Greedy graph colouring over the participant-overlap graph: heats are
+    placed round by round, most constrained first, each in the earliest slot
+    none of its neighbours holds that still has a free venue. A heat keeps
+    its own (or its sub-event's) venue when ``keep_venues`` is set and one
+    is on file, and otherwise takes any of ``venues``; with neither, only
+    participant clashes are avoided. Slots run back to back from ``start``,
+    and with ``slots_per_day`` the next day starts at the same time.
+    """
+    pending = EventHeat.objects.filter(sub_event__event=event, status='PENDING')
+    heats = list(pending.values(
+        'id', 'sub_event_id', 'sub_event__name', 'stage', 'round_number', 'heat_number', 'heat_name',
+        'venue', 'sub_event__venue'
+    ))
+    graph = _overlap_graph(pending, event)
+    clashes = {heat['id']: graph.get(heat['id'], set()) for heat in heats}
+
+    slot_length = timezone.timedelta(minutes=slot_minutes)
+    venues = list(dict.fromkeys(venue for venue in venues if venue))
+
+    def slot_start(slot):
+        if not slots_per_day:
+            return start + slot * slot_length
+        day, slot_of_day = divmod(slot, slots_per_day)
+        return start + timezone.timedelta(days=day) + slot_of_day * slot_length
+
+    # Earlier rounds first, then the heats with the most clashes
+    heats.sort(key=lambda heat: (heat['round_number'] or 0, -len(clashes[heat['id']]), heat['id']))
+
+    slot_of = {}
+    booked = set()  # (slot, venue)
+    rounds_end = {}  # sub_event -> {round: last slot used}
+    timetable = []
+    for heat in heats:
+        own_venue = heat['venue'] or heat['sub_event__venue']
+        candidates = [own_venue] if own_venue and (keep_venues or not venues) else venues or [None]
+
+        round_number = heat['round_number'] or 0
+        rounds = rounds_end.setdefault(heat['sub_event_id'], {})
+        previous_round = max((slot for other, slot in rounds.items() if other < round_number), default=-1)
+        taken = {slot_of[neighbour] for neighbour in clashes[heat['id']] if neighbour in slot_of}
+
+        slot = previous_round + 1
+        while True:
+            if slot not in taken:
+                venue = next(
+                    (venue for venue in candidates if venue is None or (slot, venue) not in booked), False
+                )
+                if venue is not False:
+                    break
+            slot += 1
+
+        slot_of[heat['id']] = slot
+        if venue is not None:
+            booked.add((slot, venue))
+        rounds[round_number] = max(rounds.get(round_number, slot), slot)
+        timetable.append({
+            'heat_id': heat['id'],
+            'sub_event_id': heat['sub_event_id'],
+            'sub_event_name': heat['sub_event__name'],
+            'stage': heat['stage'],
+            'round_number': heat['round_number'],
+            'heat_number': heat['heat_number'],
+            'heat_name': heat['heat_name'],
+            'slot': slot,
+            'schedule': slot_start(slot),
+            'ends_at': slot_start(slot) + slot_length,
+            'venue': venue,
+            'clashing_heats': len(clashes[heat['id']])
+        })
+
+    timetable.sort(key=lambda row: (row['slot'], row['venue'] or '', row['heat_id']))
+    return {
+        'heats': len(timetable),
+        'slots': max(slot_of.values(), default=-1) + 1,
+        'clashing_pairs': sum(len(neighbours) for neighbours in clashes.values()) // 2,
+        'timetable': timetable
+    }
+
+
+def commit_schedule(timetable):
+    """Write a plan_schedule() timetable to its heats with one bulk update"""
+    now = timezone.now()
+    heats = [
+        EventHeat(id=row['heat_id'], schedule=row['schedule'], venue=row['venue'], updated_at=now)
+        for row in timetable
+    ]
+    with transaction.atomic():
+        EventHeat.objects.bulk_update(heats, ['schedule', 'venue', 'updated_at'], batch_size=500)
+    return len(heats)
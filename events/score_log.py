@@ -0,0 +1,152 @@
+# events/score_log.py
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DepartmentScore, DepartmentTotal, EventRegistration, ScoreLogEntry, SubEvent
+from .signals import announce_department_scores
+
+ZERO = Decimal('0.00')
+WINNING = ('WINNER', 'RUNNER_UP')
+CHUNK_SIZE = 2000
+
+
+def _stream(kind, until, event_id, fields):
+    """Log entries of one kind up to ``until``, oldest first, read in chunks"""
+    entries = ScoreLogEntry.objects.filter(kind=kind, recorded_at__lte=until)
+    if event_id:
+        entries = entries.filter(event_id=event_id)
+    return entries.order_by('id').values_list('object_id', 'operation', *fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _last_states(kind, until, event_id, fields):
+    states = {}
+    for object_id, operation, *state in _stream(kind, until, event_id, fields):
+        if operation == ScoreLogEntry.DELETED:
+            states.pop(object_id, None)
+        else:
+            states[object_id] = state
+    return states
+
+
+def logged_department_scores(until, event_id=None):
+    """Every class group's department score as last logged up to ``until``"""
+    states = _last_states(
+        ScoreLogEntry.DEPARTMENT_SCORE, until, event_id,
+        ('sub_event_id', 'department', 'year', 'division', 'total_score', 'aura_points')
+    )
+    return {
+        (sub_event_id, department, year, division): (total_score or ZERO, aura_points or 0)
+        for sub_event_id, department, year, division, total_score, aura_points in states.values()
+    }
+
+
+def derived_department_scores(until, event_id=None):
+    """
+    Department scores worked out afresh from the event scores logged up to
+    ``until``. An entry is a registration's scores in one heat, summed over
+    judges. Each class group keeps its best placed entry by aura points, then
+    score, as DepartmentScore.recompute does, and groups that were ranked
+    without placing get a zero row.
+    """
+    states = _last_states(
+        ScoreLogEntry.EVENT_SCORE, until, event_id,
+        ('sub_event_id', 'registration_id', 'heat_id', 'score_type', 'position', 'total_score', 'aura_points')
+    )
+    entries = {}
+    for sub_event_id, registration_id, heat_id, score_type, position, total_score, aura_points in states.values():
+        key = (sub_event_id, heat_id, registration_id)
+        score, points, placed, ranked = entries.get(key, (ZERO, 0, False, False))
+        entries[key] = (
+            score + (total_score or ZERO),
+            max(points, aura_points or 0),
+            placed or score_type in WINNING or position in (1, 2),
+            ranked or score_type in WINNING or position is not None
+        )
+
+    registrations = EventRegistration.objects.filter(
+        sub_event_id__in={sub_event_id for sub_event_id, _, _ in entries}
+    ).values_list('id', 'department', 'year', 'division')
+    # Civil years and divisions fold into one group
+    class_groups = {
+        registration_id: (department, None, None) if department == 'CIVIL' else (department, year, division)
+        for registration_id, department, year, division in registrations
+    }
+
+    scores = {}
+    for (sub_event_id, _, registration_id), (score, points, placed, ranked) in entries.items():
+        if not ranked or registration_id not in class_groups:
+            continue
+        group = (sub_event_id,) + class_groups[registration_id]
+        best_points, best_score = scores.get(group, (0, ZERO))
+        if placed:
+            best_points, best_score = max((best_points, best_score), (points, score))
+        scores[group] = (best_points, best_score)
+    return {group: (score, points) for group, (points, score) in scores.items()}
+
+
+def replay(until=None, event_id=None, derive=False, commit=True):
+    """
+    Bring DepartmentScore (for one event, or all of them) in line with the log
+    as of ``until`` and rebuild the standings from it. With ``derive`` the
+    scores are re-derived from logged event scores under the current rules
+    instead of replaying logged department scores. Returns the rows created,
+    updated and deleted, and the standings groups that changed.
+    """
+    until = until or timezone.now()
+    target = (derived_department_scores if derive else logged_department_scores)(until, event_id)
+
+    existing = DepartmentScore.objects.all()
+    if event_id:
+        existing = existing.filter(sub_event__event_id=event_id)
+    current = {}
+    for department_score in existing:
+        current[(
+            department_score.sub_event_id, department_score.department,
+            department_score.year, department_score.division
+        )] = department_score
+
+    created, updated = [], []
+    for group, (total_score, aura_points) in target.items():
+        department_score = current.get(group)
+        if department_score is None:
+            created.append(DepartmentScore(
+                sub_event_id=group[0], department=group[1], year=group[2], division=group[3],
+                total_score=total_score, aura_points=aura_points
+            ))
+        elif (department_score.total_score, department_score.aura_points) != (total_score, aura_points):
+            department_score.total_score = total_score
+            department_score.aura_points = aura_points
+            department_score.updated_at = timezone.now()
+            updated.append(department_score)
+    deleted = [department_score.pk for group, department_score in current.items() if group not in target]
+
+    result = {'created': len(created), 'updated': len(updated), 'deleted': len(deleted), 'drift': []}
+    if not commit:
+        return result
+
+    with transaction.atomic():
+        # Sub-events deleted since ``until`` cannot get their rows back
+        live = set(SubEvent.objects.filter(
+            id__in={department_score.sub_event_id for department_score in created}
+        ).values_list('id', flat=True))
+        created = [department_score for department_score in created if department_score.sub_event_id in live]
+        result['created'] = len(created)
+
+        # Written in bulk; the standings are rebuilt below instead of row by row
+        DepartmentScore.objects.bulk_create(created, batch_size=500)
+        DepartmentScore.objects.bulk_update(updated, ['total_score', 'aura_points', 'updated_at'], batch_size=500)
+        DepartmentScore.objects.filter(pk__in=deleted).delete()
+
+        events = dict(SubEvent.objects.filter(
+            id__in={department_score.sub_event_id for department_score in created + updated}
+        ).values_list('id', 'event_id'))
+        by_event = {}
+        for department_score in created + updated:
+            by_event.setdefault(events[department_score.sub_event_id], []).append(department_score)
+        for score_event_id, scores in by_event.items():
+            announce_department_scores(scores, score_event_id)
+
+        result['drift'] = DepartmentTotal.rebuild()
+    return result
@@ -0,0 +1,177 @@
+# events/scoreboard.py
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from users.models import User
+
+from .models import DepartmentScore, SubEvent
+
+
+def class_key(year, department, division):
+    """Key used by the scoreboards for a department/year/division column"""
+    return f"{year}_{department}_{division}"
+
+
+def class_label(year, department, division):
+    """Display label for a class group, e.g. SE-COMPUTER-A (Civil has no year or division)"""
+    return '-'.join(part for part in (year, department, division) if part)
+
+
+def choice_class_groups():
+    """Every class group the user choices allow, Civil counted once"""
+    groups = set()
+    for department, _ in User.DEPARTMENT_TYPES:
+        if department == 'CIVIL':
+            groups.add((None, department, None))
+            continue
+        for year, _ in User.YEAR_TYPES:
+            for division, _ in User.DIVISION_TYPES:
+                groups.add((year, department, division))
+    return groups
+
+
+def class_group_registry(rows, include_choices=False):
+    """
+    Ordered (year, department, division) groups present in ``rows``, optionally
+    padded with every group from the user choices so empty classes still show.
+    """
+    groups = {(row['year'], row['department'], row['division']) for row in rows}
+    if include_choices:
+        groups |= choice_class_groups()
+    return sorted(groups, key=lambda group: (group[1] or '', group[0] or '', group[2] or ''))
+
+
+def _column_sort_key(column):
+    # Mirrors order_by('department', 'year', 'division') without tripping over
+    # the NULL year/division used for Civil
+    return (column['department'] or '', column['year'] or '', column['division'] or '')
+
+
+def build_score_pivot(scores=None, sub_events=None, top=3, totals=None):
+    """
+    Build the sub-event x class-group score matrix in memory.
+
+    ``scores`` is a DepartmentScore queryset (all scores by default) and
+    ``sub_events`` the SubEvent queryset that makes up the rows (all sub-events
+    by name by default). Each is read exactly once. With ``totals``, a
+    DepartmentTotal queryset, the column and department totals come from
+    those maintained standings instead of being summed from ``scores``.
+    """
+    if scores is None:
+        scores = DepartmentScore.objects.all()
+    if sub_events is None:
+        sub_events = SubEvent.objects.all().order_by('name')
+    if totals is not None:
+        totals = totals.values('department', 'year', 'division').annotate(
+            total_score=Sum('total_score')
+        ).order_by('department', 'year', 'division')
+
+    return pivot_rows(
+        scores.values(
+            'sub_event_id', 'department', 'year', 'division', 'total_score'
+        ).order_by('id'),
+        sub_events.values('id', 'name', 'event__name'),
+        top=top,
+        total_rows=totals
+    )
+
+
+def pivot_rows(score_rows, sub_event_rows, top=3, total_rows=None):
+    """Pivot plain score and sub-event rows, as read by build_score_pivot"""
+    cells = {}
+    columns = {}
+    column_totals = {}
+    department_totals = OrderedDict()
+
+    def add_column(row):
+        key = class_key(row['year'], row['department'], row['division'])
+        if key not in columns:
+            columns[key] = {
+                'id': key,
+                'label': f"{row['year']} {row['department']} {row['division']}",
+                'department': row['department'],
+                'year': row['year'],
+                'division': row['division']
+            }
+            column_totals[key] = Decimal('0.00')
+        return key
+
+    def add_total(key, row):
+        column_totals[key] += row['total_score']
+        department_totals[row['department']] = (
+            department_totals.get(row['department'], Decimal('0.00')) + row['total_score']
+        )
+
+    for row in score_rows:
+        key = add_column(row)
+        # First row wins a cell, every row counts towards the totals unless they are given
+        cells.setdefault(row['sub_event_id'], {}).setdefault(key, row['total_score'])
+        if total_rows is None:
+            add_total(key, row)
+    for row in total_rows or ():
+        add_total(add_column(row), row)
+
+    ordered_columns = sorted(columns.values(), key=_column_sort_key)
+    column_totals = {column['id']: column_totals[column['id']] for column in ordered_columns}
+
+    rows = []
+    for sub_event in sub_event_rows:
+        sub_event_cells = cells.get(sub_event['id'], {})
+        rows.append({
+            'sub_event_id': sub_event['id'],
+            'sub_event_name': sub_event['name'],
+            'event_name': sub_event['event__name'],
+            'has_scores': bool(sub_event_cells),
+            'scores': {
+                column['id']: sub_event_cells.get(column['id'], 0)
+                for column in ordered_columns
+            }
+        })
+
+    sorted_totals = sorted(
+        column_totals.items(),
+        key=lambda x: x[1],
+        reverse=True
+    )[:top]
+
+    return {
+        'columns': ordered_columns,
+        'rows': rows,
+        'cells': cells,
+        'column_totals': column_totals,
+        'department_totals': [
+            {'department': department, 'total_score': total}
+            for department, total in sorted(
+                department_totals.items(), key=lambda x: x[1], reverse=True
+            )
+        ],
+        'top_performers': [
+            {
+                'rank': idx + 1,
+                'class_group': key,
+                'total_points': total
+            } for idx, (key, total) in enumerate(sorted_totals)
+        ]
+    }
+
+
+def matrix_response(pivot, event_id=None):
+    """Shape a pivot the way the matrix scoreboard endpoint returns it"""
+    return {
+        'columns': pivot['columns'],  # Class groups (TE COMPS A, etc.)
+        'matrix_data': [
+            {
+                'sub_event_id': row['sub_event_id'],
+                'sub_event_name': row['sub_event_name'],
+                'scores': row['scores']
+            }
+            for row in pivot['rows']
+        ],  # Sub-event wise scores
+        'column_totals': pivot['column_totals'],  # Total scores for each class
+        'top_performers': pivot['top_performers'],  # Top 3 class groups
+        'event_id': event_id,
+        'total_sub_events': len(pivot['rows']),
+        'total_class_groups': len(pivot['columns'])
+    }
@@ -0,0 +1,250 @@
+# events/scoreboard_engine.py
+from collections import OrderedDict
+from functools import cached_property
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from .models import DepartmentScore, EventScore
+
+DEPARTMENT_SCORE_FIELDS = {
+    'id': 'id',
+    'sub_event_id': 'sub_event_id',
+    'sub_event__name': 'sub_event',
+    'sub_event__category': 'category',
+    'sub_event__event_id': 'event_id',
+    'department': 'department',
+    'year': 'year',
+    'division': 'division',
+    'total_score': 'total_score',
+    'aura_points': 'aura_points',
+    'updated_at': 'updated_at',
+}
+
+EVENT_SCORE_FIELDS = {
+    'id': 'id',
+    'sub_event_id': 'sub_event_id',
+    'sub_event__name': 'sub_event',
+    'event_registration_id': 'registration_id',
+    'event_registration__department': 'department',
+    'event_registration__year': 'year',
+    'event_registration__division': 'division',
+    'heat_id': 'heat_id',
+    'stage': 'stage',
+    'round_number': 'round_number',
+    'judge_id': 'judge_id',
+    'total_score': 'total_score',
+    'aura_points': 'aura_points',
+    'position': 'position',
+}
+
+SHEETS = OrderedDict([
+    ('matrix', 'pivot'),
+    ('class_totals', 'class_totals'),
+    ('department_totals', 'department_totals'),
+    ('categories', 'category_breakdown'),
+    ('timeline', 'cumulative_totals'),
+    ('participants', 'participant_rankings'),
+])
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def _column(values, name):
+    if name in ('total_score', 'aura_points'):
+        # Casting Decimals one by one is far cheaper than letting pandas infer them
+        return np.fromiter(
+            (0.0 if value is None else float(value) for value in values),
+            dtype=float,
+            count=len(values)
+        )
+    if name == 'updated_at':
+        # Via epoch seconds, parsing aware datetimes one by one is slow
+        return pd.to_datetime(np.fromiter(
+            (np.nan if value is None else value.timestamp() for value in values),
+            dtype=float,
+            count=len(values)
+        ), unit='s', utc=True)
+    return list(values)
+
+
+def _frame(rows, fields):
+    """Column-wise DataFrame from values() dicts or values_list() tuples"""
+    rows = list(rows)
+    if rows and isinstance(rows[0], dict):
+        columns = [[row[field] for row in rows] for field in fields]
+    else:
+        columns = list(zip(*rows)) if rows else [()] * len(fields)
+    return pd.DataFrame({
+        name: _column(values, name) for name, values in zip(fields.values(), columns)
+    })
+
+
+def records(frame):
+    """Frame rows as JSON-safe dicts (missing values become None)"""
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient='records')
+
+
+def _rank(series):
+    # Ties share the best position (1, 1, 3, ...)
+    return series.rank(method='min', ascending=False).astype(int)
+
+
+class ScoreboardEngine:
+    """
+    Vectorised scoreboard built from one read of DepartmentScore (and, when
+    needed, EventScore) for an event, or for every event when none is given.
+    """
+
+    def __init__(self, event_id=None, department_rows=None, event_rows=None):
+        self.event_id = event_id
+        self._department_rows = department_rows
+        self._event_rows = event_rows
+
+    @classmethod
+    def from_records(cls, department_rows, event_rows=None):
+        """Build an engine over rows already in memory, keyed like values()"""
+        return cls(department_rows=department_rows, event_rows=event_rows or [])
+
+    @cached_property
+    def department_scores(self):
+        rows = self._department_rows
+        if rows is None:
+            scores = DepartmentScore.objects.all()
+            if self.event_id:
+                scores = scores.filter(sub_event__event_id=self.event_id)
+            rows = scores.order_by('id').values_list(*DEPARTMENT_SCORE_FIELDS)
+        frame = _frame(rows, DEPARTMENT_SCORE_FIELDS)
+        frame['class_key'] = (
+            frame['year'].fillna('None').astype(str) + '_' +
+            frame['department'].astype(str) + '_' +
+            frame['division'].fillna('None').astype(str)
+        )
+        return frame
+
+    @cached_property
+    def event_scores(self):
+        rows = self._event_rows
+        if rows is None:
+            scores = EventScore.objects.all()
+            if self.event_id:
+                scores = scores.filter(sub_event__event_id=self.event_id)
+            rows = scores.order_by('id').values_list(*EVENT_SCORE_FIELDS)
+        return _frame(rows, EVENT_SCORE_FIELDS)
+
+    def pivot(self):
+        """Sub-events as rows, class groups as columns, first score per cell"""
+        frame = self.department_scores
+        if frame.empty:
+            return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=['sub_event_id', 'sub_event']))
+        return frame.pivot_table(
+            index=['sub_event_id', 'sub_event'],
+            columns='class_key',
+            values='total_score',
+            aggfunc='first',
+            fill_value=0
+        ).sort_index(axis=1)
+
+    def class_totals(self):
+        frame = self.department_scores
+        totals = frame.groupby(
+            ['class_key', 'department', 'year', 'division'], dropna=False, as_index=False
+        ).agg(
+            total_score=('total_score', 'sum'),
+            aura_points=('aura_points', 'sum'),
+            sub_events=('sub_event_id', 'nunique')
+        )
+        totals['rank'] = _rank(totals['total_score'])
+        return totals.sort_values(['rank', 'class_key']).reset_index(drop=True)
+
+    def department_totals(self):
+        frame = self.department_scores
+        totals = frame.groupby('department', as_index=False).agg(
+            total_score=('total_score', 'sum'),
+            aura_points=('aura_points', 'sum'),
+            sub_events=('sub_event_id', 'nunique')
+        )
+        totals['rank'] = _rank(totals['total_score'])
+        return totals.sort_values(['rank', 'department']).reset_index(drop=True)
+
+    def category_breakdown(self):
+        """Points per department within each sub-event category"""
+        frame = self.department_scores
+        if frame.empty:
+            return pd.DataFrame()
+        return frame.assign(
+            category=frame['category'].fillna('UNCATEGORISED')
+        ).pivot_table(
+            index='department',
+            columns='category',
+            values='total_score',
+            aggfunc='sum',
+            fill_value=0
+        )
+
+    def cumulative_totals(self):
+        """Running total per department in the order scores were last updated"""
+        frame = self.department_scores.sort_values(['updated_at', 'id'])
+        timeline = frame[['updated_at', 'department', 'sub_event', 'total_score']].copy()
+        timeline['cumulative_score'] = timeline.groupby('department')['total_score'].cumsum()
+        return timeline.reset_index(drop=True)
+
+    def participant_rankings(self):
+        """Average judge score per registration, ranked within each sub-event"""
+        frame = self.event_scores
+        rankings = frame.groupby(
+            ['sub_event_id', 'sub_event', 'registration_id', 'department', 'year', 'division'],
+            dropna=False,
+            as_index=False
+        ).agg(
+            average_score=('total_score', 'mean'),
+            judge_count=('judge_id', 'nunique'),
+            aura_points=('aura_points', 'max')
+        )
+        rankings['rank'] = rankings.groupby('sub_event_id')['average_score'].rank(
+            method='min', ascending=False
+        ).astype(int)
+        return rankings.sort_values(['sub_event', 'rank']).reset_index(drop=True)
+
+    def sheet(self, name):
+        """One of SHEETS as a flat frame ready for export"""
+        if name not in SHEETS:
+            raise ValueError(f"Unknown sheet '{name}'. Choose from: {', '.join(SHEETS)}")
+        frame = getattr(self, SHEETS[name])()
+        if name in ('matrix', 'categories'):
+            frame = frame.reset_index()
+        return frame
+
+    def export(self, file_format, sheet='matrix'):
+        """
+        Return (content, content_type, extension). XLSX holds every sheet;
+        CSV and Parquet hold the single ``sheet`` requested.
+        """
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format '{file_format}'")
+        content_type, extension = EXPORT_FORMATS[file_format]
+        buffer = BytesIO()
+
+        if file_format == 'xlsx':
+            with pd.ExcelWriter(buffer) as writer:
+                for name in SHEETS:
+                    frame = self.sheet(name)
+                    if 'updated_at' in frame:
+                        # Excel cannot store timezone aware datetimes
+                        frame['updated_at'] = frame['updated_at'].dt.tz_localize(None)
+                    frame.to_excel(writer, sheet_name=name, index=False)
+            return buffer.getvalue(), content_type, extension
+
+        frame = self.sheet(sheet)
+        if file_format == 'csv':
+            return frame.to_csv(index=False).encode('utf-8'), content_type, extension
+
+        # Parquet column names must be strings
+        frame.columns = [str(column) for column in frame.columns]
+        frame.to_parquet(buffer, index=False)
+        return buffer.getvalue(), content_type, extension
@@ -0,0 +1,155 @@
+# events/seeding.py
+import random
+
+from django.db import transaction
+from django.db.models import Avg
+from django.utils import timezone
+
+from .models import EventHeat, EventRegistration, EventScore, HeatParticipant
+
+
+def _class_group(department, year, division):
+    # Civil years and divisions fold into one group
+    return (department, None, None) if department == 'CIVIL' else (department, year, division)
+
+
+def _deal(entries, heat_count):
+    """Deal entries round-robin: heat sizes differ by at most one"""
+    return [entries[heat::heat_count] for heat in range(heat_count)]
+
+
+def _snake(entries, heat_count):
+    """Deal 1..k then k..1, so every heat gets a fair share of the top seeds"""
+    heats = [[] for _ in range(heat_count)]
+    for position, entry in enumerate(entries):
+        lap, offset = divmod(position, heat_count)
+        heats[offset if lap % 2 == 0 else heat_count - 1 - offset].append(entry)
+    return heats
+
+
+def random_seeding(entries, heat_count, rng):
+    entries = list(entries)
+    rng.shuffle(entries)
+    return _deal(entries, heat_count)
+
+
+def snake_seeding(entries, heat_count, rng):
+    """
+    Seed on prior-round score, best first, snaked across the heats. Entries
+    without a prior score (e.g. in round 1) are seeded last, in random order.
+    """
+    entries = list(entries)
+    rng.shuffle(entries)
+    entries.sort(key=lambda entry: (entry['score'] is None, -(entry['score'] or 0)))
+    return _snake(entries, heat_count)
+
+
+def spread_seeding(entries, heat_count, rng):
+    """
+    Keep each class group out of its own way: a group's entries go to
+    different heats until every heat has one, so no heat holds more than
+    ceil(size / heats) of any class. Largest groups are dealt first.
+    """
+    entries = list(entries)
+    rng.shuffle(entries)
+    groups = {}
+    for entry in entries:
+        groups.setdefault(entry['class_group'], []).append(entry)
+    ordered = sorted(groups.values(), key=len, reverse=True)
+    # Dealt round-robin, a run of one group's entries never repeats a heat before wrapping
+    return _deal([entry for group in ordered for entry in group], heat_count)
+
+
+SEEDING_STRATEGIES = {
+    'random': random_seeding,
+    'snake': snake_seeding,
+    'spread': spread_seeding
+}
+
+
+def round_entries(sub_event, round_number):
+    """
+    Registrations in a round (approved ones for round 1, those qualified from
+    the previous round after that) with their class group and, after round 1,
+    their average judge score in the previous round.
+    """
+    if round_number == 1:
+        registrations = EventRegistration.objects.filter(sub_event=sub_event, status='APPROVED')
+    else:
+        registrations = EventRegistration.objects.filter(
+            sub_event=sub_event,
+            heatparticipant__heat__round_number=round_number - 1,
+            heatparticipant__qualified_for_next=True
+        ).distinct()
+
+    scores = {}
+    if round_number > 1:
+        scores = dict(EventScore.objects.filter(
+            sub_event=sub_event,
+            round_number=round_number - 1,
+            total_score__isnull=False
+        ).values('event_registration_id').annotate(score=Avg('total_score')).order_by().values_list(
+            'event_registration_id', 'score'
+        ))
+
+    return [
+        {
+            'registration_id': registration_id,
+            'department': department,
+            'year': year,
+            'division': division,
+            'class_group': _class_group(department, year, division),
+            'score': scores.get(registration_id)
+        }
+        for registration_id, department, year, division in registrations.order_by('id').values_list(
+            'id', 'department', 'year', 'division'
+        )
+    ]
+
+
+def generate_heats(sub_event, round_number, participants_per_heat, strategy='spread',
+                   heat_count=None, stage=None, schedule=None, seed=None):
+    """
+    Split a round's entries into heats with a SEEDING_STRATEGIES strategy and
+    write the heats and their participants with one bulk_create each. The
+    number of heats defaults to enough for ``participants_per_heat`` each.
+    Returns the created heats, each with its ``entries``.
+    """
+    if strategy not in SEEDING_STRATEGIES:
+        raise ValueError(f"Unknown seeding strategy '{strategy}', expected one of {', '.join(SEEDING_STRATEGIES)}")
+    if participants_per_heat < 1:
+        raise ValueError('participants_per_heat must be at least 1')
+
+    entries = round_entries(sub_event, round_number)
+    if not entries:
+        return []
+    if heat_count is None:
+        heat_count = -(-len(entries) // participants_per_heat)
+    heat_count = max(1, min(heat_count, len(entries)))
+
+    assignments = SEEDING_STRATEGIES[strategy](entries, heat_count, random.Random(seed))
+
+    stage = stage or sub_event.current_stage
+    schedule = schedule or timezone.now() + timezone.timedelta(hours=1)  # Default schedule
+    with transaction.atomic():
+        heats = EventHeat.objects.bulk_create([
+            EventHeat(
+                sub_event=sub_event,
+                stage=stage,
+                round_number=round_number,
+                heat_number=heat_number,
+                heat_name=f'Heat {heat_number}',
+                max_participants=max(participants_per_heat, len(heat_entries)),
+                schedule=schedule
+            )
+            for heat_number, heat_entries in enumerate(assignments, start=1)
+        ])
+        HeatParticipant.objects.bulk_create([
+            HeatParticipant(heat=heat, registration_id=entry['registration_id'])
+            for heat, heat_entries in zip(heats, assignments)
+            for entry in heat_entries
+        ], batch_size=500)
+
+    for heat, heat_entries in zip(heats, assignments):
+        heat.entries = heat_entries
+    return heats
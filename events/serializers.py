@@ -8,6 +8,7 @@ from .models import (
     HeatParticipant, EventCriteria, DepartmentScore
 )
 from users.serializers import UserSerializer
+from .criteria import NEGATIVE_MARKING, compiled_criteria
 
 class OrganizationSerializer(serializers.ModelSerializer):
     description = serializers.CharField(style={'base_template': 'textarea.html'})
@@ -157,7 +158,7 @@ class EventScoreSerializer(serializers.ModelSerializer):
     class Meta:
         model = EventScore
         fields = '__all__'
-        read_only_fields = ('points_awarded',)
+        read_only_fields = ('points_awarded', 'version')
         
     def get_judge_name(self, obj):
         return obj.judge.get_full_name() if obj.judge else None
@@ -185,21 +186,24 @@ class EventScoreSerializer(serializers.ModelSerializer):
         
     #     return value
     
-    def create(self, validated_data):
-        # Calculate total score based on criteria weights
-        criteria_scores = validated_data.get('criteria_scores', {})
-        sub_event = self.context.get('sub_event')
-        
-        if sub_event and criteria_scores:
-            total_score = sum(
-                criteria_scores.get(criterion, 0) * sub_event.scoring_criteria.get(criterion, {}).get('weight', 1)
-                for criterion in criteria_scores
-            )
-            validated_data['total_score'] = total_score
-        
-        # Create score instance
-        score = super().create(validated_data)
-        return score
+    def validate(self, data):
+        data = super().validate(data)
+        criteria_scores = data.get('criteria_scores')
+        sub_event = self.context.get('sub_event') or data.get('sub_event') or (
+            self.instance.sub_event if self.instance else None
+        )
+
+        if sub_event and isinstance(criteria_scores, dict) and criteria_scores:
+            criteria = compiled_criteria(sub_event.scoring_criteria)
+            if not criteria.configured and data.get('total_score') is not None:
+                # Nothing to weigh against, so a total given with the scores stands
+                return data
+            # Weighted total from the sub-event's compiled criteria (a plain sum without any)
+            totals, problems = criteria.score([criteria_scores], sub_event.allow_negative_marking)
+            if problems:
+                raise serializers.ValidationError({'criteria_scores': problems[0]})
+            data['total_score'] = totals[0]
+        return data
 
 class HeatParticipantSerializer(serializers.ModelSerializer):
     participant_name = serializers.SerializerMethodField()
@@ -287,7 +291,7 @@ class EventCriteriaSerializer(serializers.ModelSerializer):
                 )
             
             # Validate weights sum to 1 (excluding negative marking)
-            if criterion != 'Negative Marking':
+            if criterion != NEGATIVE_MARKING:
                 if not (0 <= details['weight'] <= 1):
                     raise serializers.ValidationError(
                         f"Weight for {criterion} must be between 0 and 1"
@@ -297,7 +301,7 @@ class EventCriteriaSerializer(serializers.ModelSerializer):
         total_weight = sum(
             details['weight'] 
             for criterion, details in value.items() 
-            if criterion != 'Negative Marking'
+            if criterion != NEGATIVE_MARKING
         )
         if not (0.99 <= total_weight <= 1.01):  # Allow small floating-point errors
             raise serializers.ValidationError("Weights must sum to 1.0")
@@ -0,0 +1,119 @@
+# events/signals.py
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .criteria import invalidate as invalidate_compiled_criteria
+from .models import (
+    CriterionScore, DepartmentScore, DepartmentTotal, EventCriteria, EventScore, HeatJudgeProgress, ScoreChange,
+    ScoreGeneration, ScoreLogEntry, SubEvent
+)
+
+
+@receiver(pre_delete, sender=DepartmentScore)
+def remove_department_score_from_standings(sender, instance, **kwargs):
+    """Keep standings in sync for single, queryset and cascading deletes"""
+    # Runs before the delete so the sub-event (and its event) can still be resolved
+    DepartmentTotal.remove_score(instance)
+
+
+def _publish(source, action, instance, payload):
+    """Log the change, feed the live stream and invalidate scoreboard ETags for the score's event"""
+    event_id = SubEvent.objects.filter(
+        pk=instance.sub_event_id
+    ).values_list('event_id', flat=True).first()
+    ScoreLogEntry.append(instance, event_id, deleted=action == 'DELETED')
+    ScoreChange.record(source, action, instance, payload, event_id)
+    ScoreGeneration.bump(event_id)
+
+
+def announce_event_scores(scores, event_id):
+    """bulk_create and update() skip post_save, so bulk score writers announce their rows here"""
+    ScoreLogEntry.append_many(scores, event_id)
+    ScoreChange.record_many(
+        'EVENT_SCORE', 'SAVED', scores, [_event_score_payload(score) for score in scores], event_id
+    )
+    ScoreGeneration.bump(event_id)
+
+
+def announce_department_scores(scores, event_id):
+    """announce_event_scores() for department scores written in bulk"""
+    ScoreLogEntry.append_many(scores, event_id)
+    ScoreChange.record_many(
+        'DEPARTMENT_SCORE', 'SAVED', scores, [_department_score_payload(score) for score in scores], event_id
+    )
+    ScoreGeneration.bump(event_id)
+
+
+def _department_score_payload(instance):
+    return {
+        'department': instance.department,
+        'year': instance.year,
+        'division': instance.division,
+        'total_score': str(instance.total_score),
+        'aura_points': instance.aura_points
+    }
+
+
+def _event_score_payload(instance):
+    return {
+        'event_registration_id': instance.event_registration_id,
+        'heat_id': instance.heat_id,
+        'stage': instance.stage,
+        'score_type': instance.score_type,
+        'total_score': str(instance.total_score) if instance.total_score is not None else None,
+        'aura_points': instance.aura_points,
+        'position': instance.position,
+        'qualified_for_next': instance.qualified_for_next
+    }
+
+
+@receiver(post_save, sender=DepartmentScore)
+def publish_department_score_saved(sender, instance, **kwargs):
+    _publish('DEPARTMENT_SCORE', 'SAVED', instance, _department_score_payload(instance))
+
+
+@receiver(post_delete, sender=DepartmentScore)
+def publish_department_score_deleted(sender, instance, **kwargs):
+    _publish('DEPARTMENT_SCORE', 'DELETED', instance, _department_score_payload(instance))
+
+
+@receiver(post_save, sender=EventScore)
+def publish_event_score_saved(sender, instance, **kwargs):
+    _publish('EVENT_SCORE', 'SAVED', instance, _event_score_payload(instance))
+
+
+@receiver(post_delete, sender=EventScore)
+def publish_event_score_deleted(sender, instance, **kwargs):
+    _publish('EVENT_SCORE', 'DELETED', instance, _event_score_payload(instance))
+
+
+@receiver(post_save, sender=EventScore)
+def sync_criterion_scores(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'criteria_scores' in update_fields:
+        CriterionScore.sync([instance])
+
+
+@receiver(post_delete, sender=EventScore)
+def recompute_department_score(sender, instance, **kwargs):
+    # The deleted placing may have been its class group's best
+    if instance.is_placed:
+        DepartmentScore.mark_dirty(instance.sub_event_id, instance.event_registration_id)
+
+
+@receiver(post_delete, sender=EventScore)
+def recount_judge_progress(sender, instance, **kwargs):
+    if instance.heat_id and instance.judge_id:
+        HeatJudgeProgress.refresh(instance.heat_id, instance.judge_id)
+
+
+@receiver(post_save, sender=SubEvent)
+@receiver(post_delete, sender=SubEvent)
+def bump_generation_for_sub_event(sender, instance, **kwargs):
+    """Sub-events are the scoreboard matrix rows, so they version it too"""
+    ScoreGeneration.bump(instance.event_id)
+
+
+@receiver(post_save, sender=EventCriteria)
+@receiver(post_delete, sender=EventCriteria)
+def evict_compiled_criteria(sender, instance, **kwargs):
+    invalidate_compiled_criteria(instance.pk)
@@ -0,0 +1,162 @@
+# events/snapshots.py
+import gzip
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+
+from .models import DepartmentScore, DepartmentTotal, EventScore, ScoreGeneration, SubEvent
+from .ranking import rank_scores
+from .scoreboard import build_score_pivot, matrix_response
+
+PREFIX = 'scoreboard'
+LATEST = 'latest.json'
+
+
+def get_storage():
+    """SCOREBOARD_SNAPSHOT_STORAGE (a dotted storage class) or the default storage"""
+    storage_class = getattr(settings, 'SCOREBOARD_SNAPSHOT_STORAGE', None)
+    return import_string(storage_class)() if storage_class else default_storage
+
+
+def _scope(event_id):
+    return f'{PREFIX}/event-{event_id}' if event_id else f'{PREFIX}/all'
+
+
+def _encode(data):
+    # Same JSON the API renders. mtime=0 keeps identical payloads byte-identical.
+    return gzip.compress(JSONRenderer().render(data), mtime=0)
+
+
+def _write(storage, name, content):
+    if not getattr(storage, 'file_overwrite', False) and storage.exists(name):
+        # Storages that rename on collision (the local filesystem) need room first
+        storage.delete(name)
+    storage.save(name, ContentFile(content))
+
+
+def _put_versioned(storage, scope, key, data):
+    """
+    Store a gzipped payload under a content-hashed name, uploading it only
+    when that exact content is not there yet. Returns the stored name.
+    """
+    content = _encode(data)
+    name = f'{scope}/{key}.{hashlib.sha256(content).hexdigest()[:16]}.json.gz'
+    if not storage.exists(name):
+        storage.save(name, ContentFile(content))
+    return name
+
+
+def _manifest_files(storage, scope):
+    """Stored names the current latest.json points at, if there is one"""
+    name = f'{scope}/{LATEST}'
+    if not storage.exists(name):
+        return set()
+    with storage.open(name) as latest:
+        manifest = json.loads(latest.read())
+    urls = list(manifest['files'].values()) + list(manifest['sub_events'].values())
+    return {f"{scope}/{url.rsplit('/', 1)[-1]}" for url in urls}
+
+
+def _prune(storage, scope, keep):
+    """Delete snapshots that neither the new nor the previous latest.json points at"""
+    _, filenames = storage.listdir(scope)
+    for filename in filenames:
+        name = f'{scope}/{filename}'
+        if filename.endswith('.json.gz') and name not in keep:
+            storage.delete(name)
+
+
+def _sub_event_results(event_id):
+    """Ranked results per sub-event of an event, from one windowed query"""
+    sub_events = SubEvent.objects.filter(event_id=event_id).values('id', 'name', 'slug', 'current_stage')
+    results = {
+        sub_event['id']: dict(sub_event, rankings=[])
+        for sub_event in sub_events
+    }
+    rows = rank_scores(
+        EventScore.objects.filter(sub_event__event_id=event_id),
+        partition_by='sub_event'
+    )
+    for row in rows:
+        results[row.pop('sub_event')]['rankings'].append(row)
+    return results
+
+
+def publish(event_id=None, storage=None):
+    """
+    Write an event's standings, matrix and sub-event results (or the overall
+    standings when no event is given) to the snapshot storage, then repoint
+    its latest.json at them. Returns the manifest written.
+    """
+    storage = storage or get_storage()
+    scope = _scope(event_id)
+
+    # Read before building, so the pointer never claims a newer version than its data
+    version = ScoreGeneration.token(event_id)
+    files = {'standings': _put_versioned(storage, scope, 'standings', DepartmentTotal.standings(event_id))}
+    sub_events = {}
+
+    if event_id:
+        pivot = build_score_pivot(
+            DepartmentScore.objects.filter(sub_event__event_id=event_id),
+            SubEvent.objects.filter(event_id=event_id).order_by('name'),
+            totals=DepartmentTotal.objects.filter(event_id=event_id, score_count__gt=0)
+        )
+        files['matrix'] = _put_versioned(storage, scope, 'matrix', matrix_response(pivot, event_id))
+        for sub_event_id, results in _sub_event_results(event_id).items():
+            sub_events[sub_event_id] = _put_versioned(
+                storage, scope, f'sub-event-{sub_event_id}', results
+            )
+
+    manifest = {
+        'event_id': event_id,
+        'version': version,
+        'published_at': timezone.now(),
+        'files': {key: storage.url(name) for key, name in files.items()},
+        'sub_events': {sub_event_id: storage.url(name) for sub_event_id, name in sub_events.items()}
+    }
+    # Readers that fetched the previous pointer may still be loading its files
+    keep = set(files.values()) | set(sub_events.values()) | _manifest_files(storage, scope)
+    _write(storage, f'{scope}/{LATEST}', JSONRenderer().render(manifest))
+    _prune(storage, scope, keep)
+    return manifest
+
+
+_lock = threading.Lock()
+_publishing = set()
+_dirty = set()
+
+
+def publish_on_change(event_id):
+    """
+    Republish an event and the overall standings after a committed score
+    change. A change that lands while the same event is already being
+    published makes that publisher run once more instead of starting another.
+    """
+    with _lock:
+        if event_id in _publishing:
+            _dirty.add(event_id)
+            return
+        _publishing.add(event_id)
+
+    try:
+        while True:
+            publish(event_id)
+            publish()
+            with _lock:
+                if event_id not in _dirty:
+                    _publishing.discard(event_id)
+                    return
+                _dirty.discard(event_id)
+    except Exception:
+        with _lock:
+            _publishing.discard(event_id)
+            _dirty.discard(event_id)
+        raise
@@ -1,3 +1,1021 @@
-from django.test import TestCase
+import datetime
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import skipIf
 
-# Create your tests here.
+from django.db import connection, connections, transaction
+from django.db.models import F, Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import CouncilMember, User
+from .brackets import advance, generate_bracket, plan_bracket
+from .caching import SingleFlight, flights, version_etag
+from .consistency import judge_consistency
+from .criteria import compiled_criteria
+from .judging import complete_heat, submit_heat_scores
+from .models import (
+    DepartmentScore, DepartmentTotal, Event, EventCriteria, EventDraw, EventHeat, EventRegistration, EventScore,
+    HeatParticipant, ScoreLogEntry, StandingsSnapshot, SubEvent, SubEventFaculty
+)
+from .history import standings_series
+from .progression import advance_round
+from .scheduling import plan_schedule
+from .score_log import replay
+from .seeding import SEEDING_STRATEGIES
+
+
+def create_event(admin):
+    """An event organised by ``admin`` as a council member"""
+    organizer = CouncilMember.objects.create(
+        user=admin,
+        position='General Secretary',
+        term_start=datetime.date.today(),
+        term_end=datetime.date.today(),
+        responsibilities='Events'
+    )
+    return Event.objects.create(
+        name='Aurora',
+        description='Annual fest',
+        event_type='INTRA',
+        start_date=datetime.date.today(),
+        end_date=datetime.date.today(),
+        registration_start=timezone.now(),
+        registration_end=timezone.now(),
+        venue='Campus',
+        max_participants=100,
+        organizer=organizer,
+        created_by=admin,
+        budget=0
+    )
+
+
+# Committed score writes would otherwise publish snapshots into the real media storage
+@override_settings(SCOREBOARD_SNAPSHOTS_ON_CHANGE=False)
+# SQLite's in-memory test database locks whole tables between connections and
+# ignores select_for_update, so only a real server can race these writes
+@skipIf(connection.vendor == 'sqlite', 'needs a database that runs writes concurrently')
+class DepartmentScoreConcurrencyTests(TransactionTestCase):
+    """Many judges writing the same class group's score at once"""
+    workers = 8
+    writes = 40
+
+    def setUp(self):
+        admin = User.objects.create(username='admin', email='admin@example.com', user_type='ADMIN')
+        self.event = create_event(admin)
+        self.sub_event = SubEvent.objects.create(
+            event=self.event, name='Relay', slug='relay', description='Relay race'
+        )
+
+    def hammer(self, write):
+        """Run write(i) for every i from a thread pool, each thread on its own connection"""
+        def run(i):
+            try:
+                write(i)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(run, range(self.writes)))
+
+    def assertStandings(self, department, year, division, total_score, aura_points, score_count=1):
+        total = DepartmentTotal.objects.get(
+            event=self.event, department=department, year=year, division=division
+        )
+        self.assertEqual(total.total_score, total_score)
+        self.assertEqual(total.total_aura_points, aura_points)
+        self.assertEqual(total.score_count, score_count)
+
+        history = StandingsSnapshot.objects.filter(
+            event=self.event, department=department, year=year, division=division
+        ).aggregate(score=Sum('score_delta'), aura_points=Sum('aura_points_delta'))
+        self.assertEqual(history['score'], total_score)
+        self.assertEqual(history['aura_points'], aura_points)
+
+    def test_concurrent_first_saves_create_one_row(self):
+        self.hammer(lambda i: DepartmentScore(
+            sub_event=self.sub_event, department='IT', year='TE', division='B',
+            total_score=Decimal('8.00'), aura_points=200
+        ).save())
+
+        score = DepartmentScore.objects.get(sub_event=self.sub_event)
+        self.assertEqual((score.total_score, score.aura_points), (Decimal('8.00'), 200))
+        # Every losing insert became an update of the same values
+        self.assertStandings('IT', 'TE', 'B', Decimal('8.00'), 200)
+
+    def make_heat(self, heat_number, entries, stage='PRELIMS'):
+        """A heat of (department, year, division) entries, registered and rostered"""
+        heat = EventHeat.objects.create(
+            sub_event=self.sub_event, stage=stage, round_number=1, heat_number=heat_number
+        )
+        registrations = []
+        for index, (department, year, division) in enumerate(entries):
+            registration = EventRegistration.objects.create(
+                sub_event=self.sub_event, department=department, year=year, division=division,
+                status='APPROVED', registration_number=f'H{heat_number}-{index}'
+            )
+            HeatParticipant.objects.create(heat=heat, registration=registration)
+            registrations.append(registration)
+        return heat, registrations
+
+    def test_concurrent_heat_completions_keep_each_groups_best_entry(self):
+        judge = User.objects.create(username='judge', email='judge@example.com', user_type='FACULTY')
+        heats = []
+        expected = {}
+        for i in range(self.writes):
+            # COMPUTER wins the later heats, EXTC the earlier ones
+            heat, registrations = self.make_heat(i, [('COMPUTER', 'SE', 'A'), ('EXTC', 'BE', 'A')])
+            scores = [Decimal(10 + i), Decimal(30 - i)]
+            for registration, score in zip(registrations, scores):
+                EventScore.objects.create(
+                    sub_event=self.sub_event, event_registration=registration, heat=heat,
+                    judge=judge, total_score=score
+                )
+            for department, score in zip(['COMPUTER', 'EXTC'], scores):
+                aura_points = 200 if score == max(scores) else 100
+                expected[department] = max(expected.get(department, (0, 0)), (aura_points, score))
+            heats.append(heat)
+
+        def complete(i):
+            with transaction.atomic():
+                complete_heat(EventHeat.objects.select_related('sub_event').get(pk=heats[i].pk))
+
+        self.hammer(complete)
+
+        for department, year, (aura_points, score) in (
+            ('COMPUTER', 'SE', expected['COMPUTER']), ('EXTC', 'BE', expected['EXTC'])
+        ):
+            department_score = DepartmentScore.objects.get(sub_event=self.sub_event, department=department)
+            self.assertEqual((department_score.total_score, department_score.aura_points), (score, aura_points))
+            self.assertStandings(department, year, 'A', score, aura_points)
+
+    def test_concurrent_judges_complete_a_heat_once(self):
+        self.sub_event.scoring_criteria = EventCriteria.objects.create(
+            name='Dance', event_type='CULTURAL', criteria={'Skill': {'max_score': 10}}
+        )
+        self.sub_event.save()
+        judges = [
+            User.objects.create(username=f'judge{i}', email=f'judge{i}@example.com', user_type='FACULTY')
+            for i in range(self.writes)
+        ]
+        SubEventFaculty.objects.bulk_create([
+            SubEventFaculty(sub_event=self.sub_event, faculty=judge) for judge in judges
+        ])
+        heat, registrations = self.make_heat(1, [('IT', 'TE', 'B'), ('MECH', 'FE', 'A')], stage='FINALS')
+        results = []
+
+        def submit(i):
+            results.append(submit_heat_scores(
+                EventHeat.objects.select_related('sub_event__scoring_criteria').get(pk=heat.pk),
+                judges[i],
+                [
+                    {'registration_id': registrations[0].id, 'criteria_scores': {'Skill': 9}},
+                    {'registration_id': registrations[1].id, 'criteria_scores': {'Skill': 4}}
+                ]
+            ))
+
+        self.hammer(submit)
+
+        self.assertEqual(sum(result['heat_completed'] for result in results), 1)
+        self.assertEqual(EventScore.objects.filter(heat=heat).count(), 2 * self.writes)
+        self.assertStandings('IT', 'TE', 'B', Decimal('9.00') * self.writes, 200)
+        self.assertStandings('MECH', 'FE', 'A', Decimal('4.00') * self.writes, 100)
+
+@override_settings(SCOREBOARD_SNAPSHOTS_ON_CHANGE=False)
+class HeatReadModelQueryTests(TestCase):
+    """The heat endpoints read a heat in the same few queries whatever its size"""
+    judges = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', email='admin@example.com', user_type='ADMIN')
+        event = create_event(cls.admin)
+        cls.solo = SubEvent.objects.create(
+            event=event, name='Solo Dance', slug='solo-dance', description='Solo dance', participation_type='SOLO'
+        )
+        cls.group = SubEvent.objects.create(
+            event=event, name='Group Dance', slug='group-dance', description='Group dance', participation_type='GROUP'
+        )
+        cls.judge_users = [
+            User.objects.create(
+                username=f'judge{i}', email=f'judge{i}@example.com', user_type='FACULTY',
+                first_name='Judge', last_name=str(i)
+            )
+            for i in range(cls.judges)
+        ]
+
+    def make_heat(self, sub_event, size):
+        heat = EventHeat.objects.create(
+            sub_event=sub_event, round_number=1, heat_number=size, status='COMPLETED'
+        )
+        for i in range(size):
+            member = User.objects.create(
+                username=f'{sub_event.slug}-{size}-{i}', email=f'{sub_event.slug}-{size}-{i}@example.com',
+                first_name='Student', last_name=str(i)
+            )
+            registration = EventRegistration.objects.create(
+                sub_event=sub_event, department='IT', year='SE', division='A', status='APPROVED',
+                registration_number=f'{sub_event.slug}-{size}-{i}', team_name=f'Team {i}'
+            )
+            registration.team_members.add(member)
+            HeatParticipant.objects.create(heat=heat, registration=registration)
+            for judge in self.judge_users:
+                EventScore.objects.create(
+                    sub_event=sub_event, event_registration=registration, heat=heat, judge=judge,
+                    criteria_scores={'technique': i}, total_score=Decimal(i)
+                )
+        return heat
+
+    def get(self, heat, action, queries):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with self.assertNumQueries(queries):
+            response = client.get(f'/api/events/heats/{heat.id}/{action}/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_heat_details_query_budget(self):
+        # Heat, roster, scores, and for solo entries their first members
+        for sub_event, queries in ((self.solo, 4), (self.group, 3)):
+            for size in (2, 12):
+                data = self.get(self.make_heat(sub_event, size), 'get_heat_details', queries)
+                self.assertEqual(len(data['participants']), size)
+                # Each entry gets its own judges' scores, and only those
+                for i, participant in enumerate(data['participants']):
+                    self.assertEqual([score['total_score'] for score in participant['scores']], [Decimal(i)] * self.judges)
+                first = data['participants'][0]
+                if sub_event == self.solo:
+                    self.assertEqual((first['participant_name'], first['team_name']), ('Student 0', None))
+                else:
+                    self.assertEqual((first['participant_name'], first['team_name']), (None, 'Team 0'))
+
+    def test_faculty_scores_query_budget(self):
+        for size in (2, 12):
+            data = self.get(self.make_heat(self.group, size), 'view_faculty_scores', 2)
+            self.assertEqual(len(data['scores_by_judge']), self.judges)
+            for scores in data['scores_by_judge'].values():
+                self.assertEqual(len(scores), size)
+
+    def test_final_results_query_budget(self):
+        for size in (2, 12):
+            data = self.get(self.make_heat(self.group, size), 'view_final_results', 2)
+            self.assertEqual(len(data['results']), size)
+            self.assertEqual(data['results'][0]['average_score'], Decimal(size - 1))
+
+
+@override_settings(SCOREBOARD_SNAPSHOTS_ON_CHANGE=False)
+class FinalizeResultsPermissionTests(TestCase):
+    """Finalizing awards AURA points, so only admins and council members may do it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', email='admin@example.com', user_type='ADMIN')
+        cls.student = User.objects.create(username='student', email='student@example.com', user_type='STUDENT')
+        cls.sub_event = SubEvent.objects.create(
+            event=create_event(cls.admin), name='Solo Song', slug='solo-song', description='Solo song'
+        )
+        cls.registration = EventRegistration.objects.create(
+            sub_event=cls.sub_event, department='IT', year='SE', division='A',
+            status='APPROVED', registration_number='SONG-1'
+        )
+        EventScore.objects.create(
+            sub_event=cls.sub_event, event_registration=cls.registration,
+            judge=cls.admin, total_score=Decimal('8.00')
+        )
+
+    def finalize(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(f'/api/events/scores/{self.sub_event.id}/finalize_results/')
+
+    def test_student_cannot_finalize(self):
+        response = self.finalize(self.student)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertIsNone(EventScore.objects.get(event_registration=self.registration).position)
+        self.assertFalse(DepartmentScore.objects.exists())
+
+    def test_admin_finalizes_and_awards_points(self):
+        response = self.finalize(self.admin)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['winners'], [self.registration.id])
+        department_score = DepartmentScore.objects.get(sub_event=self.sub_event)
+        self.assertEqual((department_score.total_score, department_score.aura_points), (Decimal('8.00'), 200))
+
+
+@override_settings(SCOREBOARD_SNAPSHOTS_ON_CHANGE=False)
+class UnconfiguredCriteriaTests(TestCase):
+    """Sub-events never given scoring criteria still take scores, summed as submitted"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', email='admin@example.com', user_type='ADMIN')
+        cls.sub_event = SubEvent.objects.create(
+            event=create_event(cls.admin), name='Poetry', slug='poetry', description='Poetry',
+            allow_negative_marking=True
+        )
+        cls.heat = EventHeat.objects.create(sub_event=cls.sub_event, round_number=1, heat_number=1)
+        cls.registration = EventRegistration.objects.create(
+            sub_event=cls.sub_event, department='IT', year='SE', division='A',
+            status='APPROVED', registration_number='POEM-1'
+        )
+        HeatParticipant.objects.create(heat=cls.heat, registration=cls.registration)
+
+    def test_every_submitted_criterion_counts_once(self):
+        totals, problems = compiled_criteria(None).score(
+            [{'Diction': 7, 'Emotion': 2.5, 'Negative Marking': 1}, {'Diction': 'high'}]
+        )
+
+        self.assertEqual(totals[0], Decimal('8.50'))
+        self.assertNotIn(0, problems)
+        self.assertEqual(problems[1], ["'Diction' must be a number"])
+
+    def test_submit_scores_without_criteria(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post('/api/events/scores/submit_scores/', {
+            'heat_id': self.heat.id,
+            'scores': [{'registration_id': self.registration.id, 'criteria_scores': {'Diction': 6, 'Emotion': 3}}]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(EventScore.objects.get(heat=self.heat).total_score, Decimal('9.00'))
+
+
+@override_settings(SCOREBOARD_SNAPSHOTS_ON_CHANGE=False)
+class RoundProgressionTests(TestCase):
+    """A completed round qualifies its heats' best (or hand-picked) entries into the next"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', email='admin@example.com', user_type='ADMIN')
+        cls.event = create_event(cls.admin)
+
+    def make_round(self, heat_sizes, total_rounds=1, qualifiers=2):
+        sub_event = SubEvent.objects.create(
+            event=self.event, name='Sprint', slug=f'sprint-{len(heat_sizes)}-{total_rounds}', description='100m',
+            participants_per_group=4, qualifiers_per_group=qualifiers, total_rounds=total_rounds
+        )
+        heats = []
+        for heat_number, size in enumerate(heat_sizes, 1):
+            heat = EventHeat.objects.create(sub_event=sub_event, stage='PRELIMS', round_number=1, heat_number=heat_number)
+            for position in range(1, size + 1):
+                registration = EventRegistration.objects.create(
+                    sub_event=sub_event, department='IT', year='SE', division='A', status='APPROVED',
+                    registration_number=f'{sub_event.slug}-{heat_number}-{position}'
+                )
+                HeatParticipant.objects.create(heat=heat, registration=registration, position=position)
+            heats.append(heat)
+        return sub_event, heats
+
+    def next_round(self, sub_event):
+        return set(HeatParticipant.objects.filter(
+            heat__sub_event=sub_event, heat__round_number=2
+        ).values_list('registration__registration_number', flat=True))
+
+    def test_single_heat_round_finishes_only_when_it_is_the_last(self):
+        last, (heat,) = self.make_round([4], total_rounds=1)
+        EventHeat.objects.filter(pk=heat.pk).update(status='COMPLETED')
+        self.assertEqual(advance_round(last, 1)['status'], 'FINISHED')
+        self.assertEqual(self.next_round(last), set())
+
+        first, (heat,) = self.make_round([4], total_rounds=2)
+        EventHeat.objects.filter(pk=heat.pk).update(status='COMPLETED')
+        progression = advance_round(first, 1)
+
+        self.assertEqual((progression['status'], progression['next_stage']), ('ADVANCED', 'FINALS'))
+        self.assertEqual(self.next_round(first), {'sprint-1-2-1-1', 'sprint-1-2-1-2'})
+        self.assertEqual(advance_round(first, 1)['status'], 'ALREADY_ADVANCED')
+
+    def test_heat_qualifiers_meet_in_a_final(self):
+        sub_event, heats = self.make_round([3, 3])
+        EventHeat.objects.filter(pk__in=[heat.pk for heat in heats]).update(status='COMPLETED')
+
+        progression = advance_round(sub_event, 1)
+
+        self.assertEqual((progression['status'], progression['next_stage']), ('ADVANCED', 'FINALS'))
+        self.assertEqual(len(progression['next_round_heats']), 1)
+        self.assertEqual(self.next_round(sub_event), {
+            'sprint-2-1-1-1', 'sprint-2-1-1-2', 'sprint-2-1-2-1', 'sprint-2-1-2-2'
+        })
+
+    def test_ties_at_the_cut_all_go_through(self):
+        sub_event, heats = self.make_round([3, 3])
+        # A dead heat for second in heat 2 puts five through, too many for one heat of four
+        HeatParticipant.objects.filter(heat=heats[1], position=3).update(position=2)
+        EventHeat.objects.filter(pk__in=[heat.pk for heat in heats]).update(status='COMPLETED')
+
+        progression = advance_round(sub_event, 1)
+
+        self.assertEqual((progression['qualified'], progression['next_stage']), (5, 'QUARTERS'))
+        self.assertEqual(len(progression['next_round_heats']), 2)
+        self.assertEqual(len(self.next_round(sub_event)), 5)
+
+    def test_hand_picked_qualifiers_are_kept(self):
+        sub_event, (first, second) = self.make_round([3, 3])
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        # The runner-up of heat 1 was disqualified, so its third goes through instead
+        results = [
+            {'registration_id': participant.registration_id, 'position': participant.position,
+             'qualified': participant.position != 2}
+            for participant in first.heatparticipant_set.all()
+        ]
+        response = client.post(f'/api/events/heats/{first.id}/update_heat_results/', {'results': results}, format='json')
+        self.assertEqual(response.data['round_progression']['status'], 'IN_PROGRESS')
+
+        # Heat 2 gives no picks and qualifies its top two by position
+        results = [
+            {'registration_id': participant.registration_id, 'position': participant.position}
+            for participant in second.heatparticipant_set.all()
+        ]
+        response = client.post(f'/api/events/heats/{second.id}/update_heat_results/', {'results': results}, format='json')
+
+        self.assertEqual(response.data['round_progression']['status'], 'ADVANCED')
+        self.assertEqual(self.next_round(sub_event), {
+            'sprint-2-1-1-1', 'sprint-2-1-1-3', 'sprint-2-1-2-1', 'sprint-2-1-2-2'
+        })
+        self.assertFalse(HeatParticipant.objects.get(heat=first, position=2).qualified_for_next)
+
+
+class StandingsSeriesTests(TestCase):
+    """The standings history narrows by exactly the filters given and carries AURA points along"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.start = timezone.now() - datetime.timedelta(hours=3)
+        for hours, year, division, score, aura_points in (
+            (4, 'SE', 'A', '5.00', 100),
+            (2, 'SE', 'B', '3.00', 50),
+            (1, 'TE', 'A', '7.00', 200),
+        ):
+            StandingsSnapshot.objects.create(
+                department='IT', year=year, division=division, score_delta=Decimal(score),
+                aura_points_delta=aura_points, recorded_at=timezone.now() - datetime.timedelta(hours=hours)
+            )
+
+    def test_year_alone_spans_its_divisions(self):
+        series = standings_series('IT', year='SE')
+
+        self.assertEqual([point[1:] for point in series], [(Decimal('5.00'), 100), (Decimal('8.00'), 150)])
+
+    def test_division_alone_spans_years_and_carries_in_from_before_start(self):
+        series = standings_series('IT', division='A', start=self.start)
+
+        self.assertEqual([point[1:] for point in series], [(Decimal('5.00'), 100), (Decimal('12.00'), 300)])
+
+
+class DoubleEliminationTests(TestCase):
+    """Double elimination routes every loser once through the losers bracket before they go out"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', email='admin@example.com', user_type='ADMIN')
+        cls.sub_event = SubEvent.objects.create(
+            event=create_event(cls.admin), name='Debate', slug='debate', description='Debate'
+        )
+        cls.entries = [
+            EventRegistration.objects.create(
+                sub_event=cls.sub_event, department='IT', year='SE', division='A',
+                status='APPROVED', registration_number=f'DEBATE-{seed}'
+            ).id
+            for seed in range(1, 5)
+        ]
+
+    def play(self, pick):
+        """Play every match whose sides are known, winners bracket first, until none is left"""
+        while True:
+            draw = EventDraw.objects.filter(
+                sub_event=self.sub_event, winner__isnull=True, team1__isnull=False, team2__isnull=False
+            ).order_by('-bracket', 'round_number', 'match_number').first()
+            if draw is None:
+                return
+            self.assertTrue(advance(draw, pick(draw)))
+
+    def grand_finals(self):
+        return list(EventDraw.objects.filter(sub_event=self.sub_event, bracket='GRAND_FINAL').order_by(
+            'round_number'
+        ).values_list('round_number', 'team1_id', 'team2_id', 'winner_id'))
+
+    def test_reset_is_dropped_when_the_unbeaten_side_wins(self):
+        generate_bracket(self.sub_event, self.entries, 'double_elimination')
+        self.play(lambda draw: draw.team1_id)
+
+        # Seed 4 beats 3 and then 2 in the losers bracket to reach the grand final
+        top, bottom = self.entries[0], self.entries[-1]
+        self.assertEqual(self.grand_finals(), [(1, top, bottom, top)])
+
+    def test_reset_is_played_when_the_losers_bracket_side_wins(self):
+        generate_bracket(self.sub_event, self.entries, 'double_elimination')
+        self.play(lambda draw: draw.team2_id if (draw.bracket, draw.round_number) == ('GRAND_FINAL', 1) else draw.team1_id)
+
+        top, bottom = self.entries[0], self.entries[-1]
+        self.assertEqual(self.grand_finals(), [(1, top, bottom, bottom), (2, top, bottom, top)])
+
+
+@override_settings(SCOREBOARD_SNAPSHOTS_ON_CHANGE=False)
+class ScoreCachingTests(TestCase):
+    """Scoreboards answer 304 until a score changes, and score edits must name the version they were based on"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', email='admin@example.com', user_type='ADMIN', is_staff=True)
+        cls.sub_event = SubEvent.objects.create(
+            event=create_event(cls.admin), name='Quiz', slug='quiz', description='Quiz'
+        )
+        cls.registration = EventRegistration.objects.create(
+            sub_event=cls.sub_event, department='IT', year='SE', division='A',
+            status='APPROVED', registration_number='QUIZ-1'
+        )
+
+    def setUp(self):
+        flights.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_unchanged_scoreboard_is_not_modified(self):
+        url = '/api/events/scoreboard/overall_standings/'
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'W/{etag}').status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            EventScore.objects.create(
+                sub_event=self.sub_event, event_registration=self.registration,
+                judge=self.admin, total_score=Decimal('7.00')
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_edit_based_on_an_old_version_conflicts(self):
+        score = EventScore.objects.create(
+            sub_event=self.sub_event, event_registration=self.registration,
+            judge=self.admin, total_score=Decimal('7.00')
+        )
+        url = f'/api/events/scores/{score.id}/update/'
+        read = version_etag(score)
+
+        response = self.client.put(url, {'remarks': 'Clear answers'}, format='json', HTTP_IF_MATCH=read)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertNotEqual(response['ETag'], read)
+
+        # A second judge still holding the first read loses
+        response = self.client.put(url, {'remarks': 'Slow answers'}, format='json', HTTP_IF_MATCH=read)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.data['current_version'], score.version + 1)
+        score.refresh_from_db()
+        self.assertEqual(score.remarks, 'Clear answers')
+
+        response = self.client.put(url, {'remarks': 'Slow answers'}, format='json', HTTP_IF_MATCH='"0.1"')
+        self.assertEqual(response.status_code, 412)
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Concurrent identical requests share one computation"""
+
+    def test_concurrent_callers_share_one_computation(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 200, {'total': len(calls)}
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            leader = executor.submit(flight.run, 'standings', '"1"', compute, 5, 30)
+            started.wait(5)
+            followers = [executor.submit(flight.run, 'standings', '"1"', compute, 5, 30) for _ in range(4)]
+            release.set()
+            results = [leader.result()] + [follower.result() for follower in followers]
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [(200, {'total': 1}, False)] * 5)
+
+    def test_stale_result_is_served_while_one_caller_refreshes(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.run('standings', '"1"', lambda: (200, 'old'), 5, 30), (200, 'old', False))
+
+        started, release = threading.Event(), threading.Event()
+
+        def refresh():
+            started.set()
+            release.wait(5)
+            return 200, 'new'
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # A new generation makes the cached result stale
+            leader = executor.submit(flight.run, 'standings', '"2"', refresh, 5, 30)
+            started.wait(5)
+            self.assertEqual(flight.run('standings', '"2"', refresh, 5, 30), (200, 'old', True))
+            release.set()
+            self.assertEqual(leader.result(), (200, 'new', False))
+        self.assertEqual(flight.run('standings', '"2"', refresh, 5, 30), (200, 'new', False))
+
+    def test_failures_are_not_cached(self):
+        flight = SingleFlight()
+        flight.run('standings', '"1"', lambda: (400, {'error': 'Bad event'}), 5, 30)
+
+        self.assertEqual(flight.run('standings', '"1"', lambda: (200, []), 5, 30), (200, [], False))
+
+
+class SeedingStrategyTests(SimpleTestCase):
+    """Each seeding strategy deals every entry into exactly one heat"""
+
+    def entries(self, groups, scores=None):
+        return [
+            {'registration_id': index, 'class_group': group, 'score': scores[index] if scores else None}
+            for index, group in enumerate(groups)
+        ]
+
+    def seed(self, strategy, entries, heat_count):
+        heats = SEEDING_STRATEGIES[strategy](entries, heat_count, random.Random(7))
+        self.assertEqual(
+            sorted(entry['registration_id'] for heat in heats for entry in heat),
+            [entry['registration_id'] for entry in entries]
+        )
+        self.assertLessEqual(max(map(len, heats)) - min(map(len, heats)), 1)
+        return heats
+
+    def test_snake_deals_seeds_out_and_back(self):
+        entries = self.entries(['IT'] * 9, scores=[90, 80, 70, 60, 50, 40, 30, 20, None])
+        heats = self.seed('snake', entries, 3)
+
+        # 1 2 3 | 6 5 4 | 7 8 9, with the unscored entry seeded last
+        self.assertEqual(
+            [[entry['registration_id'] for entry in heat] for heat in heats],
+            [[0, 5, 6], [1, 4, 7], [2, 3, 8]]
+        )
+
+    def test_spread_keeps_class_groups_apart(self):
+        groups = [('IT', 'SE', 'A')] * 5 + [('CS', 'SE', 'A')] * 3 + [('CIVIL', None, None)] * 4
+        heats = self.seed('spread', self.entries(groups), 4)
+
+        for heat in heats:
+            for group in set(groups):
+                self.assertLessEqual(sum(entry['class_group'] == group for entry in heat), -(-groups.count(group) // 4))
+
+    def test_random_is_repeatable_with_a_seed(self):
+        entries = self.entries(['IT'] * 10)
+
+        self.assertEqual(self.seed('random', entries, 3), self.seed('random', entries, 3))
+
+
+class BracketPlanTests(SimpleTestCase):
+    """plan_bracket works out byes and routing before anything is written"""
+
+    def assertWellFormed(self, plan):
+        for match in plan:
+            for slot in (0, 1):
+                # Every side of a kept match is an entry or is fed by exactly one earlier match
+                self.assertNotEqual(match.teams[slot] is not None, match.feeders[slot] is not None, match.__dict__)
+                if match.feeders[slot]:
+                    source, output = match.feeders[slot]
+                    self.assertIn(source, plan)
+                    self.assertEqual(getattr(source, output), (match, slot))
+
+    def test_byes_go_to_the_top_seeds(self):
+        plan = plan_bracket([1, 2, 3, 4, 5], 'knockout')
+        self.assertWellFormed(plan)
+
+        # Only 4 v 5 plays in the first round; 1, 2 and 3 wait in the semi-finals
+        self.assertEqual(len(plan), 4)
+        first_round = [match for match in plan if match.round_number == 1]
+        self.assertEqual([match.teams for match in first_round], [[4, 5]])
+        self.assertEqual(first_round[0].winner_to[0].teams, [1, None])
+        semis = [match for match in plan if match.stage == 'SEMIS']
+        self.assertEqual(sorted(team for match in semis for team in match.teams if team), [1, 2, 3])
+
+    def test_double_elimination_routes_every_loser_once(self):
+        for size in (2, 3, 5, 8):
+            plan = plan_bracket(list(range(1, size + 1)), 'double_elimination')
+            self.assertWellFormed(plan)
+
+            winners = [match for match in plan if match.bracket == 'WINNERS']
+            losers = [match for match in plan if match.bracket == 'LOSERS']
+            grand_final, reset = [match for match in plan if match.bracket == 'GRAND_FINAL']
+            # Everyone but the champion loses twice, and the reset may add one more match
+            self.assertEqual(len(plan), 2 * size - 1)
+            for match in winners:
+                self.assertIn(match.loser_to[0].bracket, ('LOSERS', 'GRAND_FINAL'))
+            for match in losers:
+                self.assertIsNone(match.loser_to)
+            self.assertEqual((reset.feeders[0], reset.feeders[1]), ((grand_final, 'loser_to'), (grand_final, 'winner_to')))
+
+    def test_unknown_format_and_too_few_entries_are_refused(self):
+        with self.assertRaises(ValueError):
+            plan_bracket([1, 2], 'swiss')
+        with self.assertRaises(ValueError):
+            plan_bracket([1], 'knockout')
+
+
+class SchedulePlanTests(TestCase):
+    """plan_schedule keeps people and venues in one place at a time"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', email='admin@example.com', user_type='ADMIN')
+        cls.event = create_event(cls.admin)
+        cls.student = User.objects.create(username='student', email='student@example.com', user_type='STUDENT')
+        cls.start = timezone.now().replace(microsecond=0) + datetime.timedelta(days=1)
+
+    def make_heat(self, name, venue=None, members=(), round_number=1):
+        sub_event, _ = SubEvent.objects.get_or_create(
+            event=self.event, slug=name, defaults={'name': name, 'description': name}
+        )
+        heat = EventHeat.objects.create(
+            sub_event=sub_event, round_number=round_number, heat_number=round_number, venue=venue, status='PENDING'
+        )
+        registration = EventRegistration.objects.create(
+            sub_event=sub_event, department='IT', year='SE', division='A',
+            status='APPROVED', registration_number=f'{name}-{round_number}'
+        )
+        registration.team_members.add(*members)
+        HeatParticipant.objects.create(heat=heat, registration=registration)
+        return heat
+
+    def slots(self, **options):
+        plan = plan_schedule(self.event, self.start, **options)
+        return {row['heat_id']: (row['slot'], row['venue']) for row in plan['timetable']}, plan
+
+    def test_one_person_is_never_due_in_two_heats_at_once(self):
+        song = self.make_heat('song', members=[self.student])
+        dance = self.make_heat('dance', members=[self.student])
+        quiz = self.make_heat('quiz')
+
+        slots, plan = self.slots()
+
+        self.assertEqual(plan['clashing_pairs'], 1)
+        self.assertNotEqual(slots[song.id][0], slots[dance.id][0])
+        self.assertEqual(slots[quiz.id][0], 0)
+        self.assertEqual(plan['slots'], 2)
+
+    def test_one_venue_hosts_one_heat_at_a_time(self):
+        song = self.make_heat('song', venue='Auditorium')
+        dance = self.make_heat('dance', venue='Auditorium')
+
+        slots, _ = self.slots()
+        self.assertEqual(sorted([slots[song.id], slots[dance.id]]), [(0, 'Auditorium'), (1, 'Auditorium')])
+
+        # Free to move, the two heats share the first slot in different halls
+        slots, _ = self.slots(venues=['Hall A', 'Hall B'], keep_venues=False)
+        self.assertEqual(sorted([slots[song.id], slots[dance.id]]), [(0, 'Hall A'), (0, 'Hall B')])
+
+    def test_form_encoded_false_does_not_commit(self):
+        heat = self.make_heat('song', venue='Auditorium')
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        url = f'/api/events/events/{self.event.slug}/schedule-heats/'
+
+        response = client.post(url, {'start': self.start.isoformat(), 'commit': 'false'})
+        self.assertEqual((response.status_code, response.data['committed']), (200, False))
+        heat.refresh_from_db()
+        self.assertIsNone(heat.schedule)
+
+        response = client.post(url, {'start': self.start.isoformat(), 'commit': 'true'})
+        self.assertTrue(response.data['committed'])
+        heat.refresh_from_db()
+        self.assertEqual(heat.schedule, self.start)
+
+    def test_rounds_run_in_order(self):
+        final = self.make_heat('sprint', round_number=2)
+        heat = self.make_heat('sprint', round_number=1)
+
+        slots, _ = self.slots()
+        self.assertLess(slots[heat.id][0], slots[final.id][0])
+
+
+class LiveFeedAuthenticationTests(TestCase):
+    """The live feed answers 401, never 500, to credentials it cannot accept"""
+
+    def test_token_of_an_inactive_user_is_refused(self):
+        user = User.objects.create(username='student', email='student@example.com', user_type='STUDENT')
+        token = AccessToken.for_user(user)
+        url = '/api/events/scoreboard/live/poll/'
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {token}').status_code, 200)
+
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {token}').status_code, 401)
+
+        user.delete()
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {token}').status_code, 401)
+
+
+@override_settings(SCOREBOARD_SNAPSHOTS_ON_CHANGE=False)
+class ScoreboardStandingsTests(TestCase):
+    """Scoreboards read cells from the class group scores and totals from the maintained standings"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', email='admin@example.com', user_type='ADMIN')
+        cls.event = create_event(cls.admin)
+        for name, category, department, score in (
+            ('Solo', 'CULTURAL', 'IT', '4.00'), ('Duet', 'CULTURAL', 'IT', '6.00'), ('Trio', 'SPORTS', 'MECH', '9.00')
+        ):
+            DepartmentScore(
+                sub_event=SubEvent.objects.create(
+                    event=cls.event, name=name, slug=name.lower(), description=name, category=category
+                ),
+                department=department, year='SE', division='A', total_score=Decimal(score), aura_points=100
+            ).save()
+        # Standings are what the scoreboards trust, even when they disagree with a re-aggregation
+        DepartmentTotal.objects.filter(event=cls.event, department='IT').update(total_score=Decimal('11.00'))
+
+    def get(self, action, **params):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        return client.get(f'/api/events/scoreboard/{action}/', {'event': self.event.id, **params})
+
+    def test_overall_scoreboard_ranks_from_department_totals(self):
+        response = self.get('overall_scoreboard', department='IT')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['department_rankings'], [
+            {'department': 'IT', 'total_score': 11.0, 'total_aura_points': 200, 'sub_events_participated': 2}
+        ])
+        self.assertEqual(response.data['summary']['total_score'], 11.0)
+        self.assertEqual(sorted(response.data['sub_event_scores'].values(), key=str), [{'SE_IT_A': 4.0}, {'SE_IT_A': 6.0}])
+
+    def test_overall_standings_default_to_sports(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        response = client.get('/api/events/overall-standings/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([row['name'] for row in response.data['sub_event_scores']], ['Trio'])
+        self.assertEqual(
+            [(row['class_group'], row['total_points']) for row in response.data['department_rankings']],
+            [('SE-MECH-A', 9.0)]
+        )
+
+        # Every category at once is read from the maintained standings
+        response = client.get('/api/events/overall-standings/', {'category': 'all'})
+        self.assertEqual(
+            [(row['class_group'], row['total_points']) for row in response.data['department_rankings']],
+            [('SE-IT-A', 11.0), ('SE-MECH-A', 9.0)]
+        )
+
+    def test_matrix_column_totals_come_from_department_totals(self):
+        response = self.get('matrix_scoreboard')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['column_totals'], {'SE_IT_A': 11.0, 'SE_MECH_A': 9.0})
+        self.assertEqual(
+            [row['scores'] for row in response.data['matrix_data']],
+            [{'SE_IT_A': 6.0, 'SE_MECH_A': 0}, {'SE_IT_A': 4.0, 'SE_MECH_A': 0}, {'SE_IT_A': 0, 'SE_MECH_A': 9.0}]
+        )
+
+
+@override_settings(SCOREBOARD_SNAPSHOTS_ON_CHANGE=False)
+class JudgeConsistencyTests(TestCase):
+    """A lenient judge shows up as bias, a single wild score as an outlier"""
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create(username='admin', email='admin@example.com', user_type='ADMIN')
+        cls.sub_event = SubEvent.objects.create(
+            event=create_event(admin), name='Painting', slug='painting', description='Painting'
+        )
+        cls.heat = EventHeat.objects.create(sub_event=cls.sub_event, round_number=1, heat_number=1)
+        cls.judges = [
+            User.objects.create(username=f'judge{i}', email=f'judge{i}@example.com', user_type='FACULTY')
+            for i in range(4)
+        ]
+        cls.entries = [
+            EventRegistration.objects.create(
+                sub_event=cls.sub_event, department='IT', year='SE', division='A',
+                status='APPROVED', registration_number=f'PAINT-{i}'
+            )
+            for i in range(6)
+        ]
+        for j, judge in enumerate(cls.judges):
+            for p, entry in enumerate(cls.entries):
+                score = 3 + p
+                if j == 3:
+                    score += 2  # Lenient on everyone
+                if (j, p) == (1, 2):
+                    score -= 4  # One score far from everyone else's
+                EventScore.objects.create(
+                    sub_event=cls.sub_event, event_registration=entry, heat=cls.heat, judge=judge,
+                    criteria_scores={'Skill': score}, total_score=Decimal(score)
+                )
+
+    def test_bias_and_outliers(self):
+        analysis = judge_consistency(EventScore.objects.filter(heat=self.heat))
+        judges = {row['judge_id']: row for row in analysis['judges']}
+
+        lenient = judges[self.judges[3].id]
+        self.assertGreater(lenient['bias'], 2)
+        self.assertGreater(lenient['criteria_bias']['Skill'], 2)
+        for judge in self.judges[:3]:
+            self.assertLess(judges[judge.id]['bias'], 0)
+
+        self.assertEqual(
+            [(row['judge_id'], row['registration_id']) for row in analysis['outliers']],
+            [(self.judges[1].id, self.entries[2].id)]
+        )
+        # Normalizing each judge's scores cancels the leniency, keeping the entries' order
+        self.assertEqual(
+            [row['normalized_rank'] for row in analysis['participants']], [6, 5, 4, 3, 2, 1]
+        )
+
+    def test_heat_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.judges[0])
+        response = client.get(f'/api/events/heats/{self.heat.id}/judge_consistency/', {'threshold': 100})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['analysis']['judges']), 4)
+        self.assertEqual(response.data['analysis']['outliers'], [])
+
+    def test_nothing_scored(self):
+        self.assertIsNone(judge_consistency(EventScore.objects.none()))
+
+
+@override_settings(SCOREBOARD_SNAPSHOTS_ON_CHANGE=False)
+class ScoreLogReplayTests(TestCase):
+    """Replaying the score log winds department scores and standings back to an earlier moment"""
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create(username='admin', email='admin@example.com', user_type='ADMIN')
+        cls.event = create_event(admin)
+        cls.sub_event = SubEvent.objects.create(event=cls.event, name='Relay', slug='relay', description='Relay')
+        cls.heat = EventHeat.objects.create(sub_event=cls.sub_event, round_number=1, heat_number=1)
+        cls.first, cls.second, cls.mech = [
+            EventRegistration.objects.create(
+                sub_event=cls.sub_event, department=department, year=year, division=division,
+                status='APPROVED', registration_number=f'RELAY-{i}'
+            )
+            for i, (department, year, division) in enumerate((('IT', 'SE', 'A'), ('IT', 'SE', 'A'), ('MECH', 'TE', 'B')))
+        ]
+
+    def score(self, registration, **fields):
+        return EventScore.objects.create(
+            sub_event=self.sub_event, event_registration=registration, heat=self.heat, **fields
+        )
+
+    def rows(self):
+        return (
+            sorted(DepartmentScore.objects.values_list('department', 'year', 'division', 'total_score', 'aura_points')),
+            sorted(DepartmentTotal.objects.filter(score_count__gt=0).values_list(
+                'department', 'total_score', 'total_aura_points'
+            ))
+        )
+
+    def test_replay_to_an_earlier_moment(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            # The winner's aura points beat the runner-up's higher score within the class group
+            winner = self.score(self.first, score_type='WINNER', position=1, total_score=Decimal('6.00'), aura_points=200)
+            self.score(self.second, score_type='RUNNER_UP', position=2, total_score=Decimal('9.00'), aura_points=100)
+        before = self.rows()
+        self.assertEqual(before, (
+            [('IT', 'SE', 'A', Decimal('6.00'), 200)],
+            [('IT', Decimal('6.00'), 200)]
+        ))
+
+        ScoreLogEntry.objects.update(recorded_at=F('recorded_at') - datetime.timedelta(hours=1))
+        until = timezone.now() - datetime.timedelta(minutes=30)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            winner.score_type, winner.position, winner.aura_points = 'PARTICIPANT', 3, 0
+            winner.save()
+            self.score(self.mech, score_type='WINNER', position=1, total_score=Decimal('8.00'), aura_points=200)
+        after = self.rows()
+        self.assertEqual(after, (
+            [('IT', 'SE', 'A', Decimal('9.00'), 100), ('MECH', 'TE', 'B', Decimal('8.00'), 200)],
+            [('IT', Decimal('9.00'), 100), ('MECH', Decimal('8.00'), 200)]
+        ))
+
+        result = replay(until=until)
+        self.assertEqual((result['created'], result['updated'], result['deleted']), (0, 1, 1))
+        # The bulk update leaves the totals behind until the rebuild settles them
+        self.assertEqual([row['department'] for row in result['drift']], ['IT'])
+        self.assertEqual(self.rows(), before)
+
+        # The replay is itself logged, so replaying the log up to now keeps it
+        result = replay()
+        self.assertEqual((result['created'], result['updated'], result['deleted']), (0, 0, 0))
+        self.assertEqual(self.rows(), before)
+
+        # Deriving from the logged event scores brings back the later placings
+        result = replay(derive=True)
+        self.assertEqual((result['created'], result['updated'], result['deleted']), (1, 1, 0))
+        self.assertEqual(self.rows(), after)
+
+        replay(until=until, derive=True)
+        self.assertEqual(self.rows(), before)
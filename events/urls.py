@@ -1,7 +1,7 @@
 # events/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, live
 
 router = DefaultRouter()
 router.register(r'organizations', views.OrganizationViewSet)
@@ -74,6 +74,9 @@ urlpatterns = [
     path('events/<slug:slug>/leaderboard/', 
          views.ScoreboardViewSet.as_view({'get': 'event_leaderboard'}),
          name='event-leaderboard'),
+    path('scoreboard/live/ticket/', live.stream_ticket, name='scoreboard-live-ticket'),
+    path('scoreboard/live/stream/', live.score_stream, name='scoreboard-live-stream'),
+    path('scoreboard/live/poll/', live.score_long_poll, name='scoreboard-live-poll'),
     path('overall-standings/', views.overall_standings, name='overall-standings'),
     path('export-registrations/', views.export_registrations, name='export-registrations'),
 ]
\ No newline at end of file
@@ -6,10 +6,23 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.db import models 
 from django.shortcuts import get_object_or_404
-from .models import Event, SubEvent, EventRegistration, EventScore, EventDraw , Organization , SubEventImage, EventHeat , SubmissionFile , User, SubEventFaculty, DepartmentScore, HeatParticipant, EventCriteria, DepartmentTotal
+from .models import Event, SubEvent, EventRegistration, EventScore, EventDraw , Organization , SubEventImage, EventHeat , SubmissionFile , User, SubEventFaculty, DepartmentScore, HeatParticipant, EventCriteria, DepartmentTotal, CriterionScore
+from .caching import if_match_version, score_etag, single_flight, version_etag
+from .criteria import CRITERION_GROUPINGS, compiled_criteria, criterion_stats
+from .scoreboard import build_score_pivot, class_group_registry, class_key, class_label, matrix_response
+from .scoreboard_engine import ScoreboardEngine, records
+from .ranking import rank_scores
+from .history import DOWNSAMPLERS, standings_series
+from .consistency import judge_consistency as analyze_judge_consistency
+from .judging import finalize_sub_event, judge_progress, record_heat_results, submit_heat_scores
+from .seeding import generate_heats
+from .brackets import advance, generate_bracket, order_entries
+from .scheduling import commit_schedule, plan_schedule
+from .progression import advance_round
+from .heat_view import HeatReadModel
 from .serializers import EventSerializer, SubEventSerializer, EventRegistrationSerializer, EventScoreSerializer, EventDrawSerializer , OrganizationSerializer , SubEventImageSerializer, EventHeatSerializer, SubEventFacultySerializer, HeatParticipantSerializer, EventScoreSerializer , UserSerializer, EventCriteriaSerializer
 from rest_framework import viewsets, status     
-from django.db.models import Q, Count, Avg, Sum, IntegerField, Min , Max
+from django.db.models import Q, Count, Avg, Sum, IntegerField, Max
 from decimal import Decimal
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
@@ -25,6 +38,7 @@ from rest_framework.exceptions import PermissionDenied
 from django.db.models.functions import Coalesce
 from rest_framework.exceptions import ValidationError
 from django.http import HttpResponse
+from django.utils.dateparse import parse_datetime
 import csv
 from datetime import datetime
 from django.db.models import Max
@@ -265,10 +279,34 @@ def update_score(request, sub_event_slug, score_id):
     
     serializer = EventScoreSerializer(score, data=request.data, partial=True)
     if serializer.is_valid():
-        serializer.save(updated_by=request.user)
-        return Response(serializer.data)
+        return _save_score_if_unchanged(request, score, serializer)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+def _save_score_if_unchanged(request, score, serializer):
+    """
+    Write a validated score edit in one conditional UPDATE against the version
+    the client read (see if_match_version), or answer 412 with the current
+    version when someone else wrote the score first.
+    """
+    try:
+        version = if_match_version(request, score)
+    except (TypeError, ValueError):
+        return Response({'error': 'version must be a whole number'}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        updated = version is not None and score.update_if_version(version, **serializer.validated_data)
+    if not updated:
+        current = EventScore.objects.filter(pk=score.pk).values_list('version', flat=True).first()
+        return Response(
+            {
+                'error': 'Score was changed by someone else; reload it and try again',
+                'current_version': current
+            },
+            status=status.HTTP_412_PRECONDITION_FAILED,
+            headers={'ETag': f'"{score.pk}.{current}"'}
+        )
+    return Response(EventScoreSerializer(score).data, headers={'ETag': version_etag(score)})
+
 # Organization ViewSet
 class OrganizationViewSet(viewsets.ModelViewSet):
     queryset = Organization.objects.all()
@@ -368,6 +406,46 @@ class EventViewSet(viewsets.ModelViewSet):
 
         return Response(stats)
 
+    @action(detail=True, methods=['post'], url_path='schedule-heats')
+    def schedule_heats(self, request, slug=None):
+        """
+        Propose a clash-free timetable for the event's pending heats (see
+        plan_schedule), and write it when ``commit`` is true.
+        """
+        if request.user.user_type not in ['ADMIN', 'COUNCIL']:
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+        event = self.get_object()
+        
+        try:
+            start = parse_datetime(request.data['start']) if request.data.get('start') else None
+            if request.data.get('start') and not start:
+                raise ValueError('start must be an ISO 8601 datetime')
+            if start and timezone.is_naive(start):
+                start = timezone.make_aware(start)
+            slot_minutes = int(request.data.get('slot_minutes', 60))
+            slots_per_day = request.data.get('slots_per_day')
+            slots_per_day = int(slots_per_day) if slots_per_day else None
+            if slot_minutes < 1 or (slots_per_day is not None and slots_per_day < 1):
+                raise ValueError('slot_minutes and slots_per_day must be positive')
+            venues = request.data.get('venues') or []
+            if not isinstance(venues, list):
+                raise ValueError('venues must be a list')
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        plan = plan_schedule(
+            event,
+            start or timezone.now() + timezone.timedelta(hours=1),
+            slot_minutes=slot_minutes,
+            slots_per_day=slots_per_day,
+            venues=venues,
+            keep_venues=request.data.get('keep_venues', True) not in [False, 'false', '0']
+        )
+        plan['committed'] = request.data.get('commit', False) not in [False, None, '', 'false', '0']
+        if plan['committed']:
+            commit_schedule(plan['timetable'])
+        return Response(plan)
+
     @action(detail=True, methods=['get'])
     def dashboard(self, request, pk=None):
         """Get event dashboard statistics"""
@@ -777,6 +855,41 @@ class SubEventViewSet(viewsets.ModelViewSet):
             
         return Response(EventScoreSerializer(scores, many=True).data)
     
+    @action(detail=True, methods=['get'])
+    @score_etag(sub_event_kwarg='id')
+    def criteria_stats(self, request, **kwargs):
+        """Per-criterion averages and spreads, optionally per judge, department or class"""
+        sub_event = self.get_object()
+        group_by = request.query_params.get('group_by', 'criterion')
+        if group_by not in CRITERION_GROUPINGS:
+            return Response(
+                {'error': f"group_by must be one of: {', '.join(CRITERION_GROUPINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        criterion_scores = CriterionScore.objects.filter(sub_event=sub_event)
+        filters = {
+            'heat': 'score__heat_id',
+            'stage': 'score__stage',
+            'round': 'score__round_number',
+            'department': 'score__event_registration__department',
+            'year': 'score__event_registration__year',
+            'division': 'score__event_registration__division'
+        }
+        try:
+            for param, lookup in filters.items():
+                if request.query_params.get(param):
+                    criterion_scores = criterion_scores.filter(**{lookup: request.query_params[param]})
+            stats = criterion_stats(criterion_scores, group_by)
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'sub_event_id': sub_event.id,
+            'group_by': group_by,
+            'stats': stats
+        })
+    
     @action(detail=True, methods=['post'])
     def update_stage(self, request, slug=None):
         sub_event = self.get_object()
@@ -1172,9 +1285,10 @@ class SubEventViewSet(viewsets.ModelViewSet):
 
 
     @action(detail=True, methods=['post'])
-    def promote_participants(self, request, pk=None):
+    def promote_participants(self, request, **kwargs):
         """Promote selected participants to the next round"""
-        current_heat = self.get_object()
+        # This is the sub-event's viewset, so the object is the sub-event itself
+        sub_event = self.get_object()
         participant_ids = request.data.get('participant_ids', [])
         next_stage = request.data.get('next_stage')
         next_round = request.data.get('next_round')
@@ -1184,34 +1298,44 @@ class SubEventViewSet(viewsets.ModelViewSet):
                 'error': 'No participants selected for promotion'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create a new heat for the next round
-        existing_heats = EventHeat.objects.filter(
-            sub_event=current_heat.sub_event,
-            stage=next_stage,
-            round_number=next_round
-        ).count()
-        
-        new_heat = EventHeat.objects.create(
-            sub_event=current_heat.sub_event,
-            stage=next_stage,
-            round_number=next_round,
-            heat_name=f"Heat {existing_heats + 1}",
-            schedule=request.data.get('schedule'),
-            venue=request.data.get('venue'),
-            max_participants=len(participant_ids),
-            status='PENDING'
-        )
+        registration_ids = list(HeatParticipant.objects.filter(
+            id__in=participant_ids,
+            heat__sub_event=sub_event
+        ).values_list('registration_id', flat=True).distinct())
+        if len(registration_ids) < len(set(participant_ids)):
+            return Response({
+                'error': 'Some participants were not found in this sub-event'
+            }, status=status.HTTP_404_NOT_FOUND)
         
-        # Move selected participants to the new heat
-        for participant_id in participant_ids:
-            participant = get_object_or_404(HeatParticipant, id=participant_id)
-            HeatParticipant.objects.create(
-                heat=new_heat,
-                registration=participant.registration
+        with transaction.atomic():
+            # Create a new heat for the next round
+            existing_heats = EventHeat.objects.filter(
+                sub_event=sub_event,
+                stage=next_stage,
+                round_number=next_round
+            ).count()
+            
+            new_heat = EventHeat.objects.create(
+                sub_event=sub_event,
+                stage=next_stage,
+                round_number=next_round,
+                heat_number=existing_heats + 1,
+                heat_name=f"Heat {existing_heats + 1}",
+                schedule=request.data.get('schedule'),
+                venue=request.data.get('venue'),
+                max_participants=len(registration_ids),
+                status='PENDING'
             )
+            
+            # Move selected participants to the new heat
+            HeatParticipant.objects.bulk_create([
+                HeatParticipant(heat=new_heat, registration_id=registration_id)
+                for registration_id in registration_ids
+            ])
+            HeatParticipant.objects.filter(id__in=participant_ids).update(qualified_for_next=True)
         
         return Response({
-            'message': f'{len(participant_ids)} participants promoted to {next_stage} round {next_round}',
+            'message': f'{len(registration_ids)} participants promoted to {next_stage} round {next_round}',
             'new_heat': EventHeatSerializer(new_heat).data
         })
 
@@ -1391,6 +1515,7 @@ class SubEventViewSet(viewsets.ModelViewSet):
         return Response(EventRegistrationSerializer(available, many=True).data)
     
     @action(detail=True, methods=['get'])
+    @score_etag(sub_event_kwarg='id')
     def leaderboard(self, request, **kwargs):
         """Get leaderboard for this sub-event"""
         sub_event = self.get_object()
@@ -1401,28 +1526,32 @@ class SubEventViewSet(viewsets.ModelViewSet):
             sub_event=sub_event,
             stage=stage,
             round_number=round_number
-        ).select_related('event_registration')
-        
-        # Group by registration and get highest score
-        rankings = {}
-        for score in scores:
-            reg_id = score.event_registration_id
-            if reg_id not in rankings or score.total_score > rankings[reg_id]['total_score']:
-                rankings[reg_id] = {
-                    'position': score.position,
-                    'registration_id': reg_id,
-                    'team_name': score.event_registration.team_name,
-                    'total_score': score.total_score,
-                    'qualified': score.qualified_for_next
-                }
+        )
         
-        # Sort by total score
-        sorted_rankings = sorted(
-            rankings.values(),
-            key=lambda x: x['total_score'],
-            reverse=True
+        # Rank each registration by its highest score in one query
+        ranked = rank_scores(
+            scores,
+            score=Max('total_score'),
+            qualified=Max(models.Case(
+                models.When(qualified_for_next=True, then=1),
+                default=0,
+                output_field=IntegerField()
+            ))
         )
         
+        sorted_rankings = [
+            {
+                'position': row['position'],
+                'rank': row['rank'],
+                'tied': row['tied'],
+                'registration_id': row['registration_id'],
+                'team_name': row['team_name'],
+                'total_score': row['score'],
+                'qualified': bool(row['qualified'])
+            }
+            for row in ranked
+        ]
+        
         return Response({
             'stage': stage,
             'round': round_number,
@@ -1493,6 +1622,12 @@ class EventHeatViewSet(viewsets.ModelViewSet):
         serializer = HeatParticipantSerializer(participants, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def judge_progress(self, request, pk=None):
+        """How far each judge is through scoring this heat"""
+        heat = self.get_object()
+        return Response(judge_progress(heat))
+
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         """Update heat status"""
@@ -1533,67 +1668,60 @@ class EventHeatViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def generate_heats(self, request):
-        """Generate heats for a round"""
-        sub_event_id = request.data.get('sub_event')
-        round_number = request.data.get('round_number')
-        participants_per_heat = request.data.get('participants_per_heat', 5)
-        
-        sub_event = get_object_or_404(SubEvent, id=sub_event_id)
+        """
+        Generate heats for a round. ``strategy`` picks the seeding: spread
+        (default, keeps class groups apart), snake (on previous-round scores)
+        or random. ``heat_count`` overrides the count from participants_per_heat.
+        """
+        sub_event = get_object_or_404(SubEvent, id=request.data.get('sub_event'))
+        if request.data.get('round_number') is None:
+            return Response({'error': 'round_number is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            with transaction.atomic():
-                # Get qualified participants from previous round
-                if round_number == 1:
-                    participants = EventRegistration.objects.filter(
-                        sub_event=sub_event,
-                        status='APPROVED'
-                    )
-                else:
-                    participants = EventRegistration.objects.filter(
-                        sub_event=sub_event,
-                        heatparticipant__heat__round_number=round_number-1,
-                        heatparticipant__qualified_for_next=True
-                    ).distinct()
-                
-                # Shuffle participants
-                participants = list(participants)
-                random.shuffle(participants)
-                
-                # Create heats
-                total_participants = len(participants)
-                num_heats = (total_participants + participants_per_heat - 1) // participants_per_heat
-                
-                heats = []
-                for heat_number in range(1, num_heats + 1):
-                    heat = EventHeat.objects.create(
-                        sub_event=sub_event,
-                        stage=sub_event.current_stage,
-                        round_number=round_number,
-                        heat_number=heat_number,
-                        max_participants=participants_per_heat,
-                        schedule=timezone.now() + timezone.timedelta(hours=1)  # Default schedule
-                    )
-                    heats.append(heat)
-                
-                # Assign participants to heats
-                for idx, participant in enumerate(participants):
-                    heat_idx = idx // participants_per_heat
-                    if heat_idx < len(heats):
-                        HeatParticipant.objects.create(
-                            heat=heats[heat_idx],
-                            registration=participant
-                        )
-                
-                return Response({
-                    'message': f'Generated {len(heats)} heats',
-                    'heats': EventHeatSerializer(heats, many=True).data
-                })
-                
-        except Exception as e:
+            heat_count = request.data.get('heat_count')
+            heats = generate_heats(
+                sub_event,
+                int(request.data.get('round_number')),
+                int(request.data.get('participants_per_heat', 5)),
+                strategy=request.data.get('strategy', 'spread'),
+                heat_count=int(heat_count) if heat_count is not None else None,
+                stage=request.data.get('stage'),
+                seed=request.data.get('seed')
+            )
+        except (TypeError, ValueError) as e:
             return Response(
                 {'error': str(e)}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+        
+        # Built from what was just written rather than re-read heat by heat
+        return Response({
+            'message': f'Generated {len(heats)} heats',
+            'heats': [
+                {
+                    'id': heat.id,
+                    'sub_event': sub_event.id,
+                    'stage': heat.stage,
+                    'round_number': heat.round_number,
+                    'heat_number': heat.heat_number,
+                    'heat_name': heat.heat_name,
+                    'max_participants': heat.max_participants,
+                    'schedule': heat.schedule,
+                    'status': heat.status,
+                    'participants': [
+                        {
+                            'registration': entry['registration_id'],
+                            'department': entry['department'],
+                            'year': entry['year'],
+                            'division': entry['division'],
+                            'seed_score': entry['score']
+                        }
+                        for entry in heat.entries
+                    ]
+                }
+                for heat in heats
+            ]
+        })
     
     @action(detail=True, methods=['post'])
     def update_heat_results(self, request, pk=None):
@@ -1618,17 +1746,13 @@ class EventHeatViewSet(viewsets.ModelViewSet):
                 heat.status = 'COMPLETED'
                 heat.save()
                 
-                # Check if all heats in round are completed
-                all_completed = EventHeat.objects.filter(
-                    sub_event=heat.sub_event,
-                    round_number=heat.round_number
-                ).exclude(status='COMPLETED').count() == 0
-                
-                if all_completed:
-                    # Trigger next round generation or finalize results
-                    pass
+                # Once all heats in the round are completed, qualify and draw the next round
+                progression = advance_round(heat.sub_event, heat.round_number)
                 
-                return Response({'message': 'Heat results updated successfully'})
+                return Response({
+                    'message': 'Heat results updated successfully',
+                    'round_progression': progression
+                })
                 
         except Exception as e:
             return Response(
@@ -1641,77 +1765,8 @@ class EventHeatViewSet(viewsets.ModelViewSet):
     def get_heat_details(self, request, pk=None):
         """Get specific heat details with participants"""
         try:
-            heat = get_object_or_404(EventHeat, id=pk)
-            
-            participants = HeatParticipant.objects.filter(heat=heat).select_related(
-                'registration',
-                'registration__sub_event',
-                'registration__team_leader'  # Add team_leader for solo events
-            ).prefetch_related(
-                'registration__team_members'  # Add team members for team events
-            )
-            
-            data = {
-                'heat_id': heat.id,
-                'stage': heat.stage,
-                'round_number': heat.round_number,
-                'heat_number': heat.heat_number,
-                'schedule': heat.schedule,
-                'venue': heat.venue,
-                'status': heat.status,
-                'participants': []
-            }
-            
-            for p in participants:
-                registration = p.registration
-                participant_data = {
-                    'registration_id': registration.id,
-                    'department': registration.department,
-                    'year': registration.year,
-                    'division': registration.division,
-                    'position': p.position,
-                    'scores': []
-                }
-                
-                # Handle name based on participation type
-                if registration.sub_event.participation_type == 'SOLO':
-                    # For solo events, use team leader's name
-                    if registration.team_members.first():
-                        participant_data['participant_name'] = (
-                            f"{registration.team_members.first().first_name} {registration.team_members.first().last_name}".strip()
-                        )
-                        participant_data['team_name'] = None
-                else:
-                    # For team events, use team name
-                    participant_data['team_name'] = registration.team_name
-                    participant_data['participant_name'] = None
-                
-                data['participants'].append(participant_data)
-            
-            # Add scores if heat is completed or in progress
-            if heat.status in ['IN_PROGRESS', 'COMPLETED']:
-                scores = EventScore.objects.filter(heat=heat).select_related('judge')
-                for score in scores:
-                    participant = next(
-                        (p for p in data['participants'] 
-                         if p['registration_id'] == score.event_registration_id),
-                        None
-                    )
-                    if participant:
-                        # Skip empty scores
-                        if not score.criteria_scores and score.total_score is None:
-                            continue
-                        
-                        participant['scores'].append({
-                            'judge_id': score.judge.id,
-                            'judge_name': f"{score.judge.first_name} {score.judge.last_name}".strip(),
-                            'criteria_scores': score.criteria_scores,
-                            'total_score': score.total_score,
-                            'aura_points': score.aura_points,
-                            # 'submitted_at': score.created_at
-                        })
-            
-            return Response(data)
+            heat = get_object_or_404(EventHeat.objects.select_related('sub_event'), id=pk)
+            return Response(HeatReadModel(heat).details())
         except Exception as e:
             return Response(
                 {'error': str(e)}, 
@@ -1726,123 +1781,50 @@ class EventHeatViewSet(viewsets.ModelViewSet):
     def view_faculty_scores(self, request, pk=None):
         """View scores submitted by faculty for a heat"""
         try:
-            heat = get_object_or_404(EventHeat, id=pk)
-            scores = EventScore.objects.filter(heat=heat).select_related(
-                'judge', 
-                'event_registration',
-                'event_registration__sub_event'
-            )
-            
-            # Group scores by judge
-            scores_by_judge = {}
-            for score in scores:
-                judge_name = f"{score.judge.first_name} {score.judge.last_name}".strip()
-                if judge_name not in scores_by_judge:
-                    scores_by_judge[judge_name] = []
-                
-                registration = score.event_registration
-                
-                # Determine participant name based on event type
-                if registration.sub_event.participation_type == 'SOLO':
-                    if registration.team_leader:
-                        participant_name = f"{registration.team_leader.first_name} {registration.team_leader.last_name}".strip()
-                    else:
-                        participant_name = "Unknown Participant"
-                else:
-                    participant_name = registration.team_name or "Unknown Team"
-                
-                # Skip empty scores
-                if not score.criteria_scores and score.total_score is None:
-                    continue
-                    
-                scores_by_judge[judge_name].append({
-                    'participant_name': participant_name,
-                    'registration_id': registration.id,
-                    'criteria_scores': score.criteria_scores,
-                    'total_score': score.total_score,
-                    'aura_points': score.aura_points,
-                    # 'submitted_at': score.created_at,
-                    'department': registration.department,
-                    'year': registration.year,
-                    'division': registration.division
-                })
-            
-            return Response({
-                'heat_id': heat.id,
-                'sub_event': heat.sub_event.name,
-                'stage': heat.stage,
-                'round_number': heat.round_number,
-                'heat_number': heat.heat_number,
-                'status': heat.status,
-                'scores_by_judge': scores_by_judge
-            })
+            heat = get_object_or_404(EventHeat.objects.select_related('sub_event'), id=pk)
+            return Response(HeatReadModel(heat).scores_by_judge())
         except Exception as e:
             return Response(
                 {'error': str(e)}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+    
+    @action(detail=True, methods=['get'])
+    def judge_consistency(self, request, pk=None):
+        """Judge bias, agreement and outlying scores for a heat, or with ?scope=sub_event its whole sub-event"""
+        heat = get_object_or_404(EventHeat.objects.select_related('sub_event'), id=pk)
+        scope = request.query_params.get('scope', 'heat')
+        if scope not in ('heat', 'sub_event'):
+            return Response({'error': 'scope must be heat or sub_event'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            threshold = float(request.query_params.get('threshold', 2.5))
+        except ValueError:
+            return Response({'error': 'threshold must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        scores = EventScore.objects.filter(heat=heat) if scope == 'heat' else EventScore.objects.filter(sub_event=heat.sub_event)
+        analysis = analyze_judge_consistency(scores, threshold)
+        
+        return Response({
+            'heat_id': heat.id,
+            'sub_event_id': heat.sub_event_id,
+            'scope': scope,
+            'threshold': threshold,
+            'analysis': analysis
+        })
+
     # 4. View Final Results
     @action(detail=True, methods=['get'])
     def view_final_results(self, request, pk=None):
         """View final results for a heat"""
         try:
-            heat = get_object_or_404(EventHeat, id=pk)
+            heat = get_object_or_404(EventHeat.objects.select_related('sub_event'), id=pk)
             
             if heat.status != 'COMPLETED':
                 return Response({
                     'error': 'Heat is not completed yet'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Get average scores and positions
-            final_scores = EventScore.objects.filter(
-                heat=heat
-            ).values(
-                'event_registration'
-            ).annotate(
-                avg_score=Avg('total_score'),
-                aura_points=Max('aura_points'),  # Get the aura points directly from scores
-                final_position=Min('position')  # All scores for same registration should have same position
-            ).order_by('final_position', '-avg_score')
-            
-            results = []
-            for score in final_scores:
-                registration = EventRegistration.objects.select_related(
-                    'team_leader',
-                    'sub_event'
-                ).get(id=score['event_registration'])
-                
-                # Determine participant name based on event type
-                if registration.sub_event.participation_type == 'SOLO':
-                    if registration.team_members.first():
-                        participant_name = f"{registration.team_members.first().first_name} {registration.team_members.first().last_name}".strip()
-                    else:
-                        participant_name = "Unknown Participant"
-                    team_name = None
-                else:
-                    team_name = registration.team_name
-                    participant_name = None
-                
-                results.append({
-                    'position': score['final_position'],
-                    'registration_id': registration.id,
-                    'participant_name': participant_name,
-                    'team_name': team_name,
-                    'department': registration.department,
-                    'year': registration.year,
-                    'division': registration.division,
-                    'average_score': round(score['avg_score'], 2) if score['avg_score'] else None,
-                    'aura_points': score['aura_points'] or 0  # Use aura points from aggregation
-                })
-            
-            return Response({
-                'heat_id': heat.id,
-                'sub_event': heat.sub_event.name,
-                'stage': heat.stage,
-                'round_number': heat.round_number,
-                'heat_number': heat.heat_number,
-                'status': heat.status,
-                'results': results
-            })
+            return Response(HeatReadModel(heat).final_results())
         except Exception as e:
             return Response(
                 {'error': str(e)}, 
@@ -2355,27 +2337,42 @@ class EventDrawViewSet(viewsets.ModelViewSet):
         draw = self.get_object()
         winner_id = request.data.get('winner_id')
         
-        if winner_id not in [draw.team1.id, draw.team2.id]:
+        if draw.team1_id is None or draw.team2_id is None:
+            return Response(
+                {'error': 'Both teams must be known before a winner is declared'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if winner_id not in [draw.team1_id, draw.team2_id]:
             return Response(
                 {'error': 'Invalid winner'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        winner = EventRegistration.objects.get(id=winner_id)
-        draw.winner = winner
-        draw.save()
+        if not advance(draw, winner_id):
+            return Response(
+                {'error': 'Winner already declared'},
+                status=status.HTTP_409_CONFLICT
+            )
         
         # Update winner's stage if not in finals
-        if draw.stage != 'FINALS':
+        if draw.next_match_id:
+            EventRegistration.objects.filter(id=winner_id).update(
+                current_stage=EventDraw.objects.filter(id=draw.next_match_id).values('stage')
+            )
+        elif draw.match_number is None and draw.stage != 'FINALS':
+            # Draws from before brackets have no next match to follow
             next_stages = {
                 'PRELIMS': 'QUARTERS',
                 'QUARTERS': 'SEMIS',
                 'SEMIS': 'FINALS'
             }
-            winner.current_stage = next_stages[draw.stage]
-            winner.save()
+            EventRegistration.objects.filter(id=winner_id).update(current_stage=next_stages[draw.stage])
         
-        return Response({'message': 'Winner declared successfully'})
+        return Response({
+            'message': 'Winner declared successfully',
+            'next_match': draw.next_match_id,
+            'loser_next_match': draw.loser_next_match_id
+        })
 
 class EventScoreViewSet(viewsets.ModelViewSet):
     queryset = EventScore.objects.all()
@@ -2412,17 +2409,21 @@ class EventScoreViewSet(viewsets.ModelViewSet):
             'heat'
         )
 
+    def retrieve(self, request, *args, **kwargs):
+        score = self.get_object()
+        return Response(self.get_serializer(score).data, headers={'ETag': version_etag(score)})
+
     def update(self, request, *args, **kwargs):
         score = self.get_object()
         
         # Update only allowed fields
-        score.total_score = request.data.get('total_score', score.total_score)
-        score.criteria_scores = request.data.get('criteria_scores', score.criteria_scores)
-        score.remarks = request.data.get('remarks', score.remarks)
-        score.qualified_for_next = request.data.get('qualified_for_next', score.qualified_for_next)
-        score.save()
-        
-        return Response(EventScoreSerializer(score).data)
+        allowed = ('total_score', 'criteria_scores', 'remarks', 'qualified_for_next')
+        serializer = self.get_serializer(
+            score, data={field: request.data[field] for field in allowed if field in request.data}, partial=True
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return _save_score_if_unchanged(request, score, serializer)
     
     @action(detail=False, methods=['get'])
     def heat_participants(self, request):
@@ -2447,42 +2448,38 @@ class EventScoreViewSet(viewsets.ModelViewSet):
         
         try:
             # Get the heat and verify it exists
-            heat = get_object_or_404(EventHeat, id=heat_id)
+            heat = get_object_or_404(EventHeat.objects.select_related('sub_event__scoring_criteria'), id=heat_id)
+            sub_event = heat.sub_event
+            roster = set(HeatParticipant.objects.filter(heat=heat).values_list('registration_id', flat=True))
+            
+            # Weighted totals for the whole batch from the compiled criteria
+            totals, problems = compiled_criteria(sub_event.scoring_criteria).score(
+                [score_data.get('criteria_scores', {}) for score_data in scores_data],
+                sub_event.allow_negative_marking
+            )
             
             with transaction.atomic():
                 created_scores = []
-                for score_data in scores_data:
+                for row, score_data in enumerate(scores_data):
                     registration_id = score_data.get('registration_id')
-                    criteria_scores = score_data.get('criteria_scores', {})
-                    remarks = score_data.get('remarks', '')
                     
                     # Verify the registration exists in this heat
-                    if not HeatParticipant.objects.filter(
-                        heat=heat,
-                        registration_id=registration_id
-                    ).exists():
+                    if registration_id not in roster:
                         raise ValidationError(f"Registration {registration_id} not found in heat {heat_id}")
-                    
-                    # Calculate total score based on criteria weights
-                    total_score = 0
-                    for criterion, score in criteria_scores.items():
-                        # You might want to get weights from sub_event criteria configuration
-                        total_score += score  # For now, simple average
-                    
-                    total_score = total_score / len(criteria_scores) if criteria_scores else 0
+                    if row in problems:
+                        raise ValidationError(f"Registration {registration_id}: {problems[row][0]}")
                     
                     # Create score
                     score = EventScore.objects.create(
-                        sub_event=heat.sub_event,
+                        sub_event=sub_event,
                         event_registration_id=registration_id,
                         heat=heat,
                         judge=request.user,
-                        criteria_scores=criteria_scores,
-                        total_score=total_score,
-                        remarks=remarks
+                        criteria_scores=score_data.get('criteria_scores', {}),
+                        total_score=totals[row],
+                        remarks=score_data.get('remarks', '')
                     )
                     created_scores.append(score)
-                
                 return Response({
                     'message': 'Scores submitted successfully',
                     'heat_id': heat_id,
@@ -2571,6 +2568,7 @@ class EventScoreViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @score_etag(sub_event_param='sub_event')
     def event_leaderboard(self, request):
         """
         Get leaderboard for a specific sub-event
@@ -2623,114 +2621,34 @@ class EventScoreViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def record_sports_results(self, request):
-        """Record results for sports events"""
+        """Record results for sports events, for one heat or several heats at once"""
         heat_id = request.data.get('heat')
-        results = request.data.get('results', [])
+        # Either {'heat', 'results'} or {'heats': [{'heat', 'results'}, ...]}
+        heat_results = request.data.get('heats') or [
+            {'heat': heat_id, 'results': request.data.get('results', [])}
+        ]
         
         try:
-            heat = get_object_or_404(EventHeat, id=heat_id)
-            sub_event = heat.sub_event
-            
-            # First, validate that all registration_ids exist in the heat
-            heat_participants = HeatParticipant.objects.filter(heat=heat).values_list('registration_id', flat=True)
-            
-            for result in results:
-                registration_id = result.get('registration_id')
-                if registration_id not in heat_participants:
-                    return Response(
-                        {
-                            'error': f'Registration ID {registration_id} not found in heat {heat_id}. '
-                            f'Valid registrations are: {list(heat_participants)}'
-                        }, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
+            recorded = record_heat_results(heat_results, request.user)
             
-            with transaction.atomic():
-                for result in results:
-                    registration_id = result['registration_id']
-                    position = result.get('position')
-                    
-                    # Get the actual registration from HeatParticipant
-                    heat_participant = HeatParticipant.objects.get(
-                        heat=heat,
-                        registration_id=registration_id
-                    )
-                    
-                    # Get the event registration
-                    registration = EventRegistration.objects.get(id=registration_id)
-                    
-                    # Calculate AURA points
-                    if(heat.stage == 'FINALS'):
-                        aura_points = 0
-                        if position == 1:  # Winner
-                            aura_points = sub_event.aura_points_winner
-                        elif position == 2:  # Runner-up
-                            aura_points = sub_event.aura_points_runner
-                    
-                    # Add match points if applicable
-                    if (sub_event.match_points_enabled and 
-                        position == 1 and 
-                        heat.stage != 'FINALS'):
-                        aura_points += 20
-                    
-                    # Create EventScore
-                    event_score = EventScore.objects.create(
-                        sub_event=sub_event,
-                        event_registration_id=heat_participant.registration_id,
-                        heat=heat,
-                        position=position,
-                        aura_points=aura_points,
-                        judge=request.user
-                    )
-                    
-                    # Update or create DepartmentScore
-                    dept_score, created = DepartmentScore.objects.get_or_create(
-                        department=registration.department,
-                        year=registration.year,
-                        division=registration.division,
-                        sub_event=sub_event,
-                        defaults={
-                            'total_score': 0,
-                            'aura_points': 0
-                        }
-                    )
-                    
-                    # Update department score
-                    if position in [1, 2]:  # Only update for winners and runners-up
-                        dept_score.aura_points = aura_points
-                        # For sports events, total_score can be based on position
-                        dept_score.total_score = 10 - position  # 1st gets 9, 2nd gets 8
-                        dept_score.save()
-                    
-                    # Update heat participant position
-                    heat_participant.position = position
-                    heat_participant.save()
-                
-                # Update heat status
-                heat.status = 'COMPLETED'
-                heat.save()
-                
-                return Response({
-                    'message': 'Sports results recorded successfully',
-                    'heat_id': heat_id,
-                    'results_recorded': len(results)
-                })
+            response_data = {
+                'message': 'Sports results recorded successfully',
+                'results_recorded': sum(heat['results_recorded'] for heat in recorded)
+            }
+            if 'heats' in request.data:
+                response_data['heats'] = recorded
+            else:
+                response_data['heat_id'] = heat_id
+                response_data['round_progression'] = recorded[0]['round_progression']
+            return Response(response_data)
                 
-        except EventHeat.DoesNotExist:
+        except EventHeat.DoesNotExist as e:
             return Response(
-                {'error': f'Heat {heat_id} not found'}, 
+                {'error': str(e)}, 
                 status=status.HTTP_404_NOT_FOUND
             )
-        except HeatParticipant.DoesNotExist:
-            return Response(
-                {'error': 'Invalid registration ID for this heat'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        except EventRegistration.DoesNotExist:
-            return Response(
-                {'error': 'Event registration not found'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {'error': str(e)}, 
@@ -2744,181 +2662,26 @@ class EventScoreViewSet(viewsets.ModelViewSet):
         scores_data = request.data.get('scores', [])
         
         try:
-            heat = get_object_or_404(EventHeat, id=heat_id)
-            sub_event = heat.sub_event
-            criteria = sub_event.get_scoring_criteria()
+            heat = get_object_or_404(EventHeat.objects.select_related('sub_event__scoring_criteria'), id=heat_id)
+            result = submit_heat_scores(heat, request.user, scores_data)
             
-            # Validate participants are in the heat
-            heat_participants = HeatParticipant.objects.filter(heat=heat).values_list('registration_id', flat=True)
-            
-            # Calculate expected total scores
-            total_judges = heat.sub_event.faculty_judges.count()
-            total_participants = heat_participants.count()
-            expected_total_scores = total_judges * total_participants
-            
-            # Get current scores submitted
-            current_scores = EventScore.objects.filter(
-                heat=heat
-            ).values('judge', 'event_registration').distinct().count()
-            
-            # Check if this judge has already submitted scores
-           # Get scores submitted by current judge
-            judge_scored_participants = EventScore.objects.filter(
-                heat=heat,
-                judge=request.user
-            ).values_list('event_registration_id', flat=True)
+            response_data = {
+                'message': 'Cultural scores submitted successfully',
+                'heat_id': heat_id,
+                'scores_submitted': result['scores_submitted'],
+                'expected_total': result['expected_total'],
+                'remaining_scores': result['remaining_scores'],
+                'heat_completed': result['heat_completed'],
+                'your_scores_submitted': len(result['created'])
+            }
+            if result['heat_completed']:
+                response_data['final_results'] = result['final_results']
+                response_data['round_progression'] = result['round_progression']
             
-            # Validate no duplicate scoring for same participant
-            for participant_score in scores_data:
-                registration_id = participant_score['registration_id']
-                if registration_id in judge_scored_participants:
-                    return Response({
-                        'error': f'You have already submitted scores for participant {registration_id}',
-                        'scores_submitted': current_scores,
-                        'expected_total': expected_total_scores,
-                        'remaining_scores': expected_total_scores - current_scores,
-                        'your_scored_participants': list(judge_scored_participants)
-                    }, status=status.HTTP_400_BAD_REQUEST)
+            return Response(response_data, status=status.HTTP_201_CREATED)
         
-            
-            with transaction.atomic():
-                created_scores = []
-                for participant_score in scores_data:
-                    registration_id = participant_score['registration_id']
-                    if registration_id not in heat_participants:
-                        return Response({
-                            'error': f'Registration ID {registration_id} not found in heat {heat_id}',
-                            'valid_registrations': list(heat_participants)
-                        }, status=status.HTTP_400_BAD_REQUEST)
-                    
-                    criteria_scores = participant_score['criteria_scores']
-                    
-                    # Calculate total score based on criteria weights
-                    total_score = 0
-                    for criterion, score in criteria_scores.items():
-                        if criterion == 'Negative Marking':
-                            continue
-                        weight = criteria[criterion]['weight']
-                        max_score = criteria[criterion].get('max_score', 150)
-                        # weighted_score = (score * weight * max_score)
-                        total_score += score
-                    
-                    # Apply negative marking if any
-                    if sub_event.allow_negative_marking:
-                        negative_marks = criteria_scores.get('Negative Marking', 0)
-                        total_score -= negative_marks
-                    
-                    # Create score
-                    score = EventScore.objects.create(
-                        sub_event=sub_event,
-                        event_registration_id=registration_id,
-                        heat=heat,
-                        criteria_scores=criteria_scores,
-                        total_score=total_score,
-                        judge=request.user
-                    )
-                    created_scores.append(score)
-                
-                # Update counts after creating new scores
-                current_scores = EventScore.objects.filter(
-                    heat=heat
-                ).values('judge', 'event_registration').distinct().count()
-                
-                # Check if all scores are submitted
-                all_scores_submitted = current_scores >= expected_total_scores
-                
-                response_data = {
-                    'message': 'Cultural scores submitted successfully',
-                    'heat_id': heat_id,
-                    'scores_submitted': current_scores,
-                    'expected_total': expected_total_scores,
-                    'remaining_scores': expected_total_scores - current_scores,
-                    'heat_completed': False,
-                    'your_scores_submitted': len(created_scores)
-                }
-                
-                # If all scores are submitted, calculate final results
-                if all_scores_submitted:
-                    final_scores = EventScore.objects.filter(
-                        heat=heat
-                    ).values(
-                        'event_registration'
-                    ).annotate(
-                        total_final_score=Sum('total_score')
-                    ).order_by('-total_final_score')
-                    
-                    if final_scores:
-                        # Get winner and runner-up details
-                        winner_data = final_scores[0]
-                        runner_up_data = final_scores[1] if len(final_scores) > 1 else None
-                        
-                        # Update positions and AURA points
-                        for score in final_scores:
-                            registration_id = score['event_registration']
-                            registration = EventRegistration.objects.get(id=registration_id)
-                            
-                            # Determine position and AURA points
-                            if score == winner_data:
-                                position = 1
-                                aura_points = sub_event.aura_points_winner
-                            elif score == runner_up_data:
-                                position = 2
-                                aura_points = sub_event.aura_points_runner
-                            else:
-                                position = None
-                                aura_points = 0
-                            
-                            # Update scores and positions
-                            if position:
-                                EventScore.objects.filter(
-                                    heat=heat,
-                                    event_registration_id=registration_id
-                                ).update(position=position, aura_points=aura_points)
-                                
-                                HeatParticipant.objects.filter(
-                                    heat=heat,
-                                    registration_id=registration_id
-                                ).update(position=position)
-                                
-                                # Update department score
-                                dept_score, _ = DepartmentScore.objects.get_or_create(
-                                    department=registration.department,
-                                    year=registration.year,
-                                    division=registration.division,
-                                    sub_event=sub_event,
-                                    defaults={
-                                        'total_score': score['total_final_score'],
-                                        'aura_points': aura_points
-                                    }
-                                )
-                                if not _:
-                                    dept_score.total_score = score['total_final_score']
-                                    dept_score.aura_points = aura_points
-                                    dept_score.save()
-                        
-                        # Update heat status
-                        heat.status = 'COMPLETED'
-                        heat.save()
-                        
-                        # Add final results to response
-                        response_data.update({
-                            'heat_completed': True,
-                            'final_results': {
-                                'winner': {
-                                    'registration_id': winner_data['event_registration'],
-                                    'total_score': winner_data['total_final_score'],
-                                    'aura_points': sub_event.aura_points_winner
-                                },
-                                'runner_up': {
-                                    'registration_id': runner_up_data['event_registration'],
-                                    'total_score': runner_up_data['total_final_score'],
-                                    'aura_points': sub_event.aura_points_runner
-                                } if runner_up_data else None
-                            }
-                        })
-                
-                return Response(response_data, status=status.HTTP_201_CREATED)
-                
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'error': str(e),
@@ -2928,65 +2691,20 @@ class EventScoreViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def finalize_results(self, request, pk=None):
         """Finalize results and assign AURA points"""
-        sub_event = self.get_object()
+        if not request.user.user_type in ['ADMIN', 'COUNCIL']:
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+        
+        # pk is the sub-event being finalized, not a score
+        sub_event = get_object_or_404(SubEvent, id=pk)
         
         try:
-            with transaction.atomic():
-                # Get all scores for this sub_event
-                scores = EventScore.objects.filter(
-                    sub_event=sub_event
-                ).values('event_registration').annotate(
-                    avg_score=Avg('total_score')
-                ).order_by('-avg_score')
-                
-                # Handle joint winners
-                winners = []
-                runners_up = []
-                top_score = scores[0]['avg_score'] if scores else 0
-                
-                for score in scores:
-                    if score['avg_score'] == top_score:
-                        winners.append(score['event_registration'])
-                    elif not runners_up and score['avg_score'] < top_score:
-                        runners_up.append(score['event_registration'])
-                    elif runners_up and score['avg_score'] == scores[len(winners)]['avg_score']:
-                        runners_up.append(score['event_registration'])
-                    else:
-                        break
-                
-                # Assign AURA points
-                winner_points = sub_event.aura_points_winner
-                runner_points = sub_event.aura_points_runner
-                
-                # Adjust points for joint winners
-                if len(winners) > 1 and sub_event.allow_joint_winners:
-                    winner_points = (winner_points + runner_points) // 2
-                
-                # Update scores with final positions and AURA points
-                for reg_id in winners:
-                    EventScore.objects.filter(
-                        sub_event=sub_event,
-                        event_registration_id=reg_id
-                    ).update(
-                        position=1,
-                        aura_points=winner_points
-                    )
-                
-                for reg_id in runners_up:
-                    EventScore.objects.filter(
-                        sub_event=sub_event,
-                        event_registration_id=reg_id
-                    ).update(
-                        position=2,
-                        aura_points=runner_points
-                    )
-                
-                return Response({
-                    'message': 'Results finalized successfully',
-                    'winners': winners,
-                    'runners_up': runners_up
-                })
-                
+            awards = finalize_sub_event(sub_event)
+            return Response({
+                'message': 'Results finalized successfully',
+                'winners': [reg_id for reg_id, (position, _) in awards.items() if position == 1],
+                'runners_up': [reg_id for reg_id, (position, _) in awards.items() if position == 2]
+            })
+        
         except Exception as e:
             return Response(
                 {'error': str(e)}, 
@@ -2996,6 +2714,7 @@ class EventScoreViewSet(viewsets.ModelViewSet):
 # Additional API Views
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@single_flight()
 def event_statistics(request, event_slug):
     event = get_object_or_404(Event, slug=event_slug)
     sub_events = event.sub_events.all()
@@ -3059,38 +2778,49 @@ def generate_draws(request, sub_event_slug):
         status='APPROVED'
     )
     
-    # Generate random draws
-    import random
-    registrations_list = list(registrations)
-    random.shuffle(registrations_list)
+    # Listed seeds come first; everyone else is drawn at random behind them
+    entries = order_entries(registrations, request.data.get('seeds') or [], random.Random(request.data.get('seed')))
     
-    draws = []
-    for i in range(0, len(registrations_list), 2):
-        if i + 1 < len(registrations_list):
-            draw = EventDraw.objects.create(
-                sub_event=sub_event,
+    try:
+        with transaction.atomic():
+            if request.data.get('replace'):
+                EventDraw.objects.filter(sub_event=sub_event).delete()
+            elif EventDraw.objects.filter(sub_event=sub_event).exists():
+                return Response(
+                    {'error': 'Draws already exist for this sub-event; pass replace to redraw'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            draws = generate_bracket(
+                sub_event,
+                entries,
+                bracket_format=request.data.get('format', 'knockout'),
                 stage=stage,
-                team1=registrations_list[i],
-                team2=registrations_list[i + 1],
                 schedule=request.data.get('schedule'),
                 venue=request.data.get('venue')
             )
-            draws.append(draw)
-        else:
-            # Handle bye
-            EventScore.objects.create(
-                sub_event=sub_event,
-                registration=registrations_list[i],
-                stage=stage,
-                is_bye=True,
-                judge=request.user,
-                updated_by=request.user,
-                criteria_scores={},
-                total_score=0
-            )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    serializer = EventDrawSerializer(draws, many=True)
-    return Response(serializer.data)
+    # Only ids are returned; nesting registration details would cost queries per match
+    return Response({
+        'message': f'Generated {len(draws)} matches',
+        'draws': [
+            {
+                'id': draw.id,
+                'bracket': draw.bracket,
+                'stage': draw.stage,
+                'round_number': draw.round_number,
+                'match_number': draw.match_number,
+                'team1': draw.team1_id,
+                'team2': draw.team2_id,
+                'next_match': draw.next_match_id,
+                'next_slot': draw.next_slot,
+                'loser_next_match': draw.loser_next_match_id,
+                'loser_next_slot': draw.loser_next_slot
+            }
+            for draw in draws
+        ]
+    })
 
 class ScoreboardViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
@@ -3175,109 +2905,78 @@ class ScoreboardViewSet(viewsets.ViewSet):
         } for score in recent_scores])
         
     @action(detail=False, methods=['get'])
+    @score_etag()
+    @single_flight()
     def complete_scoreboard(self, request):
         """Get complete scoreboard with all details"""
         try:
             # Get all scores
-            scores = DepartmentScore.objects.all().select_related('sub_event', 'sub_event__event')
+            scores = DepartmentScore.objects.all()
+            totals = DepartmentTotal.objects.filter(score_count__gt=0)
             
             # Get summary statistics
             summary = {
-                'total_departments': scores.values('department').distinct().count(),
+                'total_departments': totals.values('department').distinct().count(),
                 'total_sub_events': scores.values('sub_event').distinct().count(),
-                'total_points_awarded': scores.aggregate(
+                'total_points_awarded': totals.aggregate(
                     total=Coalesce(Sum('total_score'), Decimal('0.00'))
                 )['total']
             }
             
-            # Get unique class groups (department-year-division combinations)
-            class_groups = scores.values(
+            # Class totals come straight from the maintained standings
+            class_totals = totals.values(
                 'department', 'year', 'division'
-            ).distinct().order_by('department', 'year', 'division')
-            
-            # Get all sub-events
-            sub_events = scores.values(
-                'sub_event__id',
-                'sub_event__name',
-                'sub_event__event__name'
-            ).distinct()
-            
-            # Build scores matrix
-            sub_event_scores = {}
-            class_totals = {}
-            
-            # Initialize class totals
-            for group in class_groups:
-                key = f"{group['year']}_{group['department']}_{group['division']}"
-                class_totals[key] = Decimal('0.00')
+            ).annotate(
+                total_score=Sum('total_score')
+            ).order_by('department', 'year', 'division')
             
-            # Calculate scores and totals
-            for score in scores:
-                class_key = f"{score.year}_{score.department}_{score.division}"
-                sub_event_key = score.sub_event.id
-                
-                # Initialize sub_event dict if not exists
-                if sub_event_key not in sub_event_scores:
-                    sub_event_scores[sub_event_key] = {
-                        'name': score.sub_event.name,
-                        'event_name': score.sub_event.event.name,
-                        'scores': {}
-                    }
-                
-                # Add score to matrix
-                sub_event_scores[sub_event_key]['scores'][class_key] = score.total_score
-                
-                # Update class total
-                class_totals[class_key] += score.total_score
+            # Build scores matrix in a single pass
+            pivot = build_score_pivot(scores)
+            columns = {column['id']: column for column in pivot['columns']}
             
             # Calculate department rankings
-            department_rankings = []
-            for dept in scores.values('department').distinct():
-                dept_total = scores.filter(
-                    department=dept['department']
-                ).aggregate(
-                    total=Coalesce(Sum('total_score'), Decimal('0.00'))
-                )['total']
-                
-                department_rankings.append({
+            department_rankings = [
+                {
                     'department': dept['department'],
-                    'total_points': dept_total,
-                    'rank': None  # Will be set after sorting
-                })
-            
-            # Sort and assign ranks
-            department_rankings.sort(key=lambda x: x['total_points'], reverse=True)
-            for i, dept in enumerate(department_rankings, 1):
-                dept['rank'] = i
+                    'total_points': dept['total_points'],
+                    'rank': rank
+                }
+                for rank, dept in enumerate(
+                    totals.values('department').annotate(
+                        total_points=Coalesce(Sum('total_score'), Decimal('0.00'))
+                    ).order_by('-total_points'),
+                    1
+                )
+            ]
             
             # Format response
             response_data = {
                 'summary': summary,
                 'sub_event_scores': [
                     {
-                        'id': sub_event_id,
-                        'name': data['name'],
-                        'event_name': data['event_name'],
+                        'id': row['sub_event_id'],
+                        'name': row['sub_event_name'],
+                        'event_name': row['event_name'],
                         'scores': {
-                            class_key: {
+                            key: {
                                 'score': score,
-                                'department': class_key.split('_')[1],
-                                'year': class_key.split('_')[0],
-                                'division': class_key.split('_')[2]
+                                'department': columns[key]['department'],
+                                'year': str(columns[key]['year']),
+                                'division': str(columns[key]['division'])
                             }
-                            for class_key, score in data['scores'].items()
+                            for key, score in pivot['cells'][row['sub_event_id']].items()
                         }
                     }
-                    for sub_event_id, data in sub_event_scores.items()
+                    for row in pivot['rows'] if row['has_scores']
                 ],
                 'class_totals': [
                     {
-                        'department': class_key.split('_')[1],
-                        'year': class_key.split('_')[0],
-                        'division': class_key.split('_')[2],
-                        'total_score': total
+                        'department': group['department'],
+                        'year': str(group['year']),
+                        'division': str(group['division']),
+                        'total_score': group['total_score']
                     }
-                    for class_key, total in class_totals.items()
+                    for group in class_totals
                 ],
                 'department_rankings': department_rankings
             }
@@ -3292,6 +2991,7 @@ class ScoreboardViewSet(viewsets.ViewSet):
     
     
     @action(detail=False, methods=['GET'])
+    @single_flight()
     def overall_scoreboard(self, request):
         """Get complete scoreboard with all breakdowns"""
         try:
@@ -3301,49 +3001,67 @@ class ScoreboardViewSet(viewsets.ViewSet):
             year = request.query_params.get('year')
             division = request.query_params.get('division')
 
-            # Base queryset
+            # Base querysets
             scores = DepartmentScore.objects.all()
+            totals = DepartmentTotal.objects.filter(score_count__gt=0)
 
             # Apply filters
             if event_id:
                 scores = scores.filter(sub_event__event_id=event_id)
+                totals = totals.filter(event_id=event_id)
             if department:
                 scores = scores.filter(department=department)
+                totals = totals.filter(department=department)
             if year:
                 scores = scores.filter(year=year)
+                totals = totals.filter(year=year)
             if division:
                 scores = scores.filter(division=division)
+                totals = totals.filter(division=division)
+
+            # Rankings come straight from the maintained standings
+            standings = DepartmentTotal.standings(event_id, year, division, department)
 
             # Get summary statistics
+            points = totals.aggregate(total_score=Sum('total_score'), total_aura_points=Sum('total_aura_points'))
             summary = {
-                'total_score': scores.aggregate(Sum('total_score'))['total_score__sum'] or 0,
-                'total_departments': scores.values('department').distinct().count(),
+                'total_score': points['total_score'] or 0,
+                'total_aura_points': points['total_aura_points'] or 0,
+                'total_departments': len(standings['department_standings']),
                 'total_sub_events': scores.values('sub_event').distinct().count()
             }
 
             # Get department-wise totals
-            department_totals = scores.values('department').annotate(
-                total_score=Sum('total_score'),
-                sub_events_participated=Count('sub_event', distinct=True)
-            ).order_by('-total_score')
+            sub_events_participated = dict(
+                scores.values('department').annotate(
+                    count=Count('sub_event', distinct=True)
+                ).values_list('department', 'count')
+            )
+            department_totals = [
+                {
+                    'department': row['department'],
+                    'total_score': row['total_score'],
+                    'total_aura_points': row['total_aura_points'],
+                    'sub_events_participated': sub_events_participated.get(row['department'], 0)
+                }
+                for row in standings['department_standings']
+            ]
 
             # Get year-wise totals
-            year_totals = scores.values('year').annotate(
+            year_totals = totals.values('year').annotate(
                 total_score=Sum('total_score')
             ).order_by('-total_score')
 
             # Get division-wise totals
-            division_totals = scores.values('division').annotate(
+            division_totals = totals.values('division').annotate(
                 total_score=Sum('total_score')
             ).order_by('-total_score')
 
-            # Get detailed sub-event scores
+            # Get detailed sub-event scores, one plain row per class group score
             sub_event_scores = {}
-            for score in scores:
-                key = f"{score.year}_{score.department}_{score.division}"
-                if score.sub_event_id not in sub_event_scores:
-                    sub_event_scores[score.sub_event_id] = {}
-                sub_event_scores[score.sub_event_id][key] = score.total_score
+            for row in scores.values('sub_event_id', 'year', 'department', 'division', 'total_score'):
+                key = class_key(row['year'], row['department'], row['division'])
+                sub_event_scores.setdefault(row['sub_event_id'], {})[key] = row['total_score']
 
             return Response({
                 'summary': summary,
@@ -3561,95 +3279,207 @@ class ScoreboardViewSet(viewsets.ViewSet):
         })
         
     @action(detail=False, methods=['GET'])
+    @score_etag(event_param='event')
+    @single_flight()
     def matrix_scoreboard(self, request):
         """Get scoreboard in matrix format with sub-events as rows and class groups as columns"""
         try:
             event_id = request.query_params.get('event')
             
-            # Get all sub-events for the event
-            sub_events = SubEvent.objects.filter(event_id=event_id).order_by('name')
-            
-            # Get all unique class combinations
             scores = DepartmentScore.objects.all()
+            sub_events = SubEvent.objects.all().order_by('name')
+            totals = DepartmentTotal.objects.filter(score_count__gt=0)
             if event_id:
                 scores = scores.filter(sub_event__event_id=event_id)
+                sub_events = sub_events.filter(event_id=event_id)
+                totals = totals.filter(event_id=event_id)
             
-            class_groups = scores.values(
-                'department', 'year', 'division'
-            ).distinct().order_by('department', 'year', 'division')
-
-            # Create class group labels
-            columns = []
-            for group in class_groups:
-                column_label = f"{group['year']} {group['department']} {group['division']}"
-                columns.append({
-                    'id': f"{group['year']}_{group['department']}_{group['division']}",
-                    'label': column_label,
-                    'department': group['department'],
-                    'year': group['year'],
-                    'division': group['division']
-                })
-
-            # Create score matrix
-            matrix_data = []
-            for sub_event in sub_events:
-                row = {
-                    'sub_event_id': sub_event.id,
-                    'sub_event_name': sub_event.name,
-                    'scores': {}
-                }
-                
-                # Get scores for this sub-event
-                sub_event_scores = scores.filter(sub_event=sub_event)
-                for group in class_groups:
-                    key = f"{group['year']}_{group['department']}_{group['division']}"
-                    score = sub_event_scores.filter(
-                        department=group['department'],
-                        year=group['year'],
-                        division=group['division']
-                    ).first()
-                    row['scores'][key] = score.total_score if score else 0
-                
-                matrix_data.append(row)
-
-            # Calculate column totals
-            column_totals = {}
-            for group in class_groups:
-                key = f"{group['year']}_{group['department']}_{group['division']}"
-                total = scores.filter(
-                    department=group['department'],
-                    year=group['year'],
-                    division=group['division']
-                ).aggregate(total=Sum('total_score'))['total'] or 0
-                column_totals[key] = total
-
-            # Get top 3 class groups
-            sorted_totals = sorted(
-                column_totals.items(), 
-                key=lambda x: x[1], 
-                reverse=True
-            )[:3]
-            top_performers = [
-                {
-                    'rank': idx + 1,
-                    'class_group': key,
-                    'total_points': total
-                } for idx, (key, total) in enumerate(sorted_totals)
-            ]
+            # Column totals are the precomputed class standings
+            pivot = build_score_pivot(scores, sub_events, totals=totals)
+            return Response(matrix_response(pivot, event_id))
 
+        except Exception as e:
+            return Response({'error': str(e)}, status=400)
+        
+    @action(detail=False, methods=['GET'])
+    @score_etag(event_param='event')
+    @single_flight()
+    def scoreboard_breakdown(self, request):
+        """Ranked totals, category breakdown and running totals from the scoreboard engine"""
+        try:
+            event_id = request.query_params.get('event')
+            engine = ScoreboardEngine(event_id)
+            
             return Response({
-                'columns': columns,  # Class groups (TE COMPS A, etc.)
-                'matrix_data': matrix_data,  # Sub-event wise scores
-                'column_totals': column_totals,  # Total scores for each class
-                'top_performers': top_performers,  # Top 3 class groups
                 'event_id': event_id,
-                'total_sub_events': len(sub_events),
-                'total_class_groups': len(class_groups)
+                'department_totals': records(engine.department_totals()),
+                'class_totals': records(engine.class_totals()),
+                'categories': records(engine.category_breakdown().reset_index()),
+                'timeline': records(engine.cumulative_totals())
             })
-
+            
         except Exception as e:
             return Response({'error': str(e)}, status=400)
+    
+    @action(detail=False, methods=['GET'])
+    def export_scoreboard(self, request):
+        """Download the scoreboard as XLSX, CSV or Parquet"""
+        # Not 'format', which DRF reserves for renderer selection
+        file_format = request.query_params.get('export_format', 'xlsx').lower()
+        sheet = request.query_params.get('sheet', 'matrix')
+        event_id = request.query_params.get('event')
+        
+        try:
+            content, content_type, extension = ScoreboardEngine(event_id).export(file_format, sheet)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ImportError as e:
+            return Response(
+                {'error': f'{file_format.upper()} export is not available: {e}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        response = HttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="scoreboard_{timestamp}.{extension}"'
+        return response
+
+    @action(detail=False, methods=['GET'])
+    @score_etag(event_param='event')
+    def standings_history(self, request):
+        """Downsampled running total and AURA points for a department or class group over time"""
+        department = request.query_params.get('department')
+        year = request.query_params.get('year')
+        division = request.query_params.get('division')
+        event_id = request.query_params.get('event')
+        method = request.query_params.get('method', 'lttb')
+
+        if not department:
+            return Response({'error': 'department is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if method not in DOWNSAMPLERS:
+            return Response(
+                {'error': f"method must be one of: {', '.join(DOWNSAMPLERS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            points = int(request.query_params.get('points', 200))
+            start, end = (
+                parse_datetime(request.query_params[name]) if request.query_params.get(name) else None
+                for name in ('start', 'end')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if (request.query_params.get('start') and not start) or (request.query_params.get('end') and not end):
+            return Response({'error': 'start and end must be ISO 8601 datetimes'}, status=status.HTTP_400_BAD_REQUEST)
+
+        series = standings_series(department, year, division, event_id, start, end)
+        sampled = DOWNSAMPLERS[method](series, min(max(points, 3), 2000))
+
+        return Response({
+            'department': department,
+            'year': year,
+            'division': division,
+            'event_id': event_id,
+            'method': method,
+            'total_points': len(series),
+            'series': [
+                {'t': recorded_at, 'total': total, 'aura_points': aura_points}
+                for recorded_at, total, aura_points in sampled
+            ]
+        })
+
+    @action(detail=False, methods=['get'])
+    @score_etag()
+    @single_flight()
+    def overall_standings(self, request):
+        """Get overall department standings"""
+        return Response(DepartmentTotal.standings(
+            event_id=request.query_params.get('event'),
+            year=request.query_params.get('year'),
+            division=request.query_params.get('division')
+        ))
+    
+    @action(detail=False, methods=['get'])
+    def department_statistics(self, request):
+        """Get detailed statistics for a department"""
+        department = request.query_params.get('department')
+        if not department:
+            return Response(
+                {"error": "Department parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+            
+        # Get all scores for the department
+        scores = DepartmentScore.objects.filter(department=department)
         
+        # Event type breakdown
+        event_type_stats = scores.values(
+            'sub_event__category'
+        ).annotate(
+            total_points=Sum('aura_points'),
+            event_count=Count('sub_event', distinct=True)
+        )
+        
+        # Top performing events
+        top_events = scores.values(
+            'sub_event__name',
+            'sub_event__category'
+        ).annotate(
+            points=Sum('aura_points')
+        ).order_by('-points')[:5]
+        
+        # Year/Division performance
+        year_division_stats = scores.values(
+            'year', 'division'
+        ).annotate(
+            total_points=Sum('aura_points'),
+            event_count=Count('sub_event', distinct=True)
+        ).order_by('-total_points')
+        
+        return Response({
+            'department': department,
+            'total_points': scores.aggregate(total=Sum('aura_points'))['total'] or 0,
+            'event_type_breakdown': event_type_stats,
+            'top_events': top_events,
+            'year_division_performance': year_division_stats
+        })
+    
+    @action(detail=False, methods=['get'])
+    def event_leaderboard(self, request):
+        """Get leaderboard for a specific event"""
+        event_id = request.query_params.get('event')
+        if not event_id:
+            return Response(
+                {"error": "Event parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+            
+        scores = DepartmentScore.objects.filter(
+            sub_event__event_id=event_id
+        )
+        
+        # Department standings
+        department_standings = scores.values(
+            'department'
+        ).annotate(
+            total_points=Sum('aura_points'),
+            sub_events_participated=Count('sub_event', distinct=True)
+        ).order_by('-total_points')
+        
+        # Sub-event breakdown
+        sub_event_breakdown = scores.values(
+            'sub_event__name',
+            'department'
+        ).annotate(
+            points=Sum('aura_points')
+        ).order_by('sub_event__name', '-points')
+        
+        return Response({
+            'department_standings': department_standings,
+            'sub_event_breakdown': sub_event_breakdown
+        })
+
 class FacultyViewSet(viewsets.ModelViewSet):
     queryset = User.objects.filter(user_type='FACULTY')
     serializer_class = UserSerializer
@@ -3745,129 +3575,6 @@ class EventCriteriaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class ScoreboardViewSet(viewsets.ViewSet):
-    permission_classes = [IsAuthenticated]
-    
-    @action(detail=False, methods=['get'])
-    def overall_standings(self, request):
-        """Get overall department standings"""
-        # Get query parameters
-        year = request.query_params.get('year')
-        division = request.query_params.get('division')
-        event_id = request.query_params.get('event')
-        
-        # Base query
-        scores = DepartmentScore.objects.all()
-        
-        # Apply filters
-        if year:
-            scores = scores.filter(year=year)
-        if division:
-            scores = scores.filter(division=division)
-        if event_id:
-            scores = scores.filter(sub_event__event_id=event_id)
-            
-        # Get department-wise totals
-        department_scores = scores.values(
-            'department'
-        ).annotate(
-            total_aura_points=Sum('aura_points'),
-            total_events=Count('sub_event', distinct=True)
-        ).order_by('-total_aura_points')
-        
-        # Get detailed breakdown
-        detailed_scores = scores.values(
-            'department', 'year', 'division'
-        ).annotate(
-            total_aura_points=Sum('aura_points'),
-            total_events=Count('sub_event', distinct=True)
-        ).order_by('-total_aura_points')
-        
-        return Response({
-            'department_standings': department_scores,
-            'detailed_standings': detailed_scores
-        })
-    
-    @action(detail=False, methods=['get'])
-    def department_statistics(self, request):
-        """Get detailed statistics for a department"""
-        department = request.query_params.get('department')
-        if not department:
-            return Response(
-                {"error": "Department parameter is required"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-            
-        # Get all scores for the department
-        scores = DepartmentScore.objects.filter(department=department)
-        
-        # Event type breakdown
-        event_type_stats = scores.values(
-            'sub_event__category'
-        ).annotate(
-            total_points=Sum('aura_points'),
-            event_count=Count('sub_event', distinct=True)
-        )
-        
-        # Top performing events
-        top_events = scores.values(
-            'sub_event__name',
-            'sub_event__category'
-        ).annotate(
-            points=Sum('aura_points')
-        ).order_by('-points')[:5]
-        
-        # Year/Division performance
-        year_division_stats = scores.values(
-            'year', 'division'
-        ).annotate(
-            total_points=Sum('aura_points'),
-            event_count=Count('sub_event', distinct=True)
-        ).order_by('-total_points')
-        
-        return Response({
-            'department': department,
-            'total_points': scores.aggregate(total=Sum('aura_points'))['total'] or 0,
-            'event_type_breakdown': event_type_stats,
-            'top_events': top_events,
-            'year_division_performance': year_division_stats
-        })
-    
-    @action(detail=False, methods=['get'])
-    def event_leaderboard(self, request):
-        """Get leaderboard for a specific event"""
-        event_id = request.query_params.get('event')
-        if not event_id:
-            return Response(
-                {"error": "Event parameter is required"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-            
-        scores = DepartmentScore.objects.filter(
-            sub_event__event_id=event_id
-        )
-        
-        # Department standings
-        department_standings = scores.values(
-            'department'
-        ).annotate(
-            total_points=Sum('aura_points'),
-            sub_events_participated=Count('sub_event', distinct=True)
-        ).order_by('-total_points')
-        
-        # Sub-event breakdown
-        sub_event_breakdown = scores.values(
-            'sub_event__name',
-            'department'
-        ).annotate(
-            points=Sum('aura_points')
-        ).order_by('sub_event__name', '-points')
-        
-        return Response({
-            'department_standings': department_standings,
-            'sub_event_breakdown': sub_event_breakdown
-        })
-
 class SubEventFacultyViewSet(viewsets.ModelViewSet):
     queryset = SubEventFaculty.objects.all()
     serializer_class = SubEventFacultySerializer
@@ -3930,62 +3637,69 @@ class SubEventFacultyViewSet(viewsets.ModelViewSet):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@score_etag()
+@single_flight()
 def overall_standings(request):
     try:
-        # Get all sub events
-        sub_events = SubEvent.objects.filter(
-            event__category='SPORTS'  # Adjust if needed for different categories
-        )
+        # Sports standings by default; another sub-event category, or ALL for every one
+        category = request.query_params.get('category', 'SPORTS').upper()
+        include_empty = request.query_params.get('include_empty', '').lower() == 'true'
         
-        # Define all departments
-        all_departments = [
-            'FE-A', 'FE-B', 'FE-C', 'FE-D', 'FE-E', 'FE-F',
-            'SE-COMPS-A', 'SE-COMPS-B', 'SE-AIML-C', 'SE-AIML-D', 'SE-IT', 'SE-DE',
-            'TE-COMPS-A', 'TE-COMPS-B', 'TE-AIML-C', 'TE-AIML-D', 'TE-IT', 'TE-DE',
-            'BE-COMPS-A', 'BE-COMPS-B', 'BE-AIML-C', 'BE-AIML-D', 'BE-IT', 'BE-DE'
-        ]
-
-        # Initialize response structure
-        sub_event_scores = []
+        sub_events = SubEvent.objects.all().order_by('name')
+        scores = DepartmentScore.objects.all()
+        if category == 'ALL':
+            # The maintained standings already hold every class group's total
+            totals = DepartmentTotal.objects.filter(score_count__gt=0)
+        else:
+            sub_events = sub_events.filter(category=category)
+            scores = scores.filter(sub_event__category=category)
+            # DepartmentTotal is not split by category, so one category is summed in the database
+            totals = scores
+        
+        # Three queries however many sub-events and classes there are
+        sub_event_rows = list(sub_events.values('id', 'name'))
+        score_rows = list(scores.values(
+            'sub_event_id', 'department', 'year', 'division', 'total_score', 'aura_points'
+        ).order_by('id'))
+        total_rows = list(totals.values('department', 'year', 'division').annotate(
+            total_score=Sum('total_score')
+        ).order_by())
         
-        # Get scores for each sub event
-        for sub_event in sub_events:
-            scores_dict = {}
-            
-            # Get scores for this sub event
-            department_scores = DepartmentScore.objects.filter(
-                sub_event=sub_event
-            ).select_related('department')
-            
-            # Populate scores for each department
-            for department in all_departments:
-                dept_score = department_scores.filter(
-                    department=department
-                ).first()
-                
-                scores_dict[department] = {
-                    'score': dept_score.total_score if dept_score else None,
-                    'aura_points': dept_score.aura_points if dept_score else None
-                }
-            
+        class_groups = class_group_registry(score_rows + total_rows, include_choices=include_empty)
+        labels = {group: class_label(*group) for group in class_groups}
+        
+        cells = {}
+        for row in score_rows:
+            group = (row['year'], row['department'], row['division'])
+            cells.setdefault(row['sub_event_id'], {}).setdefault(group, row)
+        totals = {group: Decimal('0.00') for group in class_groups}
+        for row in total_rows:
+            totals[(row['year'], row['department'], row['division'])] = row['total_score']
+        
+        sub_event_scores = []
+        for sub_event in sub_event_rows:
+            sub_event_cells = cells.get(sub_event['id'], {})
             sub_event_scores.append({
-                'name': sub_event.name,
-                'scores': scores_dict
-            })
-
-        # Calculate class totals
-        class_totals = []
-        for department in all_departments:
-            total_score = DepartmentScore.objects.filter(
-                department=department
-            ).aggregate(
-                total_score=Sum('total_score')
-            )['total_score'] or 0
-            
-            class_totals.append({
-                'department': department,
-                'total_score': total_score
+                'name': sub_event['name'],
+                'scores': {
+                    labels[group]: {
+                        'score': sub_event_cells[group]['total_score'] if group in sub_event_cells else None,
+                        'aura_points': sub_event_cells[group]['aura_points'] if group in sub_event_cells else None
+                    }
+                    for group in class_groups
+                }
             })
+        
+        class_totals = [
+            {
+                'class_group': labels[group],
+                'department': group[1],
+                'year': group[0],
+                'division': group[2],
+                'total_score': totals[group]
+            }
+            for group in class_groups
+        ]
 
         # Calculate department rankings
         department_rankings = []
@@ -3998,6 +3712,7 @@ def overall_standings(request):
         for rank, dept_data in enumerate(sorted_totals, 1):
             department_rankings.append({
                 'rank': rank,
+                'class_group': dept_data['class_group'],
                 'department': dept_data['department'],
                 'total_points': dept_data['total_score']
             })
@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+
+The live scoreboard endpoints (events/live.py) are async streaming views, so
+production serves this application (``gunicorn sc_backend.asgi:application
+--worker-class=uvicorn.workers.UvicornWorker``, see render.yaml) to keep
+long-lived connections from holding a worker thread each.
 """
 
 import os
@@ -8,4 +8,27 @@ class StaticStorage(S3Boto3Storage):
 class MediaStorage(S3Boto3Storage):
     location = 'media'
     default_acl = 'public-read'
-    file_overwrite = False 
\ No newline at end of file
+    file_overwrite = False 
+
+class ScoreboardStorage(S3Boto3Storage):
+    """Public scoreboard snapshots written by events.snapshots"""
+    default_acl = 'public-read'
+    # latest.json is rewritten in place
+    file_overwrite = True
+    querystring_auth = False
+
+    def get_object_parameters(self, name):
+        params = super().get_object_parameters(name)
+        if name.endswith('.json.gz'):
+            # Content-hashed snapshots never change once written
+            params.update({
+                'ContentType': 'application/json',
+                'ContentEncoding': 'gzip',
+                'CacheControl': 'public, max-age=31536000, immutable'
+            })
+        else:
+            params.update({
+                'ContentType': 'application/json',
+                'CacheControl': 'public, max-age=5, must-revalidate'
+            })
+        return params
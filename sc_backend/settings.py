@@ -276,8 +276,16 @@ if not DEBUG:  # Only use S3 in production
     DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
     MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/{MEDIA_LOCATION}/'
 
+    # Public scoreboard snapshots (latest.json must be overwritable)
+    SCOREBOARD_SNAPSHOT_STORAGE = 'sc_backend.custom_storages.ScoreboardStorage'
+
 # Optional: Custom domain
 
+# Republish the static scoreboard JSON on the request that committed each score change
+# (see events/snapshots.py). Off by default: that puts the uploads on the judge's request,
+# so run `publish_scoreboard --watch SECONDS` as a background process instead.
+SCOREBOARD_SNAPSHOTS_ON_CHANGE = str(os.environ.get('SCOREBOARD_SNAPSHOTS_ON_CHANGE', 'False')).lower() == 'true'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 STATICFILES_DIRS = [
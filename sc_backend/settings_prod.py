@@ -31,4 +31,7 @@ STATIC_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/{STATIC_LOCATION}/'
     # S3 media settings
 MEDIA_LOCATION = 'media'
 DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
-MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/{MEDIA_LOCATION}/'
\ No newline at end of file
+MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/{MEDIA_LOCATION}/'
+
+# Public scoreboard snapshots (latest.json must be overwritable)
+SCOREBOARD_SNAPSHOT_STORAGE = 'sc_backend.custom_storages.ScoreboardStorage'